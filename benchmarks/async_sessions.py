@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of the AsyncBrowserServer against the stand-in web driver as the number of
+concurrent sessions grows.
+
+Usage: python -m benchmarks.async_sessions [--latency 0.005] [--commands 50]
+"""
+import argparse
+import asyncio
+import time
+
+from eaiautomatontools.asyncBrowserServer import AsyncBrowserServer
+from eaiautomatontools.resources.driver_stub import DriverStub
+
+
+async def scenario(session: AsyncBrowserServer, commands: int):
+    await session.go_to("http://localhost/")
+    for _ in range(commands - 1):
+        await session.find_element({"type": "id", "value": "name"})
+
+
+async def run(url: str, sessions: int, commands: int) -> float:
+    servers = [AsyncBrowserServer(url, capabilities={"browserName": "stub"})
+               for _ in range(sessions)]
+    await asyncio.gather(*(server.serve() for server in servers))
+    start = time.perf_counter()
+    await asyncio.gather(*(scenario(server, commands) for server in servers))
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(server.close() for server in servers))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="stand-in driver latency per command in second")
+    parser.add_argument("--commands", type=int, default=50, help="commands per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    arguments = parser.parse_args()
+
+    stub = DriverStub(latency=arguments.latency)
+    stub.start()
+    try:
+        print(f"{'sessions':>8} {'seconds':>8} {'commands/s':>11}")
+        for sessions in arguments.sessions:
+            elapsed = asyncio.run(run(stub.url, sessions, arguments.commands))
+            print(f"{sessions:>8} {elapsed:>8.3f} {sessions * arguments.commands / elapsed:>11.0f}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+BrowserServer startup time with and without the driver executables cache.
+
+Each run serves and closes a browser. Without cache, the webdriver manager resolves the
+executable on each serve. With cache, the executable comes from a warm DriverCache.
+
+Usage: python -m benchmarks.driver_startup [--browser headless-chrome] [--runs 5]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from eaiautomatontools.browserServer import BrowserServer
+from eaiautomatontools.driver_cache import DriverCache
+
+
+def startup(browser_name: str, cache) -> float:
+    browser = BrowserServer()
+    browser.browser_name = browser_name
+    browser.driver_cache = cache
+    start = time.perf_counter()
+    browser.serve()
+    elapsed = time.perf_counter() - start
+    browser.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--browser", default="headless-chrome", help="the browser name")
+    parser.add_argument("--runs", type=int, default=5, help="serves per configuration")
+    arguments = parser.parse_args()
+
+    cache = DriverCache(root=tempfile.mkdtemp())
+    # Warm the cache
+    startup(arguments.browser, cache)
+    print(f"{'configuration':>14} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for label, configuration in (("without cache", None), ("with cache", cache)):
+        timings = [startup(arguments.browser, configuration) for _ in range(arguments.runs)]
+        print(f"{label:>14} {statistics.median(timings):>9.3f} {min(timings):>7.3f} "
+              f"{max(timings):>7.3f}")
+    cache.clear()
+
+
+if __name__ == "__main__":
+    main()
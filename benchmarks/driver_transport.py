@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Commands per second per session of the HTTP transport settings against the stand-in web
+driver.
+
+Each session is a selenium web driver running its commands in its own thread, the sessions
+running concurrently. The stand-in driver answers after a fixed latency: the difference
+between the settings is the connection handling cost.
+
+Usage: python -m benchmarks.driver_transport [--latency 0.001] [--commands 200]
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+from eaiautomatontools.resources.driver_stub import DriverStub
+from eaiautomatontools.transport import Transport, apply_transport
+
+SETTINGS = (("selenium defaults", None),
+            ("no keep-alive", Transport(keep_alive=False)),
+            ("keep-alive", Transport()),
+            ("keep-alive, short timeouts", Transport(connect_timeout=1, read_timeout=10,
+                                                     retries=0)),
+            ("keep-alive, pool of 4", Transport(pool_size=4, block=True)))
+
+
+def session(url: str, transport: Transport, commands: int, rates: list):
+    driver = webdriver.Remote(command_executor=url, options=webdriver.ChromeOptions())
+    try:
+        if transport is not None:
+            apply_transport(driver, transport)
+        driver.get("http://localhost/")
+        start = time.perf_counter()
+        for _ in range(commands):
+            driver.find_element(By.ID, "name")
+        rates.append(commands / (time.perf_counter() - start))
+    finally:
+        driver.quit()
+
+
+def run(url: str, transport: Transport, sessions: int, commands: int) -> list:
+    rates = []
+    threads = [threading.Thread(target=session, args=(url, transport, commands, rates))
+               for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.001,
+                        help="stand-in driver latency per command in second")
+    parser.add_argument("--commands", type=int, default=200, help="commands per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    arguments = parser.parse_args()
+
+    stub = DriverStub(latency=arguments.latency)
+    stub.start()
+    try:
+        print(f"{'transport':>27} {'sessions':>8} {'commands/s/session':>19} {'total':>7}")
+        for label, transport in SETTINGS:
+            for sessions in arguments.sessions:
+                rates = run(stub.url, transport, sessions, arguments.commands)
+                print(f"{label:>27} {sessions:>8} {statistics.mean(rates):>19.0f} "
+                      f"{sum(rates):>7.0f}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
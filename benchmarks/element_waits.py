@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Detection latency of the element waits: event driven (MutationObserver) against polling.
+
+Each run schedules the insertion of an element in the page after a random delay, then waits
+for it. The latency is the time between the insertion and the end of the wait, as measured by
+the browser clock. Polling every 200ms detects the element up to 200ms late and sends a find
+command per step; the event driven wait is a single command resolved on the DOM mutation.
+
+Usage: python -m benchmarks.element_waits [--browser headless-chrome] [--runs 50]
+"""
+import argparse
+import random
+import statistics
+
+from eaiautomatontools.browserServer import BrowserServer
+from eaiautomatontools.information import wait_for_field
+from eaiautomatontools.resources.app import Server
+
+SCHEDULE = """
+var delay = arguments[0];
+window.setTimeout(function () {
+    var element = document.createElement('div');
+    element.id = 'late';
+    element.textContent = 'late';
+    document.body.appendChild(element);
+    window.__inserted = performance.now();
+}, delay);
+"""
+
+REMOVE = """
+var element = document.getElementById('late');
+if (element) { element.remove(); }
+return performance.now() - window.__inserted;
+"""
+
+
+def latencies(driver, event_driven: bool, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        driver.execute_script(SCHEDULE, random.randint(50, 500))
+        element = wait_for_field(driver, {"type": "id", "value": "late"}, until=5,
+                                 event_driven=event_driven)
+        assert element is not None, "The element has not been detected"
+        # The removal comes right after the wait: its elapsed time bounds the latency
+        timings.append(driver.execute_script(REMOVE))
+    return timings
+
+
+def percentile(timings: list, rank: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(int(rank * len(ordered)), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--browser", default="headless-chrome", help="the browser name")
+    parser.add_argument("--runs", type=int, default=50, help="waits per configuration")
+    arguments = parser.parse_args()
+
+    server = Server()
+    server.start()
+    browser = BrowserServer()
+    browser.browser_name = arguments.browser
+    browser.serve()
+    try:
+        browser.go_to("http://localhost:8081/index.html")
+        print(f"{'wait':>13} {'p50 ms':>7} {'p99 ms':>7} {'mean ms':>8}")
+        for label, event_driven in (("polling", False), ("event driven", True)):
+            timings = latencies(browser.webdriver, event_driven, arguments.runs)
+            print(f"{label:>13} {percentile(timings, 0.5):>7.1f} "
+                  f"{percentile(timings, 0.99):>7.1f} {statistics.mean(timings):>8.1f}")
+    finally:
+        browser.close()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
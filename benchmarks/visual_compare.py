@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Visual comparison time and peak memory of 4K wide full page screenshots.
+
+The baseline is a noisy 3840 pixels wide page; the actual screenshot differs by a few
+rectangles. Each tile height is timed on identical images (single pass) and on different
+ones (second pass drawing the diff image).
+
+Usage: python -m benchmarks.visual_compare [--height 8640] [--tiles 256 512 2048]
+"""
+import argparse
+import time
+import tracemalloc
+
+from PIL import Image, ImageDraw
+
+from eaiautomatontools.visual import compare_screenshots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=8640, help="the page height in pixels")
+    parser.add_argument("--tiles", type=int, nargs="+", default=[256, 512, 2048])
+    arguments = parser.parse_args()
+
+    baseline = Image.effect_noise((arguments.width, arguments.height), 64).convert("RGB")
+    different = baseline.copy()
+    draw = ImageDraw.Draw(different)
+    for top in range(0, arguments.height, arguments.height // 8):
+        draw.rectangle((100, top + 10, 400, top + 60), fill=(255, 0, 0))
+
+    print(f"{'tile':>6} {'case':>10} {'seconds':>8} {'peak MB':>8}")
+    for tile in arguments.tiles:
+        for case, actual in (("identical", baseline), ("different", different)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            compare_screenshots(actual, baseline, tolerance=8, tile_height=tile)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+            print(f"{tile:>6} {case:>10} {elapsed:>8.3f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
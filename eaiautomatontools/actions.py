@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 import logging
-from time import sleep
+from typing import Union
 
 from selenium.webdriver.remote.webelement import WebElement
 
-from .finders import find_element, find_from_elements
-from .information import is_field_exist, is_field_displayed
-from .drivers_tools import driver_field_validation, web_element_validation
+from .deadlines import Deadline, as_deadline
+from .finders import find_element, find_from_elements, resolve_many, MATCH_EXACT
+from .information import element_snapshot, is_field_exist, is_field_displayed
+from .retries import RetryPolicy, retrying
+from .drivers_tools import (driver_field_validation, driver_validation, move_to,
+                            web_element_validation)
+from .scripts import FILL_FORM
 from selenium.common.exceptions import InvalidElementStateException, NoSuchElementException, \
     StaleElementReferenceException
 from selenium.webdriver.support.select import Select
@@ -15,11 +19,17 @@ from selenium.webdriver import ActionChains
 
 log = logging.getLogger(__name__)
 
+FILL_DOM = "dom"
+FILL_KEYS = "keys"
+FILL_MODES = (FILL_DOM, FILL_KEYS)
+
 
 def fill_elements(driver=None, fields=None, web_element=None, data=None) -> int:
     """
     Fill a field set with data where the field and data are identified by the same key
     Keys are taken from the data set dictionary
+    All fields are looked up in a single browser call (see finders.resolve_many). Fields not
+    found that way are filled using fill_element.
     :param driver: a selenium web driver
     :param fields: a dictionary of fields
     :param web_element: a web_element to search elements from
@@ -35,9 +45,23 @@ def fill_elements(driver=None, fields=None, web_element=None, data=None) -> int:
                       f"Data keys '{data.keys()}'. "
                       f"Fields keys '{fields.keys()}'")
             raise KeyError("Data keys are not included in Fields keys")
+        elements = resolve_many(driver=driver,
+                                fields={key: fields[key] for key in data},
+                                web_element=web_element)
         status = 0
         for key in data:
-            status += fill_element(driver=driver, field=fields[key], web_element=web_element, value=data[key])
+            if elements[key] is not None:
+                try:
+                    __type_value(elements[key], data[key])
+                    continue
+                except StaleElementReferenceException:
+                    log.info(f"Field '{fields[key]}' is stale, look it up again")
+                except InvalidElementStateException as invalid_element:
+                    log.warning(invalid_element)
+                    status += 1
+                    continue
+            status += fill_element(driver=driver, field=fields[key], web_element=web_element,
+                                   value=data[key])
         return status
     except InvalidElementStateException as invalid_element:
         log.error(invalid_element)
@@ -47,13 +71,89 @@ def fill_elements(driver=None, fields=None, web_element=None, data=None) -> int:
         raise NoSuchElementException(f"Field '{fields[key]}' could not be found for filling") from None
 
 
-def fill_element(driver=None, field=None, web_element=None, value=None) -> int:
+def fill_form(driver=None,
+              fields: dict = None,
+              data: dict = None,
+              web_element: WebElement = None,
+              mode: str = FILL_DOM,
+              keys_fields: tuple = ()) -> int:
+    """
+    Fill a form: fields and data are identified by the same keys, taken from the data.
+    With the "dom" mode, all fields are looked up and filled in a single browser call: text
+    inputs and textareas get their value through the native setter, checkboxes and radios are
+    clicked when their state differs from the boolean data (a string selects the radio of the
+    same group with this value), selects choose their options by value or text (a list for
+    multiple selects). The input and change events are fired and the field loses the focus, as
+    the frameworks expect.
+    With the "keys" mode, values are typed (see fill_elements) and checkboxes are clicked (see
+    set_checkbox).
+    :param driver: a selenium web driver
+    :param fields: a dictionary of fields
+    :param data: a dictionary of data
+    :param web_element: a web_element to search elements from
+    :param mode: "dom" or "keys"
+    :param keys_fields: the keys of the fields typed with real keystrokes in the "dom" mode
+    :raise KeyError: data keys are not included in fields keys
+    :raise ValueError: unknown mode
+    :return: 0 if success, the number of fields not filled otherwise
+    """
+    if mode not in FILL_MODES:
+        log.error(f"Unknown fill mode. Get {mode} instead of {FILL_MODES}")
+        raise ValueError(f"Unknown fill mode. Get {mode} instead of {FILL_MODES}")
+    if any(key not in fields.keys() for key in data.keys()):
+        log.error(f"Missing fields for the given data. "
+                  f"Data keys '{data.keys()}'. "
+                  f"Fields keys '{fields.keys()}'")
+        raise KeyError("Data keys are not included in Fields keys")
+    typed = {key: value for key, value in data.items()
+             if mode == FILL_KEYS or key in keys_fields}
+    status = 0
+    for key in [key for key in typed if isinstance(typed[key], bool)]:
+        status += set_checkbox(driver=driver, field=fields[key], is_checked=typed.pop(key),
+                               web_element=web_element)
+    if typed:
+        status += fill_elements(driver=driver, fields=fields, web_element=web_element,
+                                data=typed)
+    injected = [key for key in data if mode == FILL_DOM and key not in keys_fields]
+    if not injected:
+        return status
+    driver_validation(driver, log)
+    web_element_validation(web_element, log)
+    locators = [driver_field_validation(driver, fields[key], log) for key in injected]
+    reasons = driver.execute_script(FILL_FORM,
+                                    [[locator.type,
+                                      locator.value,
+                                      locator.text,
+                                      locator.match or MATCH_EXACT,
+                                      data[key]]
+                                     for key, locator in zip(injected, locators)],
+                                    web_element)
+    for key, reason in zip(injected, reasons):
+        if reason is not None:
+            log.warning(f"Field '{key}' {fields[key]} could not be filled: {reason}")
+            status += 1
+    return status
+
+
+def __type_value(elem: WebElement, value):
+    """Type the value in the element replacing its content. An empty value clears the element"""
+    if value:
+        elem.clear()
+        elem.send_keys(str(value))
+    else:
+        number_of_backspace_hit = len(elem.get_attribute('value'))
+        elem.send_keys(number_of_backspace_hit * Keys.BACKSPACE)
+
+
+def fill_element(driver=None, field=None, web_element=None, value=None,
+                 retry: RetryPolicy = None) -> int:
     """
     Fill the given field with the value.
     :param web_element:
     :param driver: a selenium web driver
     :param field: a dictionary
     :param value: a string or castable to string
+    :param retry: the RetryPolicy, None for the session or default one (see retries)
     :raise AttributeError: web driver is not set or field is not a dictionary
     :raise ValueError: field doesn't contains the expected field
     :raise InvalidElementStateException: if the element is not user-editable
@@ -61,26 +161,16 @@ def fill_element(driver=None, field=None, web_element=None, value=None) -> int:
     :return: 0 if success, 1 otherwise
     """
     try:
-        driver_field_validation(driver, field, log)
-        iteration = 0
-        while iteration < 5:
-            try:
-                elem = find_element(driver=driver, field=field, web_element=web_element)
-                if elem is None:
-                    iteration += 1
-                    continue
-                if value:
-                    elem.clear()
-                    elem.send_keys(str(value))
-                else:
-                    number_of_backspace_hit = len(elem.get_attribute('value'))
-                    elem.send_keys(number_of_backspace_hit * Keys.BACKSPACE)
-                return 0
-            except StaleElementReferenceException:
-                log.info("StaleElementReferenceException retry after 100ms sleep")
-                iteration += 1
-                sleep(0.1)
-        return 1
+        locator = driver_field_validation(driver, field, log)
+
+        def attempt():
+            elem = find_element(driver=driver, field=locator, web_element=web_element)
+            if elem is None:
+                return None
+            __type_value(elem, value)
+            return 0
+
+        return 1 if retrying(driver, locator, attempt, "fill_element", retry) is None else 0
     except InvalidElementStateException as invalid_element:
         log.warning(invalid_element)
         return 1
@@ -93,41 +183,38 @@ def select_in_dropdown(driver=None,
                        field=None,
                        visible_text=None,
                        value=None,
-                       web_element=None) -> int:
+                       web_element=None,
+                       retry: RetryPolicy = None) -> int:
     """
     see https://stackoverflow.com/questions/7867537/selenium-python-drop-down-menu-option-value
     see https://sqa.stackexchange.com/questions/1355/what-is-the-correct-way-to-select-an-option-using-seleniums-python-webdriver # noqa
     see https://seleniumhq.github.io/selenium/docs/api/py/webdriver_support/selenium.webdriver.support.select.html # noqa
+    :param retry: the RetryPolicy, None for the session or default one (see retries)
     :raise AssertionError: driver is not define, field is not valid
     :return:
     """
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     try:
-        iteration = 0
-        while iteration < 5:
-            try:
-                element = find_element(driver=driver, field=field, web_element=web_element)
-                if element is None:
-                    iteration += 1
-                    continue
-                my_select = Select(element)
-
-                if visible_text is not None:
-                    my_select.select_by_visible_text(visible_text)
-                elif value is not None:
-                    my_select.select_by_value(value)
-                else:
-                    raise Exception("select_in_dropdown can't select with no value.")
-
-                return 0
-            except StaleElementReferenceException:
-                log.info("StaleElementReferenceException retry after 100ms sleep")
-                iteration += 1
-                sleep(0.1)
-            except NoSuchElementException as no_such:
-                log.warning(f"Cannot retrieve {value} from dropdown {field}")
-                return 1
-        return 1
+        def attempt():
+            element = find_element(driver=driver, field=locator, web_element=web_element)
+            if element is None:
+                return None
+            my_select = Select(element)
+
+            if visible_text is not None:
+                my_select.select_by_visible_text(visible_text)
+            elif value is not None:
+                my_select.select_by_value(value)
+            else:
+                raise Exception("select_in_dropdown can't select with no value.")
+            return 0
+
+        try:
+            selected = retrying(driver, locator, attempt, "select_in_dropdown", retry)
+            return 1 if selected is None else 0
+        except NoSuchElementException:
+            log.warning(f"Cannot retrieve {value} from dropdown {field}")
+            return 1
     except Exception as exception:
         log.error(exception.args)
         raise Exception(exception.args[0]) from None
@@ -135,29 +222,42 @@ def select_in_dropdown(driver=None,
 
 def select_in_angular_dropdown(driver=None,
                                root_field: dict = None,
-                               visible_text: str = None) -> int:
+                               visible_text: str = None,
+                               match: str = MATCH_EXACT,
+                               until: Union[float, Deadline] = 5,
+                               retry: RetryPolicy = None) -> int:
     """
     Select a field within a mat_option list
 
     If root_field is defined then click it and search for visible_text in mat-option elements.
     Otherwise only search for visible_text in mat-options elements
+    Options rendered after the first ones are looked up again following the retry policy.
     :param visible_text: a string to search
     :param driver: a selenium web driver
     :param root_field: a dictionary for the container
+    :param match: the text matching mode (see finders.find_from_elements)
+    :param until: the time in second, or a Deadline, shared by the whole selection
+    :param retry: the RetryPolicy, None for the session or default one (see retries)
     :return:
     """
     try:
+        deadline = as_deadline(driver, until, "select_in_angular_dropdown")
         if root_field is not None:
-            click_element(driver=driver, field=root_field)
-            sleep(0.1)
+            click_element(driver=driver, field=root_field, retry=retry, until=deadline)
 
-        if is_field_exist(driver=driver, field={"type": "tag_name", "value": "mat-option"}):
-            element = find_from_elements(driver=driver,
-                                         field={"type": "tag_name", "value": "mat-option"},
-                                         text=visible_text)
+        options = {"type": "tag_name", "value": "mat-option"}
+        if is_field_exist(driver=driver, field=options, until=deadline):
+            element = retrying(driver, options,
+                               lambda: find_from_elements(driver=driver,
+                                                          field=options,
+                                                          text=visible_text,
+                                                          match=match),
+                               "select_in_angular_dropdown", retry, deadline)
+            if element is None:
+                raise Exception(f"No option '{visible_text}' displayed")
             element.click()
         else:
-            raise Exception('No options displayed within 5 seconds')
+            raise Exception(f'No options displayed within {deadline.budget} seconds')
         return 0
     except StaleElementReferenceException as stale_exception:
         log.warning(f"StaleElementReferenceException."
@@ -171,59 +271,55 @@ def select_in_angular_dropdown(driver=None,
 
 def click_element(driver=None,
                   field: dict = None,
-                  web_element: WebElement = None) -> int:
+                  web_element: WebElement = None,
+                  retry: RetryPolicy = None,
+                  until: Union[float, Deadline] = None) -> int:
     """
     Do simple left click on the given field or on the sub element when web_element is provided
     :param driver: a selenium web driver
     :param field: a dictionary
     :param web_element: an element from which to find the element to click
+    :param retry: the RetryPolicy, None for the session or default one (see retries)
+    :param until: the time in second, or a Deadline, bounding the retries. None for the
+            session deadline
     :raise AssertionError: driver is not define, field is not valid
     :raise NoSuchElementException: element to click has not been found
     :return: 0 if success
     """
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     web_element_validation(web_element, log)
-    iteration = 0
-    while iteration < 5:
-        try:
-            found_element = find_element(driver=driver, field=field, web_element=web_element)
-            if found_element is None:
-                iteration += 1
-                continue
-            found_element.click()
-            return 0
-        except StaleElementReferenceException:
-            log.info("StaleElementReferenceException retry after 100ms sleep")
-            iteration += 1
-            sleep(0.1)
-    raise NoSuchElementException(f"Element {field} has not been found")
+
+    def attempt():
+        found_element = find_element(driver=driver, field=locator, web_element=web_element)
+        if found_element is None:
+            return None
+        found_element.click()
+        return 0
+
+    deadline = None if until is None else as_deadline(driver, until, "click_element")
+    if retrying(driver, locator, attempt, "click_element", retry, deadline) is None:
+        raise NoSuchElementException(f"Element {field} has not been found")
+    return 0
 
 
 def mouse_click(driver=None,
                 field: dict = None,
-                web_element: WebElement = None) -> int:
+                web_element: WebElement = None,
+                retry: RetryPolicy = None) -> int:
     """
     Perform a mouse click in the element center
     :param driver:
     :param field:
     :param web_element:
+    :param retry: the RetryPolicy, None for the session or default one (see retries)
     :return:
     """
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     web_element_validation(web_element, log)
-    iteration = 0
-    found_element = None
-    while iteration < 5:
-        try:
-            found_element = find_element(driver=driver, field=field, web_element=web_element)
-            if found_element is not None:
-                break
-            iteration += 1
-            continue
-        except StaleElementReferenceException:
-            log.info("StaleElementReferenceException retry after 100ms sleep")
-            iteration += 1
-            sleep(0.1)
+    found_element = retrying(driver, locator,
+                             lambda: find_element(driver=driver, field=locator,
+                                                  web_element=web_element),
+                             "mouse_click", retry)
     if found_element is None:
         return 1
 
@@ -247,22 +343,22 @@ def set_checkbox(driver=None,
     :raise ValueError: field dictionary doesn't contain the minimal keys
     :return: 0 if success, 1 otherwise
     """
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     if not isinstance(is_checked, bool):
         log.error(f"is_checked is expected to be a boolean. Get {type(is_checked)}")
         raise TypeError("is_checked is expected to be a boolean.")
 
-    elem = find_element(driver=driver, field=field, web_element=web_element)
-    if elem is None:
+    snapshot = element_snapshot(driver=driver, field=locator, web_element=web_element)
+    if snapshot is None:
         log.warning("Cannot set the check box because it was not found")
         return 1
-    current_state = bool(elem.get_attribute("checked"))
-    if current_state is not is_checked:
-        elem.click()
+    if snapshot.checked is is_checked:
+        return 0
+    move_to(driver, snapshot.element, f"Set checkbox: {field}")
+    snapshot.element.click()
 
     # Check if the element has been set in the expected status
-    current_state = bool(elem.get_attribute("checked"))
-    if current_state is not is_checked:
+    if element_snapshot(driver=driver, element=snapshot.element).checked is not is_checked:
         log.warning(f"The element '{field}' can't be set to the expected status '{is_checked}'.")
         return 1
     return 0
@@ -276,9 +372,9 @@ def hover_element(driver=None, field: dict = None) -> int:
     :raise AssertionError: driver is not defined, field is not valid
     :return: 0 if success
     """
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     try:
-        elem = find_element(driver=driver, field=field)
+        elem = find_element(driver=driver, field=locator)
         hover = ActionChains(driver).move_to_element(elem)
         hover.perform()
         return 0
@@ -290,25 +386,31 @@ def hover_element(driver=None, field: dict = None) -> int:
 def select_in_elements(driver=None,
                        field: dict = None,
                        displayed_text: str = None,
-                       web_element: WebElement = None) -> int:
+                       web_element: WebElement = None,
+                       match: str = MATCH_EXACT,
+                       until: Union[float, Deadline] = 5) -> int:
     """
     Do a click on the element which text match
     :param driver: a selenium web driver
     :param field: a dictionary
     :param displayed_text: a string
     :param web_element:
+    :param match: the text matching mode (see finders.find_from_elements)
+    :param until: the time in second, or a Deadline, to wait for the field display
     :raise AttributeError: driver is not defined, field or displayed_text is not valid
     :return: 0 if success
     """
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     if displayed_text is None or not isinstance(displayed_text, str):
         raise AttributeError("Displayed text must be a non-empty string")
     try:
-        if is_field_displayed(driver=driver, field=field, web_element=web_element):
+        if is_field_displayed(driver=driver, field=locator, web_element=web_element,
+                              wait_until=until):
             element = find_from_elements(driver=driver,
-                                         field=field,
+                                         field=locator,
                                          web_element=web_element,
-                                         text=displayed_text)
+                                         text=displayed_text,
+                                         match=match)
             if element is None:
                 log.warning("Cannot perform a click on a not found element")
                 return 1
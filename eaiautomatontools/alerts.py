@@ -4,7 +4,7 @@ from typing import List
 
 from selenium.common.exceptions import ElementNotSelectableException, NoAlertPresentException, \
     ElementNotInteractableException
-from .drivers_tools import driver_field_validation
+from .drivers_tools import driver_validation
 
 log = getLogger(__name__)
 
@@ -32,7 +32,7 @@ def intercept_alert(driver=None,
     :return: 0 if success
     """
     try:
-        driver_field_validation(driver, {"type": "id", "value": "fake"}, log)
+        driver_validation(driver, log)
         if not isinstance(messages, list) and messages is not None:
             log.error("Messages should be a list or None")
             raise TypeError("Messages should be a list or None")
@@ -88,7 +88,7 @@ def alert_message(driver=None):
     :return: 0 if success
     """
     try:
-        driver_field_validation(driver, {"type": "id", "value": "fake"}, log)
+        driver_validation(driver, log)
         alert_object = driver.switch_to.alert
         return alert_object.text
     except NoAlertPresentException as no_alert:
@@ -0,0 +1,590 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio flavour of the BrowserServer.
+
+The AsyncBrowserServer talks to the web driver W3C endpoint with a non-blocking HTTP client
+so that many sessions can be driven concurrently from one event loop, e.g.
+asyncio.gather(*(session.go_to(url) for session in sessions)).
+
+It doesn't launch any web driver executable: give it the URL of a running one (chromedriver,
+geckodriver, a selenium grid...) or attach it to a served BrowserServer.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import List, Union
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import (ElementNotInteractableException,
+                                        InvalidElementStateException, JavascriptException,
+                                        NoAlertPresentException, NoSuchElementException,
+                                        NoSuchFrameException, NoSuchWindowException,
+                                        StaleElementReferenceException, TimeoutException,
+                                        WebDriverException)
+
+from .finders import resolved_fields
+from .information import tabular_records
+from .locators import Locator, MATCH_EXACT
+from .scripts import MATCH_TEXT, RESOLVE_MANY, TABULAR
+
+log = logging.getLogger(__name__)
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+__ERRORS = {
+    "no such element": NoSuchElementException,
+    "stale element reference": StaleElementReferenceException,
+    "element not interactable": ElementNotInteractableException,
+    "invalid element state": InvalidElementStateException,
+    "no such alert": NoAlertPresentException,
+    "no such frame": NoSuchFrameException,
+    "no such window": NoSuchWindowException,
+    "javascript error": JavascriptException,
+    "script timeout": TimeoutException,
+    "timeout": TimeoutException
+}
+
+
+def _raise_for_error(value: dict):
+    error = value.get("error", "unknown error")
+    message = value.get("message", error)
+    raise __ERRORS.get(error, WebDriverException)(message)
+
+
+def _css_string(value: str) -> str:
+    """Escape the value to quote it in a CSS selector"""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _w3c_locator(locator: Locator) -> dict:
+    """Translate the locator to the W3C strategies as selenium does"""
+    if locator.type == "id":
+        return {"using": "css selector", "value": f'[id="{_css_string(locator.value)}"]'}
+    if locator.type == "name":
+        return {"using": "css selector", "value": f'[name="{_css_string(locator.value)}"]'}
+    if locator.type == "class_name":
+        return {"using": "css selector", "value": f".{locator.value}"}
+    return {"using": locator.by, "value": locator.value}
+
+
+class _HttpConnection:
+    """A keep-alive HTTP/1.1 connection exchanging JSON"""
+
+    def __init__(self, host: str, port: int):
+        self.__host = host
+        self.__port = port
+        self.__reader = None
+        self.__writer = None
+        # Set once the first byte of the answer is read: the command has reached the driver
+        self.__received = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.__writer is not None
+
+    async def __open(self):
+        self.__reader, self.__writer = await asyncio.open_connection(self.__host, self.__port)
+
+    def close(self):
+        if self.__writer is not None:
+            self.__writer.close()
+        self.__reader = self.__writer = None
+
+    async def request(self, method: str, path: str, payload=None) -> tuple:
+        reused = self.is_open
+        if not reused:
+            await self.__open()
+        try:
+            return await self.__exchange(method, path, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            if not reused or self.__received:
+                raise
+            # The kept-alive connection has been closed by the driver before answering, the
+            # command has not run: retry once
+            await self.__open()
+            return await self.__exchange(method, path, payload)
+
+    async def __exchange(self, method: str, path: str, payload) -> tuple:
+        self.__received = False
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.__writer.write((f"{method} {path} HTTP/1.1\r\n"
+                             f"Host: {self.__host}:{self.__port}\r\n"
+                             "Accept: application/json\r\n"
+                             "Content-Type: application/json;charset=UTF-8\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             "Connection: keep-alive\r\n\r\n").encode("latin-1") + body)
+        await self.__writer.drain()
+        status_line = await self.__reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the web driver")
+        self.__received = True
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.__reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().casefold()] = value.strip()
+        if headers.get("transfer-encoding", "").casefold() == "chunked":
+            content = b""
+            while True:
+                size = int((await self.__reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.__reader.readline()
+                    break
+                content += await self.__reader.readexactly(size)
+                await self.__reader.readline()
+        else:
+            content = await self.__reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").casefold() == "close":
+            self.close()
+        return status, json.loads(content) if content else {}
+
+
+class _ConnectionPool:
+    """At most 'size' connections to the web driver, reused across requests"""
+
+    def __init__(self, url: str, size: int = 4):
+        parts = urlsplit(url)
+        self.__host = parts.hostname
+        self.__port = parts.port or 80
+        self.__prefix = parts.path.rstrip("/")
+        self.__size = size
+        self.__idle = []
+        self.__semaphore = None
+
+    async def request(self, method: str, path: str, payload=None) -> tuple:
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.__size)
+        async with self.__semaphore:
+            connection = self.__idle.pop() if self.__idle else _HttpConnection(self.__host,
+                                                                                self.__port)
+            try:
+                result = await connection.request(method, f"{self.__prefix}{path}", payload)
+            except BaseException:
+                # A timeout or a cancellation stops the exchange halfway: the unread answer
+                # would be read by the next request
+                connection.close()
+                raise
+            if connection.is_open:
+                self.__idle.append(connection)
+            return result
+
+    def close(self):
+        for connection in self.__idle:
+            connection.close()
+        self.__idle.clear()
+
+
+class AsyncWebElement:
+    """A web element reference of an AsyncBrowserServer session"""
+    __slots__ = ("id", "parent")
+
+    def __init__(self, parent: "AsyncBrowserServer", element_id: str):
+        self.parent = parent
+        self.id = element_id
+
+    def __eq__(self, other):
+        return isinstance(other, AsyncWebElement) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<AsyncWebElement (element=\"{self.id}\")>"
+
+    def to_json(self) -> dict:
+        return {ELEMENT_KEY: self.id}
+
+    async def __command(self, method: str, command: str, payload=None):
+        return await self.parent.execute(method, f"/element/{self.id}{command}", payload)
+
+    async def text(self) -> str:
+        return await self.__command("GET", "/text")
+
+    async def click(self):
+        await self.__command("POST", "/click", {})
+
+    async def clear(self):
+        await self.__command("POST", "/clear", {})
+
+    async def send_keys(self, value: str):
+        await self.__command("POST", "/value", {"text": str(value)})
+
+    async def get_attribute(self, name: str):
+        return await self.__command("GET", f"/attribute/{name}")
+
+    async def get_property(self, name: str):
+        return await self.__command("GET", f"/property/{name}")
+
+    async def is_displayed(self) -> bool:
+        return await self.__command("GET", "/displayed")
+
+    async def is_enabled(self) -> bool:
+        return await self.__command("GET", "/enabled")
+
+    async def is_selected(self) -> bool:
+        return await self.__command("GET", "/selected")
+
+    async def rect(self) -> dict:
+        return await self.__command("GET", "/rect")
+
+
+class AsyncBrowserServer:
+    """
+    Drive a web driver session without blocking the event loop.
+    :param remote_url: the web driver URL i.e. 'http://127.0.0.1:9515'
+    :param options: selenium options used to build the session capabilities
+    :param capabilities: the session capabilities when no options are given
+    :param pool_size: the maximum number of connections opened to the web driver
+    :param timeout: the maximum duration in second of a single command
+    """
+
+    def __init__(self,
+                 remote_url: str,
+                 options=None,
+                 capabilities: dict = None,
+                 pool_size: int = 4,
+                 timeout: float = 60):
+        self.__remote_url = remote_url
+        self.__capabilities = (options.to_capabilities() if options is not None
+                               else dict(capabilities or {}))
+        self.__pool = _ConnectionPool(remote_url, pool_size)
+        self.__timeout = timeout
+        self.__session_id = None
+        self.__owned = True
+        self.__temp_save_to = os.path.normpath(os.path.join(tempfile.gettempdir(),
+                                                            "automaton_screenshots"))
+
+    @classmethod
+    def attach(cls, remote_url: str, session_id: str, **kwargs) -> "AsyncBrowserServer":
+        """Drive an existing session. Closing the AsyncBrowserServer won't end the session"""
+        server = cls(remote_url, **kwargs)
+        server.__session_id = session_id
+        server.__owned = False
+        return server
+
+    @classmethod
+    def from_browser_server(cls, browser_server, **kwargs) -> "AsyncBrowserServer":
+        """Drive the session of a served BrowserServer"""
+        driver = browser_server.webdriver
+        if driver is None:
+            raise AttributeError("The BrowserServer must be served first")
+        config = getattr(driver.command_executor, "client_config", None)
+        url = getattr(config, "remote_server_addr", None)
+        if not url:
+            log.error("Cannot read the web driver URL from the command executor client config")
+            raise AttributeError("Cannot read the web driver URL from the command executor "
+                                 "client config")
+        return cls.attach(url, driver.session_id, **kwargs)
+
+    @property
+    def session_id(self) -> Union[str, None]:
+        return self.__session_id
+
+    @property
+    def is_launched(self) -> bool:
+        return self.__session_id is not None
+
+    async def __aenter__(self):
+        await self.serve()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def serve(self):
+        """
+        Create the web driver session if not attached to an existing one
+        :return: 0 if success
+        """
+        if self.__session_id is None:
+            value = await self.__request("POST", "/session",
+                                         {"capabilities": {"firstMatch": [{}],
+                                                           "alwaysMatch": self.__capabilities}})
+            self.__session_id = value["sessionId"]
+        return 0
+
+    async def close(self):
+        """
+        End the session if created by this object and release the connections
+        :return: 0
+        """
+        if self.__session_id is not None and self.__owned:
+            await self.__request("DELETE", f"/session/{self.__session_id}")
+        self.__session_id = None
+        self.__pool.close()
+        return 0
+
+    async def __request(self, method: str, path: str, payload=None):
+        status, content = await asyncio.wait_for(self.__pool.request(method, path, payload),
+                                                 self.__timeout)
+        value = content.get("value") if isinstance(content, dict) else None
+        if status >= 400 or (isinstance(value, dict) and "error" in value):
+            _raise_for_error(value if isinstance(value, dict) else {})
+        return value
+
+    def __wrap(self, value):
+        if isinstance(value, AsyncWebElement):
+            return value.to_json()
+        if isinstance(value, (list, tuple)):
+            return [self.__wrap(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.__wrap(item) for key, item in value.items()}
+        return value
+
+    def __unwrap(self, value):
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncWebElement(self, value[ELEMENT_KEY])
+            return {key: self.__unwrap(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.__unwrap(item) for item in value]
+        return value
+
+    async def execute(self, method: str, command: str, payload=None):
+        """
+        Send a W3C command of the current session
+        :param method: GET, POST or DELETE
+        :param command: the command path after the session i.e. '/url'
+        :param payload: the JSON payload
+        :return: the command value
+        """
+        if self.__session_id is None:
+            raise AttributeError("The AsyncBrowserServer must be served first")
+        return self.__unwrap(await self.__request(method,
+                                                  f"/session/{self.__session_id}{command}",
+                                                  payload))
+
+    async def execute_script(self, script: str, *args):
+        """Execute the script synchronously in the browser"""
+        return await self.execute("POST", "/execute/sync",
+                                  {"script": script, "args": self.__wrap(list(args))})
+
+    # Navigation
+    async def go_to(self, url: str = None):
+        """Navigate to the given url"""
+        await self.execute("POST", "/url", {"url": url})
+        return 0
+
+    async def where_am_i(self) -> str:
+        """Current URL"""
+        return await self.execute("GET", "/url")
+
+    # Finders
+    async def find_element(self,
+                           field: Union[dict, Locator] = None,
+                           web_element: AsyncWebElement = None) -> Union[AsyncWebElement, None]:
+        """Find element using the session or the provided AsyncWebElement. None if not found"""
+        locator = Locator.from_field(field)
+        if locator.text is not None:
+            return await self.find_from_elements(locator, locator.text, web_element,
+                                                 locator.match or MATCH_EXACT)
+        root = "" if web_element is None else f"/element/{web_element.id}"
+        try:
+            return await self.execute("POST", f"{root}/element", _w3c_locator(locator))
+        except NoSuchElementException:
+            log.debug(f"In find_element didn't find the element '{field}'.")
+            return None
+
+    async def find_elements(self,
+                            field: Union[dict, Locator] = None,
+                            web_element: AsyncWebElement = None) -> List[AsyncWebElement]:
+        """Find elements using the session or the provided AsyncWebElement"""
+        locator = Locator.from_field(field)
+        root = "" if web_element is None else f"/element/{web_element.id}"
+        return await self.execute("POST", f"{root}/elements", _w3c_locator(locator))
+
+    async def find_from_elements(self,
+                                 field: Union[dict, Locator] = None,
+                                 text: str = None,
+                                 web_element: AsyncWebElement = None,
+                                 match: str = MATCH_EXACT) -> Union[AsyncWebElement, None]:
+        """Find element from a list of elements based on the text"""
+        elements = await self.find_elements(field, web_element)
+        if not elements:
+            return None
+        return await self.execute_script(MATCH_TEXT, elements, text, match)
+
+    async def resolve_many(self,
+                           fields: dict = None,
+                           web_element: AsyncWebElement = None) -> dict:
+        """Find all the fields of the dictionary in a single browser call"""
+        locators = {key: Locator.from_field(field) for key, field in fields.items()}
+        if not locators:
+            return {}
+        elements = await self.execute_script(RESOLVE_MANY,
+                                             [[locator.type, locator.value, locator.text,
+                                               locator.match or MATCH_EXACT]
+                                              for locator in locators.values()],
+                                             web_element)
+        return resolved_fields(fields, elements)
+
+    # Actions
+    async def fill_element(self,
+                           field: Union[dict, Locator] = None,
+                           web_element: AsyncWebElement = None,
+                           value: str = None) -> int:
+        """Fill the element with the value. Return 0 if success, 1 otherwise"""
+        element = await self.find_element(field, web_element)
+        if element is None:
+            log.warning(f"Field '{field}' could not be found for filling")
+            return 1
+        return await self.__type_value(element, value)
+
+    @staticmethod
+    async def __type_value(element: AsyncWebElement, value) -> int:
+        try:
+            await element.clear()
+            if value:
+                await element.send_keys(str(value))
+            return 0
+        except InvalidElementStateException as invalid_element:
+            log.warning(invalid_element)
+            return 1
+
+    async def fill_elements(self,
+                            fields: dict = None,
+                            web_element: AsyncWebElement = None,
+                            data: dict = None) -> int:
+        """Fill data in the respective field. data keys must be in field keys"""
+        if any(key not in fields.keys() for key in data.keys()):
+            raise KeyError("Data keys are not included in Fields keys")
+        elements = await self.resolve_many({key: fields[key] for key in data}, web_element)
+        status = 0
+        for key in data:
+            if elements[key] is None:
+                log.warning(f"Field '{fields[key]}' could not be found for filling")
+                status += 1
+            else:
+                status += await self.__type_value(elements[key], data[key])
+        return status
+
+    async def click_element(self,
+                            field: Union[dict, Locator] = None,
+                            web_element: AsyncWebElement = None) -> int:
+        """Perform a click on the element.
+        :raise NoSuchElementException: where element is not found"""
+        element = await self.find_element(field, web_element)
+        if element is None:
+            raise NoSuchElementException(f"Element {field} has not been found")
+        await element.click()
+        return 0
+
+    # Information
+    async def retrieve_tabular(self,
+                               field: Union[dict, Locator] = None,
+                               web_element: AsyncWebElement = None,
+                               row_and_col: tuple = ("tr", "td", "th"),
+                               text_source: str = "innerText",
+                               expand_spans: bool = False,
+                               as_dict: bool = False) -> Union[list, None]:
+        """Retrieve a tabular as a list of list of cells' content (str) in a single call.
+        See information.retrieve_tabular for the options."""
+        tabular = await self.find_element(field, web_element)
+        if tabular is None:
+            log.warning(f"Tabular {field} has not been found")
+            return None
+        header, rows = await self.execute_script(TABULAR, tabular, list(row_and_col),
+                                                 {"text": text_source, "expand": expand_spans})
+        return tabular_records(header, rows, as_dict)
+
+    async def __poll(self, probe, until: float):
+        """Call the probe every 200ms until it returns a truthy value or until is reached"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + until
+        while True:
+            try:
+                result = await probe()
+                if result:
+                    return result
+            except (NoSuchElementException, StaleElementReferenceException):
+                pass
+            if loop.time() >= deadline:
+                return None
+            await asyncio.sleep(min(0.2, max(0.0, deadline - loop.time())))
+
+    async def is_field_exist(self,
+                             field: Union[dict, Locator] = None,
+                             web_element: AsyncWebElement = None,
+                             until: float = 5) -> Union[AsyncWebElement, None]:
+        """Wait for the field existence. Return the element or None"""
+        locator = Locator.from_field(field)
+        return await self.__poll(lambda: self.find_element(locator, web_element), until)
+
+    async def __check_element(self, field, web_element, check, wait_until):
+        """Wait for the field existence then return the check of its current state"""
+        element = await self.is_field_exist(field, web_element, wait_until)
+        if element is None:
+            return False
+        return bool(await check(element))
+
+    async def is_field_displayed(self,
+                                 field: Union[dict, Locator] = None,
+                                 web_element: AsyncWebElement = None,
+                                 wait_until: float = 5) -> bool:
+        """Wait for the field to exist and to be displayed"""
+        locator = Locator.from_field(field)
+
+        async def displayed():
+            element = await self.find_element(locator, web_element)
+            return await element.is_displayed()
+
+        return bool(await self.__poll(displayed, wait_until))
+
+    async def is_field_enabled(self,
+                               field: Union[dict, Locator] = None,
+                               web_element: AsyncWebElement = None,
+                               wait_until: float = 5) -> bool:
+        """Wait for the field existence and tell if it's enabled"""
+        return await self.__check_element(field, web_element,
+                                          lambda element: element.is_enabled(), wait_until)
+
+    async def is_checkbox_checked(self,
+                                  field: Union[dict, Locator] = None,
+                                  web_element: AsyncWebElement = None,
+                                  wait_until: float = 5) -> bool:
+        """Wait for the checkbox existence and tell if it's checked"""
+        return await self.__check_element(field, web_element,
+                                          lambda element: element.is_selected(), wait_until)
+
+    async def is_field_contains_text(self,
+                                     field: Union[dict, Locator] = None,
+                                     web_element: AsyncWebElement = None,
+                                     text: str = None,
+                                     wait_until: float = 5) -> bool:
+        """Wait for the field existence and tell if it contains the text either as a DOM text
+        or value"""
+        async def contains(element):
+            value = await element.get_property("value")
+            return text in (await element.text() or "") or (value is not None
+                                                             and text in str(value))
+
+        return await self.__check_element(field, web_element, contains, wait_until)
+
+    # Screenshot
+    async def take_a_screenshot(self, save_to: str = None) -> str:
+        """
+        Take a screenshot of the viewport and save the file to the given folder
+        The file pattern is screenshot-<timestamp>.png
+        :param save_to: path location to save the screenshot to
+        :return: the screenshot file path
+        """
+        content = base64.b64decode(await self.execute("GET", "/screenshot"))
+        folder = self.__temp_save_to if save_to is None else save_to
+        filename = os.path.join(folder,
+                                f"screenshot-{int(datetime.now().timestamp() * 1000000)}.png")
+
+        def write():
+            os.makedirs(folder, exist_ok=True)
+            with open(filename, "wb") as file:
+                file.write(content)
+
+        await asyncio.get_running_loop().run_in_executor(None, write)
+        return os.path.realpath(filename)
@@ -3,49 +3,83 @@
 import os.path
 import logging
 import tempfile
-from typing import List, Union
+from contextlib import contextmanager
+from typing import Iterator, List, Union
 
-from deprecated import deprecated
-from shutil import rmtree
+from importlib import import_module
+from io import BytesIO
 from datetime import datetime
-from selenium import webdriver
-# Driver's options
-from selenium.webdriver.chrome.options import Options as ChrOptions
-from selenium.webdriver.firefox.options import Options as FfOptions
-from selenium.webdriver.edge.options import Options as EdgOptions
-
-try:
-    from selenium.webdriver.opera.options import Options as OpeOptions
-except Exception:
-    OpeOptions = None
 
 from selenium.webdriver.remote.webelement import WebElement
-# Driver's Service
-from selenium.webdriver.chrome.service import Service as ChrService
-from selenium.webdriver.firefox.service import Service as FfService
-from selenium.webdriver.edge.service import Service as EdgService
-# Driver Manager
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from webdriver_manager.opera import OperaDriverManager
-from webdriver_manager.core.os_manager import ChromeType
 # Self 
-from .navigators import (go_to_url, enter_frame, go_to_window)
+from .navigators import (go_to_url, enter_frame, go_to_window, is_session_alive,
+                         reset_session)
 from .finders import (find_element, find_elements, find_from_elements,
-                      find_sub_element_from_element)
-from .actions import (fill_element, fill_elements, mouse_click, select_in_dropdown, set_checkbox,
-                      click_element, select_in_angular_dropdown, hover_element, select_in_elements)
+                      find_sub_element_from_element, resolve_many, MATCH_EXACT)
+from .actions import (fill_element, fill_elements, fill_form, FILL_DOM, mouse_click,
+                      select_in_dropdown, set_checkbox, click_element,
+                      select_in_angular_dropdown, hover_element, select_in_elements)
 from .alerts import (alert_message, intercept_alert)
-from .information import (is_alert_present, is_field_exist, is_field_contains_text, element_text,
-                          is_field_displayed, is_field_enabled, how_many_windows,
-                          wait_for_another_window,
-                          where_am_i,
-                          is_checkbox_checked, retrieve_tabular, is_field_in_viewport)
-from .drivers_tools import (fullpage_screenshot, move_to)
+from .information import (are_fields_exist, is_alert_present, is_field_exist,
+                          is_field_contains_text, element_text, is_field_displayed,
+                          is_field_enabled, how_many_windows, wait_for_another_window,
+                          wait_for_field, where_am_i,
+                          is_checkbox_checked, retrieve_tabular, is_field_in_viewport,
+                          iter_tabular, export_tabular, element_snapshot, ElementSnapshot)
+from .drivers_tools import (capture_fullpage, deprecated, fullpage_screenshot, move_to)
+from .cache import LocatorCache
+from .deadlines import Deadline
+from .driver_cache import DriverCache
+from .screenshots import ScreenshotStore, ScreenshotWriter
+from .visual import VisualDiff, compare_screenshots, element_regions
+from .instrumentation import Instrumentation, OUTPUT_FORMATS
+from .locators import LocatorRegistry
+from .retries import RetryPolicy
+from .scripts import PAGE_METRICS
+from .sessions import session_of, SCROLL_ALWAYS, SCROLL_POLICIES
+from .transport import Transport, apply_transport
+from .windows import WindowRegistry
 
 log = logging.getLogger(__name__)
 
+# The browser specific classes are imported on first use so that importing the module doesn't
+# load every driver and driver manager.
+_LAZY_NAMES = {
+    "ChrOptions": "selenium.webdriver.chrome.options:Options",
+    "FfOptions": "selenium.webdriver.firefox.options:Options",
+    "EdgOptions": "selenium.webdriver.edge.options:Options",
+    "OpeOptions": "selenium.webdriver.opera.options:Options",
+    "ChrService": "selenium.webdriver.chrome.service:Service",
+    "FfService": "selenium.webdriver.firefox.service:Service",
+    "EdgService": "selenium.webdriver.edge.service:Service",
+    "ChromeDriverManager": "webdriver_manager.chrome:ChromeDriverManager",
+    "GeckoDriverManager": "webdriver_manager.firefox:GeckoDriverManager",
+    "EdgeChromiumDriverManager": "webdriver_manager.microsoft:EdgeChromiumDriverManager",
+    "OperaDriverManager": "webdriver_manager.opera:OperaDriverManager",
+    "ChromeType": "webdriver_manager.core.os_manager:ChromeType",
+}
+
+
+def _load(path: str):
+    """Import and return the 'module:attribute' object"""
+    module, _, attribute = path.partition(":")
+    return getattr(import_module(module), attribute)
+
+
+def _opera_options():
+    try:
+        return _load(_LAZY_NAMES["OpeOptions"])
+    except Exception:
+        return None
+
+
+def __getattr__(name):
+    if name == "OpeOptions":
+        return _opera_options()
+    if name in _LAZY_NAMES:
+        return _load(_LAZY_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class BrowserServer:
     """
@@ -58,44 +92,44 @@ class BrowserServer:
     """
 
     __OPTIONS_SWITCHER = {
-        "chrome": ChrOptions,
-        "headless-chrome": ChrOptions,
-        "chromium": ChrOptions,
-        "headless-chromium": ChrOptions,
-        "firefox": FfOptions,
-        "opera": OpeOptions,
-        "edge": EdgOptions
+        "chrome": "selenium.webdriver.chrome.options:Options",
+        "headless-chrome": "selenium.webdriver.chrome.options:Options",
+        "chromium": "selenium.webdriver.chrome.options:Options",
+        "headless-chromium": "selenium.webdriver.chrome.options:Options",
+        "firefox": "selenium.webdriver.firefox.options:Options",
+        "opera": "selenium.webdriver.opera.options:Options",
+        "edge": "selenium.webdriver.edge.options:Options"
     }
 
     __SERVICE_SWITCHER = {
-        "chrome": ChrService,
-        "headless-chrome": ChrService,
-        "chromium": ChrService,
-        "headless-chromium": ChrService,
-        "firefox": FfService,
-        "opera": ChrService,
-        "edge": EdgService
+        "chrome": "selenium.webdriver.chrome.service:Service",
+        "headless-chrome": "selenium.webdriver.chrome.service:Service",
+        "chromium": "selenium.webdriver.chrome.service:Service",
+        "headless-chromium": "selenium.webdriver.chrome.service:Service",
+        "firefox": "selenium.webdriver.firefox.service:Service",
+        "opera": "selenium.webdriver.chrome.service:Service",
+        "edge": "selenium.webdriver.edge.service:Service"
     }
 
     __DRIVER_MANAGER = {
-        "chrome": ChromeDriverManager,
-        "headless-chrome": ChromeDriverManager,
-        "chromium": ChromeDriverManager,
-        "headless-chromium": ChromeDriverManager,
-        "firefox": GeckoDriverManager,
-        "edge": EdgeChromiumDriverManager,
-        "opera": OperaDriverManager
+        "chrome": "webdriver_manager.chrome:ChromeDriverManager",
+        "headless-chrome": "webdriver_manager.chrome:ChromeDriverManager",
+        "chromium": "webdriver_manager.chrome:ChromeDriverManager",
+        "headless-chromium": "webdriver_manager.chrome:ChromeDriverManager",
+        "firefox": "webdriver_manager.firefox:GeckoDriverManager",
+        "edge": "webdriver_manager.microsoft:EdgeChromiumDriverManager",
+        "opera": "webdriver_manager.opera:OperaDriverManager"
     }
 
     __WEB_DRIVERS = {
-        "chrome": webdriver.Chrome,
-        "headless-chrome": webdriver.Chrome,
-        "chromium": webdriver.Chrome,
-        "headless-chromium": webdriver.Chrome,
-        "firefox": webdriver.Firefox,
-        "edge": webdriver.Edge,
-        "safari": webdriver.Safari,
-        "opera": webdriver.Chrome if OpeOptions is None else webdriver.Opera
+        "chrome": "selenium.webdriver.chrome.webdriver:WebDriver",
+        "headless-chrome": "selenium.webdriver.chrome.webdriver:WebDriver",
+        "chromium": "selenium.webdriver.chrome.webdriver:WebDriver",
+        "headless-chromium": "selenium.webdriver.chrome.webdriver:WebDriver",
+        "firefox": "selenium.webdriver.firefox.webdriver:WebDriver",
+        "edge": "selenium.webdriver.edge.webdriver:WebDriver",
+        "safari": "selenium.webdriver.safari.webdriver:WebDriver",
+        "opera": "selenium.webdriver.opera.webdriver:WebDriver"
     }
 
     def __init__(self):
@@ -107,12 +141,11 @@ class BrowserServer:
         # Browser window's status
         self.__launched = False
 
-        # Screenshot save folder
-        self.__temp_save_to = os.path.normpath(os.path.join(tempfile.gettempdir(),
-                                                            "automaton_screenshots"))
-        if os.path.exists(self.__temp_save_to):
-            rmtree(self.__temp_save_to)
-        os.makedirs(self.__temp_save_to)
+        # Screenshot save folder, one per instance: parallel workers and pooled browsers don't
+        # share it
+        root = os.path.join(tempfile.gettempdir(), "automaton_screenshots")
+        os.makedirs(root, exist_ok=True)
+        self.__temp_save_to = os.path.normpath(tempfile.mkdtemp(prefix="browser-", dir=root))
         log.debug(self.__temp_save_to)
 
         # Definition of private attributes
@@ -124,6 +157,29 @@ class BrowserServer:
         # Definition of options
         self.__driver_options = []
 
+        # Resolved driver executables cache, None to always ask the driver manager
+        self.__driver_cache = DriverCache()
+
+        # Background screenshot encoding, None to write the screenshots synchronously
+        self.__screenshot_writer = None
+        # Deduplicated screenshot storage, None to write every screenshot
+        self.__screenshot_store = None
+
+        # HTTP transport to the web driver, None for the selenium defaults
+        self.__transport = None
+
+        # Driver commands instrumentation, None when disabled
+        self.__instrumentation = None
+        self.__stats_output = None
+
+        # Opt-in session features
+        self.__locator_cache = None
+        self.__scroll_policy = SCROLL_ALWAYS
+        self.__retry_policy = None
+
+        # Named locators
+        self.__locators = LocatorRegistry()
+
     @property
     def driver_options(self):
         return self.__driver_options
@@ -142,6 +198,198 @@ class BrowserServer:
         else:
             log.warning(f"Options '{options}' is not of the proper type")
 
+    @property
+    def driver_cache(self) -> Union[DriverCache, None]:
+        """Read - Set the cache of the driver executables used when the driver path is not set.
+        None to always ask the driver manager"""
+        return self.__driver_cache
+
+    @driver_cache.setter
+    def driver_cache(self, cache: Union[DriverCache, None]):
+        if cache is not None and not isinstance(cache, DriverCache):
+            raise TypeError(f"Expect a DriverCache or None. Get {type(cache)}")
+        self.__driver_cache = cache
+
+    @property
+    def screenshot_writer(self) -> Union[ScreenshotWriter, None]:
+        """Read - Set the background screenshot writer. When set, take_a_screenshot returns a
+        future of the file path. None (default) to write synchronously"""
+        return self.__screenshot_writer
+
+    @screenshot_writer.setter
+    def screenshot_writer(self, writer: Union[ScreenshotWriter, None]):
+        if writer is not None and not isinstance(writer, ScreenshotWriter):
+            raise TypeError(f"Expect a ScreenshotWriter or None. Get {type(writer)}")
+        self.__screenshot_writer = writer
+
+    @property
+    def screenshot_store(self) -> Union[ScreenshotStore, None]:
+        """Read - Set the content addressed screenshot store. When set, identical screenshots
+        are written once. None (default) to write every screenshot"""
+        return self.__screenshot_store
+
+    @screenshot_store.setter
+    def screenshot_store(self, store: Union[ScreenshotStore, None]):
+        if store is not None and not isinstance(store, ScreenshotStore):
+            raise TypeError(f"Expect a ScreenshotStore or None. Get {type(store)}")
+        self.__screenshot_store = store
+
+    @property
+    def transport(self) -> Union[Transport, None]:
+        """Read - Set the HTTP transport to the web driver: pool size, keep-alive, timeouts.
+        Applied on serve, or at once when served. None (default) for the selenium defaults"""
+        return self.__transport
+
+    @transport.setter
+    def transport(self, transport: Union[Transport, None]):
+        if transport is not None and not isinstance(transport, Transport):
+            raise TypeError(f"Expect a Transport or None. Get {type(transport)}")
+        self.__transport = transport
+        if transport is not None and self.__web_driver is not None:
+            apply_transport(self.__web_driver, transport)
+
+    @property
+    def instrument(self) -> bool:
+        """Read - Set the count and timing of the driver commands per command and per toolbox
+        function. Disabled by default: the commands are not wrapped. See stats"""
+        return self.__instrumentation is not None
+
+    @instrument.setter
+    def instrument(self, enable: bool):
+        if enable and self.__instrumentation is None:
+            self.__instrumentation = Instrumentation()
+            if self.__web_driver is not None:
+                self.__instrumentation.install(self.__web_driver)
+        elif not enable and self.__instrumentation is not None:
+            self.__instrumentation.uninstall()
+            self.__instrumentation = None
+
+    @property
+    def stats_output(self) -> Union[str, None]:
+        """Read - Set the file the instrumentation stats are written to on close: JSON for a
+        .json file, Prometheus text format for a .prom file. None (default) not to write them"""
+        return self.__stats_output
+
+    @stats_output.setter
+    def stats_output(self, output: Union[str, None]):
+        if output is not None and not isinstance(output, str):
+            raise TypeError(f"Expect a str or None. Get {type(output)}")
+        if output is not None:
+            output_format = os.path.splitext(output)[1].lstrip(".").casefold()
+            if output_format not in OUTPUT_FORMATS:
+                log.error(f"Unknown output format. Get {output_format} instead of "
+                          f"{OUTPUT_FORMATS}")
+                raise ValueError(f"Unknown output format. Get {output_format} instead of "
+                                 f"{OUTPUT_FORMATS}")
+        self.__stats_output = output
+
+    def stats(self) -> dict:
+        """Return the driver commands count and latency per WebDriver command and per toolbox
+        function since the instrumentation was enabled. Empty when disabled"""
+        if self.__instrumentation is None:
+            return {"commands": {}, "functions": {}}
+        return self.__instrumentation.stats()
+
+    @property
+    def use_locator_cache(self) -> bool:
+        """Read - Set the locator result cache usage for the session. Disabled by default"""
+        return self.__locator_cache is not None
+
+    @use_locator_cache.setter
+    def use_locator_cache(self, enable: bool):
+        self.__locator_cache = LocatorCache() if enable else None
+        self.__register_session()
+
+    @property
+    def locator_cache(self) -> Union[LocatorCache, None]:
+        """Read only locator cache. See its stats property for hits and misses"""
+        return self.__locator_cache
+
+    @property
+    def scroll_policy(self) -> str:
+        """Read - Set when found elements are scrolled into view: 'never', 'if_needed' (not
+        entirely in the viewport), 'always' or 'hover' (always, the mouse pointer being moved
+        over them too). Defaulted to 'always'"""
+        return self.__scroll_policy
+
+    @scroll_policy.setter
+    def scroll_policy(self, policy: str):
+        if policy not in SCROLL_POLICIES:
+            raise ValueError(f"Unknown scroll policy. Get {policy} instead of {SCROLL_POLICIES}")
+        self.__scroll_policy = policy
+        self.__register_session()
+
+    @property
+    def scroll_stats(self) -> dict:
+        """Read only number of scrolled and skipped moves to elements for the session"""
+        if self.__web_driver is None:
+            return {"scrolled": 0, "skipped": 0}
+        return dict(session_of(self.__web_driver).scroll_stats)
+
+    @property
+    def retry_policy(self) -> Union[RetryPolicy, None]:
+        """Read - Set the retry policy of the session actions, overridden by their retry
+        argument. None (default) for the default RetryPolicy"""
+        return self.__retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, policy: Union[RetryPolicy, None]):
+        if policy is not None and not isinstance(policy, RetryPolicy):
+            raise TypeError(f"Expect a RetryPolicy or None. Get {type(policy)}")
+        self.__retry_policy = policy
+        self.__register_session()
+
+    @property
+    def retry_stats(self) -> dict:
+        """Read only calls, retries, failures and time waited between attempts per locator
+        for the session actions"""
+        if self.__web_driver is None:
+            return {}
+        return {key: dict(stats)
+                for key, stats in session_of(self.__web_driver).retry_stats.items()}
+
+    @property
+    def windows(self) -> Union[WindowRegistry, None]:
+        """Read only registry of the session windows: their title, URL and opener by handle,
+        looked up without switching. None when the browser is not served"""
+        if self.__web_driver is None:
+            return None
+        return session_of(self.__web_driver).windows
+
+    @contextmanager
+    def deadline(self, budget: float, label: str = None) -> Iterator[Deadline]:
+        """Share a time budget in second between all the waits of the block: each wait is
+        granted the smallest of its own timeout and the remaining budget. Nested blocks are
+        capped by the enclosing one. How the budget was spent is logged when it runs out"""
+        if self.__web_driver is None:
+            log.error("The browser must be served before setting a deadline")
+            raise AttributeError("The browser must be served before setting a deadline")
+        session = session_of(self.__web_driver)
+        enclosing = session.deadline
+        session.deadline = Deadline(budget, label, enclosing)
+        try:
+            yield session.deadline
+        finally:
+            if session.deadline.expired:
+                log.warning(session.deadline.report())
+            session.deadline = enclosing
+
+    @property
+    def locators(self) -> LocatorRegistry:
+        """Read only registry of named locators. See load_locators"""
+        return self.__locators
+
+    def load_locators(self, path: str):
+        """Load a JSON or YAML page-object file into the locators registry.
+        Locators are validated once at load time"""
+        self.__locators.update(dict(LocatorRegistry.load(path).items()))
+        return 0
+
+    @property
+    def screenshot_folder(self) -> str:
+        """Read only folder the screenshots are saved to by default"""
+        return self.__temp_save_to
+
     @property
     def is_launched(self):
         return self.__launched
@@ -186,12 +434,32 @@ class BrowserServer:
         else:
             raise ValueError("Expecting a non empty path")
 
+    def __register_session(self):
+        """Attach the session features to the served web driver"""
+        if self.__web_driver is None:
+            return
+        session = session_of(self.__web_driver)
+        session.locator_cache = self.__locator_cache
+        session.scroll_policy = self.__scroll_policy
+        session.retry_policy = self.__retry_policy
+        if session.windows is None:
+            session.windows = WindowRegistry(self.__web_driver)
+
     @staticmethod
     def __serve_time():
         return int(datetime.now().timestamp() * 1000000)
 
+    def __install_driver(self, params: dict) -> str:
+        manager = _load(BrowserServer.__DRIVER_MANAGER[self.browser_name])(**params)
+        if self.__driver_cache is None:
+            return manager.install()
+        # Without a version, the cache entry follows the installed browser version
+        return self.__driver_cache.resolve(self.browser_name.replace("headless-", ""),
+                                           self.browser_version, manager.install,
+                                           manager.driver.get_browser_version_from_os)
+
     def __serve_chrome(self, params: dict):
-        option = BrowserServer.__OPTIONS_SWITCHER[self.browser_name]()
+        option = _load(BrowserServer.__OPTIONS_SWITCHER[self.browser_name])()
         self.driver_options = "--disable-search-engine-choice-screen"
         # Headless management
         if "headless" in self.browser_name:
@@ -208,20 +476,19 @@ class BrowserServer:
         if self.__driver_path is None:
             # Chromium flavour
             if "ium" in self.browser_name:
-                params["chrome_type"] = ChromeType.CHROMIUM
+                params["chrome_type"] = _load(_LAZY_NAMES["ChromeType"]).CHROMIUM
 
-            self.__driver_path = BrowserServer.__DRIVER_MANAGER[
-                self.browser_name](**params).install()
+            self.__driver_path = self.__install_driver(params)
 
-        service = BrowserServer.__SERVICE_SWITCHER[self.browser_name](self.__driver_path)
-        self.__web_driver = BrowserServer.__WEB_DRIVERS[self.browser_name](
+        service = _load(BrowserServer.__SERVICE_SWITCHER[self.browser_name])(self.__driver_path)
+        self.__web_driver = _load(BrowserServer.__WEB_DRIVERS[self.browser_name])(
                 service=service,
                 options=option
             )
         self.__launched = True
 
     def __serve_opera(self, params):
-        if OpeOptions is not None:
+        if _opera_options() is not None:
             return self.__serve_other(params)
         if "binary_location" not in self.driver_options:
             raise KeyError("Currently Opera does not have any webdriver implementation and "
@@ -238,22 +505,20 @@ class BrowserServer:
 
     def __serve_safari(self, params):
         params["executable_path"] = self.driver_path
-        self.__web_driver = BrowserServer.__WEB_DRIVERS[self.browser_name](
+        self.__web_driver = _load(BrowserServer.__WEB_DRIVERS[self.browser_name])(
             **params)
         self.__launched = True
 
     def __serve_other(self, params):
         if self.__driver_path is None:
-            self.__driver_path = BrowserServer.__DRIVER_MANAGER[self.browser_name](
-                **params
-            ).install()
+            self.__driver_path = self.__install_driver(params)
 
-        option = BrowserServer.__OPTIONS_SWITCHER[self.browser_name]()
+        option = _load(BrowserServer.__OPTIONS_SWITCHER[self.browser_name])()
         if self.driver_options:
             for opt in self.driver_options:
                 option.add_argument(opt)
-        service = BrowserServer.__SERVICE_SWITCHER[self.browser_name](self.__driver_path)
-        self.__web_driver = BrowserServer.__WEB_DRIVERS[self.browser_name](
+        service = _load(BrowserServer.__SERVICE_SWITCHER[self.browser_name])(self.__driver_path)
+        self.__web_driver = _load(BrowserServer.__WEB_DRIVERS[self.browser_name])(
             service=service,
             options=option)
         self.__launched = True
@@ -281,29 +546,78 @@ class BrowserServer:
         else:
             self.__serve_other(__params)
         self.__launched = True
+        if self.__transport is not None:
+            apply_transport(self.__web_driver, self.__transport)
+        if self.__instrumentation is not None:
+            self.__instrumentation.install(self.__web_driver)
+        self.__register_session()
         return 0
 
     def close(self):
         """
-        Close the webdriver
+        Close the webdriver. The screenshots queued in the screenshot writer are written first.
+        The instrumentation stats are written to stats_output when set, before quitting.
+        The BrowserServer is closed even when writing them fails.
         :return:
         """
-        self.webdriver.quit()
-        self.__web_driver = None
-        self.__launched = False
+        try:
+            if self.__screenshot_writer is not None:
+                self.__screenshot_writer.flush()
+            if self.windows is not None:
+                self.windows.close()
+            if self.__instrumentation is not None and self.__stats_output is not None:
+                self.__instrumentation.dump(self.__stats_output)
+            self.webdriver.quit()
+        finally:
+            if self.__instrumentation is not None:
+                self.__instrumentation.uninstall()
+            self.__web_driver = None
+            self.__launched = False
+            if self.__locator_cache is not None:
+                self.__locator_cache.clear()
         return 0
 
+    def reset(self):
+        """Bring the browser back to a blank state: one window, no cookie, no storage,
+        about:blank"""
+        return reset_session(driver=self.webdriver)
+
+    def is_alive(self) -> bool:
+        """Check that the browser is served and still answers"""
+        return self.is_launched and is_session_alive(driver=self.webdriver)
+
     def __full_screenshot(self, filename: str):
         return fullpage_screenshot(self.webdriver, filename)
 
-    def take_a_screenshot(self, save_to: str = None, is_full_screen: bool = True):
+    def __submit_screenshot(self, save_to: str = None, is_full_screen: bool = True,
+                            step: str = None):
+        folder = self.__temp_save_to if save_to is None else save_to
+        if not os.path.isdir(folder):
+            log.error(f"The screenshot could not be done."
+                      f" Please check if the file path is correct. Get '{folder}'")
+            raise IOError(f"The screenshot could not be done."
+                          f" Please check if the file path is correct. Get '{folder}'")
+        if is_full_screen:
+            capture = capture_fullpage(self.webdriver)
+        else:
+            capture = self.webdriver.get_screenshot_as_png()
+        filename = os.path.join(folder, f"screenshot-{self.__serve_time()}")
+        if self.__screenshot_writer is None:
+            return self.__screenshot_store.put(capture, filename, step)
+        return self.__screenshot_writer.submit(capture, filename, self.__screenshot_store, step)
+
+    def take_a_screenshot(self, save_to: str = None, is_full_screen: bool = True,
+                          step: str = None):
         """
         Take a screenshot and save the file to the given folder
         Each screenshot is followed by a timestamp. The file pattern is screenshot-<timestamp>.png
         :param save_to: path location to save the screenshot to
         :param is_full_screen: defaulted to 'True' capture the full page or the current screenview
-        :return: 0 if success
+        :param step: the step label recorded by the screenshot store if any
+        :return: the screenshot path or, with a screenshot writer, a future of the path
         """
+        if self.__screenshot_writer is not None or self.__screenshot_store is not None:
+            return self.__submit_screenshot(save_to, is_full_screen, step)
         try:
             # Process the filename
             if save_to is None:
@@ -333,6 +647,56 @@ class BrowserServer:
             log.error(f"Screenshot raised an error '{exception.args[0]}'")
             raise Exception(exception.args[0]) from None
 
+    def assert_visual_match(self,
+                            baseline: str,
+                            ignore: dict = None,
+                            tolerance: int = 0,
+                            max_diff_ratio: float = 0.0,
+                            diff_path: str = None,
+                            is_full_screen: bool = True) -> VisualDiff:
+        """
+        Compare the page with a baseline image (see visual.compare_screenshots).
+        A missing baseline is created from the current page.
+        The regions of the ignored elements are scaled to the device pixels of the capture.
+        :param baseline: the baseline image path
+        :param ignore: a dictionary of fields whose elements are not compared
+        :param tolerance: the largest channel difference, from 0 to 255, of identical pixels
+        :param max_diff_ratio: the largest ratio of different pixels
+        :param diff_path: save the diff image there when the page doesn't match
+        :param is_full_screen: compare the full page or the current screenview
+        :raise AssertionError: the page doesn't match the baseline
+        :raise ImportError: NumPy is not installed
+        :return: the VisualDiff
+        """
+        from PIL import Image
+
+        if is_full_screen:
+            capture = capture_fullpage(self.webdriver)
+        else:
+            capture = Image.open(BytesIO(self.webdriver.get_screenshot_as_png()))
+        if not os.path.exists(baseline):
+            log.warning(f"The baseline '{baseline}' doesn't exist, it's created from the page")
+            capture.save(baseline)
+            return VisualDiff(True, 0, capture.width * capture.height, None)
+        regions = []
+        if ignore:
+            page_width, _, viewport_width = self.webdriver.execute_script(PAGE_METRICS)[:3]
+            css_width = page_width if is_full_screen else viewport_width
+            regions = element_regions(self.webdriver, ignore, full_page=is_full_screen,
+                                      scale=capture.width / css_width if css_width else 1.0)
+        result = compare_screenshots(capture, baseline,
+                                     tolerance=tolerance,
+                                     max_diff_ratio=max_diff_ratio,
+                                     ignore_regions=regions,
+                                     diff_path=diff_path)
+        if not result.matched:
+            log.error(f"The page doesn't match the baseline '{baseline}'. Get {result}")
+            raise AssertionError(f"The page doesn't match the baseline '{baseline}': "
+                                 f"{result.different_pixels} different pixels "
+                                 f"({result.ratio:.4%}) in {result.box}. "
+                                 f"Diff image: '{diff_path}'")
+        return result
+
     # Start of convenient usage of the automaton tools
     # Navigation
     def go_to(self, url: str = None):
@@ -343,9 +707,12 @@ class BrowserServer:
         """Enter the frame found using the find_element method"""
         return enter_frame(driver=self.webdriver, field=field, web_element=web_element)
 
-    def go_to_window(self, handle: Union[str, int] = None, title: str = None):
-        """Switch to a window providing either the window handle or window title"""
-        return go_to_window(driver=self.webdriver, handle=handle, title=title)
+    def go_to_window(self, handle: Union[str, int] = None, title: str = None, url: str = None,
+                     opener: str = None):
+        """Switch to a window providing either the window handle or window title, URL pattern
+        or opener handle. The window is looked up in the windows registry"""
+        return go_to_window(driver=self.webdriver, handle=handle, title=title, url=url,
+                            opener=opener)
 
     # Finders
     def find_element(self,
@@ -362,15 +729,22 @@ class BrowserServer:
         """Find elements using the current webdriver or the provided WebElement"""
         return find_elements(driver=self.webdriver, field=field, web_element=web_element)
 
+    def resolve_many(self, fields: dict = None, web_element: WebElement = None):
+        """Find all the fields of the dictionary in a single browser call.
+        Return a dictionary of the same keys to the web element or None"""
+        return resolve_many(driver=self.webdriver, fields=fields, web_element=web_element)
+
     def find_from_elements(self,
                            field: dict = None,
                            text: str = None,
-                           web_element: WebElement = None):
-        """Find element from a list of elements based on the text (exact match)"""
+                           web_element: WebElement = None,
+                           match: str = MATCH_EXACT):
+        """Find element from a list of elements based on the text (exact match by default)"""
         return find_from_elements(driver=self.webdriver,
                                   field=field,
                                   text=text,
-                                  web_element=web_element)
+                                  web_element=web_element,
+                                  match=match)
 
     @deprecated(version="1.0.5", reason="You should use find_element with a web_element")
     def find_sub_element_from_element(self, field=None):
@@ -386,12 +760,14 @@ class BrowserServer:
         return find_sub_element_from_element(element, field=field)
 
     # Actions
-    def fill_element(self, field: dict = None, web_element: WebElement = None, value: str = None):
+    def fill_element(self, field: dict = None, web_element: WebElement = None, value: str = None,
+                     retry: RetryPolicy = None):
         """Fill the element with the value. Use the find_element method to find it"""
         return fill_element(driver=self.webdriver,
                             field=field,
                             web_element=web_element,
-                            value=value)
+                            value=value,
+                            retry=retry)
 
     def fill_elements(self, fields: dict = None, web_element: WebElement = None, data: dict = None):
         """Fill data in the respective field. data and fields keys must match.
@@ -401,44 +777,72 @@ class BrowserServer:
                              web_element=web_element,
                              data=data)
 
+    def fill_form(self,
+                  fields: dict = None,
+                  data: dict = None,
+                  web_element: WebElement = None,
+                  mode: str = FILL_DOM,
+                  keys_fields: tuple = ()) -> int:
+        """Fill a form in a single browser call firing the input and change events ("dom"
+        mode) or with keystrokes ("keys" mode). Return the number of fields not filled"""
+        return fill_form(driver=self.webdriver,
+                         fields=fields,
+                         data=data,
+                         web_element=web_element,
+                         mode=mode,
+                         keys_fields=keys_fields)
+
     # TODO add unit test
-    def click_element(self, field: dict = None, web_element: WebElement = None):
+    def click_element(self, field: dict = None, web_element: WebElement = None,
+                      retry: RetryPolicy = None, until: Union[float, Deadline] = None):
         """Perform a click element on the element. Use the find_element method to find it
         :raise NoSuchElementException: where element is not found
         """
         return click_element(driver=self.webdriver,
                              field=field,
-                             web_element=web_element)
+                             web_element=web_element,
+                             retry=retry,
+                             until=until)
 
-    def mouse_click(self, field: dict = None, web_element: WebElement = None):
+    def mouse_click(self, field: dict = None, web_element: WebElement = None,
+                    retry: RetryPolicy = None):
         """Perform a mouse click on the field. Use the find_element method to find if"""
         return mouse_click(driver=self.webdriver,
                            field=field,
-                           web_element=web_element)
+                           web_element=web_element,
+                           retry=retry)
 
-    def select_in_dropdown(self, field: dict = None, visible_text: str = None, value: str = None):
+    def select_in_dropdown(self, field: dict = None, visible_text: str = None, value: str = None,
+                           retry: RetryPolicy = None):
         """Select in field dropdown either the option by its visible text or its value"""
         return select_in_dropdown(driver=self.webdriver,
                                   field=field,
                                   visible_text=visible_text,
-                                  value=value)
+                                  value=value,
+                                  retry=retry)
 
     def move_to(self, web_element: WebElement,
                 caller_message: str = "From BrowserServer instance."):
-        """Bring the element into the screenplay"""
+        """Bring the element into the screenplay following the scroll policy"""
         return move_to(driver=self.webdriver,
                        element=web_element,
                        caller_message=caller_message)
 
     # TODO add unit test
-    def select_in_angular_dropdown(self, root_field=None, visible_text=None):
+    def select_in_angular_dropdown(self, root_field=None, visible_text=None,
+                                   match: str = MATCH_EXACT,
+                                   until: Union[float, Deadline] = 5,
+                                   retry: RetryPolicy = None):
         """Select a field within a mat_option list
 
     If root_field is defined then click it and search for visible_text in mat-option elements.
     Otherwise, only search for visible_text in mat-options elements"""
         return select_in_angular_dropdown(driver=self.webdriver,
                                           root_field=root_field,
-                                          visible_text=visible_text)
+                                          visible_text=visible_text,
+                                          match=match,
+                                          until=until,
+                                          retry=retry)
 
     def set_checkbox(self, field: dict = None,
                      is_checked: bool = None,
@@ -457,12 +861,16 @@ class BrowserServer:
     def select_in_elements(self,
                            field: dict = None,
                            displayed_text: str = None,
-                           web_element: WebElement = None) -> int:
+                           web_element: WebElement = None,
+                           match: str = MATCH_EXACT,
+                           until: Union[float, Deadline] = 5) -> int:
         """Do a click on the element which text match"""
         return select_in_elements(driver=self.webdriver,
                                   field=field,
                                   displayed_text=displayed_text,
-                                  web_element=web_element)
+                                  web_element=web_element,
+                                  match=match,
+                                  until=until)
 
     def execute_script(self, script: str, *args):
         """Delegate to the current webdriver the execute_script.
@@ -506,6 +914,32 @@ class BrowserServer:
                               until=until,
                               avoid_move_to=avoid_move_to)
 
+    def wait_for_field(self,
+                       field: dict = None,
+                       web_element: WebElement = None,
+                       until: float = 5,
+                       displayed: bool = False,
+                       avoid_move_to: bool = True) -> Union[WebElement, None]:
+        """Wait in the browser for the field to exist, and to be displayed when asked. Return
+        the element as soon as the DOM changes accordingly, None on timeout"""
+        return wait_for_field(driver=self.webdriver,
+                              field=field,
+                              web_element=web_element,
+                              until=until,
+                              displayed=displayed,
+                              avoid_move_to=avoid_move_to)
+
+    def are_fields_exist(self,
+                         fields: dict = None,
+                         web_element: WebElement = None,
+                         until: int = 5) -> dict:
+        """Check the fields existence in the DOM. Return a dictionary of the same keys to the
+        web element or None"""
+        return are_fields_exist(driver=self.webdriver,
+                                fields=fields,
+                                web_element=web_element,
+                                until=until)
+
     def is_field_contains_text(self,
                                field: dict = None,
                                web_element: WebElement = None,
@@ -559,10 +993,33 @@ class BrowserServer:
     def retrieve_tabular(self,
                          field: dict = None,
                          web_element: WebElement = None,
-                         row_and_col: tuple = ("tr", "td", "th")) -> List[list]:
-        """Retrieve a tabular as a list of list of cells' content (str)"""
+                         row_and_col: tuple = ("tr", "td", "th"),
+                         text_source: str = "innerText",
+                         expand_spans: bool = False,
+                         as_dict: bool = False) -> List[Union[list, dict]]:
+        """Retrieve a tabular as a list of list of cells' content (str), or of dictionaries
+        keyed by the header row with as_dict"""
         return retrieve_tabular(driver=self.webdriver, field=field, web_element=web_element,
-                                row_and_col=row_and_col)
+                                row_and_col=row_and_col, text_source=text_source,
+                                expand_spans=expand_spans, as_dict=as_dict)
+
+    def iter_tabular(self,
+                     field: dict = None,
+                     scroll_container: dict = None,
+                     next_page: dict = None,
+                     key_column: Union[int, str, None] = None,
+                     **options) -> Iterator[list]:
+        """Yield the new rows of a virtualized or paginated tabular batch by batch while
+        scrolling its container or clicking its next page button (see
+        information.iter_tabular for the options)"""
+        return iter_tabular(driver=self.webdriver, field=field,
+                            scroll_container=scroll_container, next_page=next_page,
+                            key_column=key_column, **options)
+
+    def export_tabular(self, field: dict = None, output: str = None, **options) -> int:
+        """Stream the rows of a virtualized or paginated tabular to a .csv or .jsonl file.
+        Return the number of rows written"""
+        return export_tabular(driver=self.webdriver, field=field, output=output, **options)
 
     # TODO add unit test
     def where_am_i(self) -> str:
@@ -577,6 +1034,17 @@ class BrowserServer:
         return is_checkbox_checked(driver=self.webdriver, field=field, web_element=web_element,
                                    is_angular=is_angular)
 
+    def element_snapshot(self,
+                         field: dict = None,
+                         web_element: WebElement = None,
+                         attributes: tuple = ()) -> Union[ElementSnapshot, None]:
+        """Read the text, value, states, rectangle, viewport intersection and attributes of
+        the element in a single call. None if the element is not found"""
+        return element_snapshot(driver=self.webdriver,
+                                field=field,
+                                web_element=web_element,
+                                attributes=attributes)
+
     def is_element_in_viewport(self,
                                field: dict = None,
                                web_element: WebElement = None) -> bool:
@@ -585,6 +1053,12 @@ class BrowserServer:
                                     field=field,
                                     web_element=web_element)
 
-    def wait_for_another_window(self, wait_until: int = 1) -> bool:
-        """Wait for another window to pop"""
-        return wait_for_another_window(driver=self.webdriver, until=wait_until)
+    def wait_for_another_window(self,
+                                wait_until: int = 1,
+                                count: int = 2,
+                                url: str = None,
+                                title: str = None) -> bool:
+        """Wait for count windows, one of them matching the url pattern and the title when
+        given. Driven by the BiDi events when the driver has a BiDi connection"""
+        return wait_for_another_window(driver=self.webdriver, until=wait_until, count=count,
+                                       url=url, title=title)
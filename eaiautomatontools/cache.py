@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Locator result cache.
+
+A field lookup is a full command sent to the web driver. On pages which don't change, the
+same field is resolved again and again to the same web element.
+The cache keeps the web element found for a field and its search root. An entry is valid as
+long as the document is the same, its DOM didn't change and the URL didn't move.
+The DOM changes are counted in the browser by a MutationObserver (see scripts.DOCUMENT_STATE).
+The page may change on its own between two commands (timers, network renders...): the state is
+read on each hit, a single script cheaper than the lookup it saves.
+"""
+from logging import getLogger
+from typing import Union
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webelement import WebElement
+
+from .locators import Locator
+from .scripts import DOCUMENT_STATE
+from .sessions import get_session
+
+log = getLogger(__name__)
+
+
+def field_key(field: Locator, web_element: WebElement = None) -> tuple:
+    """
+    Build the hashable key of a field and its search root
+    :param field: a Locator
+    :param web_element: the web element to search from if any
+    :return: a tuple
+    """
+    return field, None if web_element is None else web_element.id
+
+
+class LocatorCache:
+    """
+    Map a field and its search root to the web element found.
+    One instance serves one web driver session.
+    """
+
+    def __init__(self):
+        self.__entries = {}
+        self.__state = None
+        self.__hits = 0
+        self.__misses = 0
+        self.__invalidations = 0
+        self.__reads = 0
+
+    def __document_state(self, driver) -> Union[tuple, None]:
+        try:
+            state = tuple(driver.execute_script(DOCUMENT_STATE))
+            self.__reads += 1
+            return state
+        except WebDriverException as exception:
+            log.debug(f"Cannot read the document state. Get '{exception.msg}'")
+            return None
+
+    def get(self, driver, field: Locator,
+            web_element: WebElement = None) -> Union[WebElement, None]:
+        """
+        Return the cached web element if it's still valid.
+        The document state read here is kept for the next put.
+        :param driver: a selenium web driver
+        :param field: a Locator
+        :param web_element: the web element to search from if any
+        :return: the web element or None on a miss
+        """
+        self.__state = None
+        key = field_key(field, web_element)
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.__misses += 1
+            return None
+        element, state = entry
+        self.__state = self.__document_state(driver)
+        if self.__state is not None and state == self.__state:
+            self.__hits += 1
+            return element
+        del self.__entries[key]
+        self.__invalidations += 1
+        self.__misses += 1
+        return None
+
+    def put(self, driver, field: Locator, web_element: WebElement, element: WebElement):
+        """
+        Store the web element found for the field.
+        :param driver: a selenium web driver
+        :param field: a Locator
+        :param web_element: the web element the search started from if any
+        :param element: the found web element
+        """
+        state = self.__state if self.__state is not None else self.__document_state(driver)
+        self.__state = None
+        if state is not None:
+            self.__entries[field_key(field, web_element)] = (element, state)
+
+    def clear(self):
+        """Drop all entries and reset the statistics"""
+        self.__entries.clear()
+        self.__state = None
+        self.__hits = 0
+        self.__misses = 0
+        self.__invalidations = 0
+        self.__reads = 0
+
+    @property
+    def stats(self) -> dict:
+        """Hits, misses and invalidations counts, the current number of entries and the number
+        of document states read in the browser"""
+        return {"hits": self.__hits,
+                "misses": self.__misses,
+                "invalidations": self.__invalidations,
+                "size": len(self.__entries),
+                "reads": self.__reads}
+
+
+def get_locator_cache(driver) -> Union[LocatorCache, None]:
+    """Return the locator cache enabled for the driver session if any"""
+    session = get_session(driver)
+    return None if session is None else session.locator_cache
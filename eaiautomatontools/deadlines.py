@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Time budgets shared by chained waits.
+
+Each wait of the toolbox has its own timeout: a function waiting for an element then for its
+display could last twice its timeout. A Deadline is a single budget the nested waits draw from:
+a wait is granted the smallest of its own timeout and the remaining budget.
+
+A Deadline is given instead of a timeout (``is_field_displayed(driver, field,
+wait_until=Deadline(5))``) or set for a whole block on the BrowserServer session
+(``with browser.deadline(5):``). Every wait records what it requested, was granted and spent.
+"""
+import logging
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Union
+
+from .sessions import get_session
+
+log = logging.getLogger(__name__)
+
+
+class Deadline:
+    """
+    A time budget in second starting at its creation.
+    :param budget: the budget in second
+    :param label: a name used in the report
+    :param parent: an enclosing Deadline: the budget is capped by its remaining time and the
+            waits are recorded by both
+    """
+
+    def __init__(self, budget: float, label: str = None, parent: "Deadline" = None):
+        self.parent = parent
+        self.budget = budget if parent is None else min(budget, parent.remaining)
+        self.label = label
+        self.timings = []
+        self.__end = perf_counter() + self.budget
+
+    @property
+    def remaining(self) -> float:
+        """The time left in second, 0 once expired"""
+        return max(self.__end - perf_counter(), 0.0)
+
+    @property
+    def elapsed(self) -> float:
+        return perf_counter() - (self.__end - self.budget)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining <= 0
+
+    def timeout(self, until: Union[float, None] = None) -> float:
+        """Return the time granted to a wait of until second, the remaining time if None"""
+        return self.remaining if until is None else min(until, self.remaining)
+
+    def record(self, call: str, requested: Union[float, None], granted: float, spent: float):
+        self.timings.append({"call": call, "requested": requested, "granted": granted,
+                             "spent": spent})
+        if self.parent is not None:
+            self.parent.record(call, requested, granted, spent)
+
+    def report(self) -> str:
+        """Return how the budget was spent, one wait per line"""
+        lines = [f"Deadline {self.label or ''}: {self.budget:.3f}s budget, "
+                 f"{self.elapsed:.3f}s elapsed, {self.remaining:.3f}s remaining"]
+        lines.extend(f"  {timing['call']}: requested {timing['requested']}, "
+                     f"granted {timing['granted']:.3f}s, spent {timing['spent']:.3f}s"
+                     for timing in self.timings)
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"Deadline(budget={self.budget}, remaining={self.remaining:.3f})"
+
+
+def current_deadline(driver) -> Union[Deadline, None]:
+    """Return the deadline set on the driver session, None if not set"""
+    session = get_session(driver)
+    return None if session is None else session.deadline
+
+
+def as_deadline(driver, until: Union[float, Deadline], label: str = None) -> Deadline:
+    """
+    Turn a timeout into a Deadline bounded by the session one, a Deadline is returned as is.
+    Chained waits share the returned Deadline.
+    """
+    if isinstance(until, Deadline):
+        return until
+    return Deadline(until, label, current_deadline(driver))
+
+
+@contextmanager
+def wait_budget(driver, until: Union[float, Deadline, None], call: str):
+    """
+    Grant a wait its time and record the time spent.
+    :param driver: a selenium web driver
+    :param until: the wait timeout in second or a Deadline to draw from
+    :param call: the waiting function name
+    :return: a context manager giving the wait time in second
+    """
+    if isinstance(until, Deadline):
+        deadline, requested = until, None
+    else:
+        deadline, requested = current_deadline(driver), until
+    if deadline is None:
+        yield until
+        return
+    granted = deadline.timeout(requested)
+    if granted <= 0:
+        log.info(f"The deadline is over, {call} only checks once")
+    start = perf_counter()
+    try:
+        yield granted
+    finally:
+        deadline.record(call, requested, granted, perf_counter() - start)
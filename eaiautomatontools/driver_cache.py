@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent cache of the web driver executables.
+
+Without a driver path, the BrowserServer asks the webdriver manager for an executable on
+each serve which costs time and needs the network. The cache keeps a copy of the resolved
+executable per browser, version and platform with its SHA-256 digest:
+
+    <root>/<browser>/<version>/<platform>/<executable>
+    <root>/<browser>/<version>/<platform>/manifest.json
+
+A file lock serializes the resolution of an entry between processes so that concurrent
+workers don't download the same executable at once. An entry is used as long as its digest
+matches. Without a requested version, the entry is keyed on the installed browser version so
+that a browser update resolves a new driver. When that version can't be detected, the entry
+is "latest" and refreshed after max_age seconds; when the refresh fails, offline for
+instance, the cached executable is still used.
+"""
+import hashlib
+import json
+import logging
+import os
+import platform
+import shutil
+import stat
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Union
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+log = logging.getLogger(__name__)
+
+LATEST = "latest"
+CACHE_ENVIRONMENT_VARIABLE = "EAIAUTOMATONTOOLS_DRIVER_CACHE"
+
+
+def default_root() -> str:
+    """The cache folder: $EAIAUTOMATONTOOLS_DRIVER_CACHE or ~/.cache/eaiautomatontools/drivers"""
+    return os.environ.get(CACHE_ENVIRONMENT_VARIABLE) or os.path.join(
+        os.path.expanduser("~"), ".cache", "eaiautomatontools", "drivers")
+
+
+def platform_key() -> str:
+    return f"{sys.platform}-{platform.machine().lower() or 'unknown'}"
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _file_lock(path: str):
+    with open(path, "a+b") as lock:
+        if sys.platform == "win32":
+            lock.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after 10 seconds, keep waiting
+                    continue
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+class DriverCache:
+    """
+    Cache the web driver executables on disk.
+    :param root: the cache folder, default to default_root()
+    :param max_age: the time in second before an entry without version is refreshed
+    """
+
+    def __init__(self, root: str = None, max_age: float = 24 * 3600):
+        self.root = root or default_root()
+        self.max_age = max_age
+
+    def entry(self, browser: str, version: Union[str, None] = None) -> str:
+        """Return the folder of the browser, version and current platform entry"""
+        return os.path.join(self.root, browser, version or LATEST, platform_key())
+
+    @staticmethod
+    def __read_manifest(entry: str) -> Union[dict, None]:
+        try:
+            with open(os.path.join(entry, "manifest.json"), encoding="utf-8") as file:
+                manifest = json.load(file)
+            executable = os.path.join(entry, manifest["name"])
+            if file_digest(executable) == manifest["sha256"]:
+                return manifest
+            log.warning(f"The cached driver '{executable}' is corrupted")
+        except (OSError, ValueError, KeyError) as exception:
+            log.debug(f"No valid cached driver in '{entry}'. Get {exception.args}")
+        return None
+
+    @staticmethod
+    def __store(entry: str, source: str) -> dict:
+        name = os.path.basename(source)
+        executable = os.path.join(entry, name)
+        temporary = f"{executable}.tmp"
+        shutil.copyfile(source, temporary)
+        os.chmod(temporary, os.stat(source).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        os.replace(temporary, executable)
+        manifest = {"name": name,
+                    "sha256": file_digest(executable),
+                    "source": source,
+                    "stored": time.time()}
+        with open(os.path.join(entry, "manifest.json.tmp"), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(os.path.join(entry, "manifest.json.tmp"), os.path.join(entry, "manifest.json"))
+        return manifest
+
+    @staticmethod
+    def __detect(browser: str, detect: Union[Callable[[], Union[str, None]], None]) -> \
+            Union[str, None]:
+        if detect is None:
+            return None
+        try:
+            version = detect()
+        except Exception as exception:
+            log.debug(f"Cannot detect the installed '{browser}' version. Get {exception.args}")
+            return None
+        return str(version) if version else None
+
+    def resolve(self, browser: str, version: Union[str, None],
+                install: Callable[[], str],
+                detect: Callable[[], Union[str, None]] = None) -> str:
+        """
+        Return the cached executable path, install and store it on a miss
+        :param browser: the browser family such as chrome, chromium, firefox, edge or opera
+        :param version: the browser version, None for the installed one
+        :param install: a function returning the path of a freshly installed executable
+        :param detect: a function returning the installed browser version, None when unknown.
+                Used when version is None
+        :raise Exception: the install function exceptions when nothing is cached
+        :return: the executable path
+        """
+        if version is None:
+            version = self.__detect(browser, detect)
+        entry = self.entry(browser, version)
+        os.makedirs(entry, exist_ok=True)
+        with _file_lock(f"{entry}.lock"):
+            manifest = self.__read_manifest(entry)
+            if manifest is not None and (
+                    version is not None
+                    or time.time() - manifest.get("stored", 0) < self.max_age):
+                return os.path.join(entry, manifest["name"])
+            try:
+                manifest = self.__store(entry, install())
+            except Exception as exception:
+                if manifest is None:
+                    raise
+                log.warning(f"Cannot refresh the cached '{browser}' driver, use the cached one. "
+                            f"Get {exception.args}")
+            return os.path.join(entry, manifest["name"])
+
+    def clear(self):
+        """Remove all entries"""
+        shutil.rmtree(self.root, ignore_errors=True)
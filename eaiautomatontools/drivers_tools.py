@@ -1,75 +1,124 @@
 # -*- coding: utf-8 -*-
+import functools
 import logging
-from os import remove
-from time import sleep
+import sys
+from base64 import b64decode
+from io import BytesIO
 
-from PIL import Image
-from selenium import webdriver
-from selenium.webdriver import ActionChains
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.remote.webelement import WebElement
 
+from .locators import Locator
+from .scripts import PAGE_METRICS, SCROLL_AND_SETTLE, SCROLL_INTO_VIEW
+from .sessions import session_of, SCROLL_HOVER, SCROLL_IF_NEEDED, SCROLL_NEVER
+
 log = logging.getLogger(__name__)
 
 
+__WEB_DRIVER_MODULES = ("selenium.webdriver.firefox.webdriver",
+                        "selenium.webdriver.chrome.webdriver",
+                        "selenium.webdriver.ie.webdriver",
+                        "selenium.webdriver.edge.webdriver")
+# The number of imported modules and the web driver classes collected then
+__web_drivers = [-1, ()]
+
+
 def web_drivers_tuple():
-    return (webdriver.firefox.webdriver.WebDriver,
-            webdriver.chrome.webdriver.WebDriver,
-            webdriver.ie.webdriver.WebDriver,
-            webdriver.edge.webdriver.WebDriver)
+    """
+    Return the supported web driver classes.
+    A web driver instance implies its module is imported: the modules not imported yet are
+    skipped instead of being loaded. The classes are collected again only when modules have
+    been imported or removed since the last call.
+    """
+    if __web_drivers[0] != len(sys.modules):
+        __web_drivers[:] = [len(sys.modules),
+                            tuple(sys.modules[module].WebDriver for module in __WEB_DRIVER_MODULES
+                                  if module in sys.modules)]
+    return __web_drivers[1]
+
+
+def deprecated(*args, **kwargs):
+    """
+    The deprecated.classic.deprecated decorator, the deprecated package being imported on the
+    first call of the decorated function. The warnings point at the caller of the decorated
+    function.
+    """
+    # The wrapper below is one more frame between the caller and the warning
+    kwargs["extra_stacklevel"] = kwargs.get("extra_stacklevel", 0) + 1
+
+    def decorator(function):
+        decorated = None
+
+        @functools.wraps(function)
+        def wrapper(*function_args, **function_kwargs):
+            nonlocal decorated
+            if decorated is None:
+                from deprecated.classic import deprecated as classic_deprecated
+                decorated = classic_deprecated(*args, **kwargs)(function)
+            return decorated(*function_args, **function_kwargs)
+        return wrapper
+    return decorator
+
+
+def __tiles(total_width, total_height, viewport_width, viewport_height):
+    """The top left corners of the viewports covering the page"""
+    return [(left, top)
+            for top in range(0, total_height, max(viewport_height, 1))
+            for left in range(0, total_width, max(viewport_width, 1))]
+
+
+def __native_capture(driver, width: int, height: int):
+    """Capture the page beyond the viewport with the DevTools protocol"""
+    from PIL import Image
+
+    screenshot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+        "format": "png",
+        "captureBeyondViewport": True,
+        "fromSurface": True,
+        "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1}})
+    return Image.open(BytesIO(b64decode(screenshot["data"])))
+
+
+def capture_fullpage(driver, native: bool = True):
+    """
+    Capture the full page as a PIL image. Nothing is written on disk.
+    On Chromium based browsers, the page is captured in a single DevTools call. Otherwise
+    the page is scrolled viewport by viewport, waiting for the scroll position to settle, and
+    the viewport screenshots are stitched. The scroll position is restored.
+    :param driver: a selenium web driver
+    :param native: use the DevTools capture when available
+    :return: a PIL Image
+    """
+    from PIL import Image
+
+    total_width, total_height, viewport_width, viewport_height, scroll_x, scroll_y = (
+        driver.execute_script(PAGE_METRICS))
+    log.debug(f"Total: ({total_width}, {total_height}), "
+              f"Viewport: ({viewport_width},{viewport_height})")
+    if native and hasattr(driver, "execute_cdp_cmd"):
+        try:
+            return __native_capture(driver, total_width, total_height)
+        except Exception as exception:
+            log.debug(f"Native full page capture unavailable, stitch the viewports. "
+                      f"Get {exception.args}")
+    stitched_image = Image.new('RGB', (total_width, total_height))
+    try:
+        for left, top in __tiles(total_width, total_height, viewport_width, viewport_height):
+            # The browser clamps the scroll: paste the viewport where it actually is
+            offset = tuple(driver.execute_async_script(SCROLL_AND_SETTLE, left, top))
+            log.debug(f"Adding to stitched image with offset {offset}")
+            with Image.open(BytesIO(driver.get_screenshot_as_png())) as screenshot:
+                stitched_image.paste(screenshot, offset)
+    finally:
+        driver.execute_async_script(SCROLL_AND_SETTLE, scroll_x, scroll_y)
+    return stitched_image
 
 
 def fullpage_screenshot(driver, file):
     log.debug("Starting full page screenshot")
-    total_width = driver.execute_script("return document.body.offsetWidth")
-    total_height = driver.execute_script("return document.body.parentNode.scrollHeight")
-    viewport_width = driver.execute_script("return document.body.clientWidth")
-    viewport_height = driver.execute_script("return window.innerHeight")
-    log.debug("Total: ({0}, {1}), Viewport: ({2},{3})".format(total_width, total_height,
-                                                              viewport_width, viewport_height))
-    rectangles = []
-    i = 0
-    while i < total_height:
-        ii = 0
-        top_height = i + viewport_height
-
-        if top_height > total_height:
-            top_height = total_height
-
-        while ii < total_width:
-            top_width = ii + viewport_width
-
-            if top_width > total_width:
-                top_width = total_width
-
-            log.debug("Appending rectangle ({0},{1},{2},{3})".format(ii, i, top_width, top_height))
-            rectangles.append((ii, i, top_width, top_height))
-            ii = ii + viewport_width
-        i = i + viewport_height
-    stitched_image = Image.new('RGB', (total_width, total_height))
-    previous = None
-    part = 0
-    for rectangle in rectangles:
-        # TODO Scroll to top saving the current position (?)
-        if previous is not None:
-            driver.execute_script("window.scrollTo({0}, {1})".format(rectangle[0], rectangle[1]))
-            log.debug("Scrolled To ({0},{1})".format(rectangle[0], rectangle[1]))
-            sleep(0.2)
-        file_name = "part_{0}.png".format(part)
-        log.debug("Capturing {0} ...".format(file_name))
-        driver.get_screenshot_as_file(file_name)
-        screenshot = Image.open(file_name)
-        if rectangle[1] + viewport_height > total_height:
-            offset = (rectangle[0], total_height - viewport_height)
-        else:
-            offset = (rectangle[0], rectangle[1])
-        log.debug("Adding to stitched image with offset ({0}, {1})".format(offset[0], offset[1]))
-        stitched_image.paste(screenshot, offset)
-        del screenshot
-        remove(file_name)
-        part = part + 1
-        previous = rectangle
+    image = capture_fullpage(driver)
     try:
-        stitched_image.save(file)
+        image.save(file)
     except IOError:
         return False
     log.info("Screenshot saved: {}".format(file))
@@ -77,63 +126,72 @@ def fullpage_screenshot(driver, file):
 
 
 def move_to(driver=None, element: WebElement = None, caller_message: str = ''):
-    if driver is None or not isinstance(driver, web_drivers_tuple()):
-        log.error("Driver is expected")
-        raise TypeError("Driver is expected")
+    """
+    Bring the element into the viewport following the driver session scroll policy:
+    - never: don't scroll
+    - if_needed: scroll only if the element is not entirely in the viewport
+    - always (default): scroll
+    - hover: scroll and move the mouse pointer over the element, so that hover dependent
+      content shows up. The pointer move is a second command
+    The check and the scroll are done in a single browser call. The element is centered.
+    Scrolled and skipped moves are counted in the session scroll_stats.
+    :param driver: a selenium web driver
+    :param element: the web element to bring into view
+    :param caller_message: a message added to the error logs
+    :raise TypeError: driver or element are not of the expected type
+    :raise Exception: the element cannot be scrolled to
+    """
+    driver_validation(driver, log)
     if element is None or not isinstance(element, WebElement):
         log.error("Element is expected")
         raise TypeError("Element is expected")
+    session = session_of(driver)
+    if session.scroll_policy == SCROLL_NEVER:
+        session.scroll_stats["skipped"] += 1
+        return
     try:
-        if 'firefox' in driver.capabilities['browserName']:
-            x = element.location['x']
-            y = element.location['y']
-            scroll_by_coord = 'window.scrollTo(%s,%s);' % (
-                x,
-                y
-            )
-            scroll_nav_out_of_way = 'window.scrollBy(0, -120);'
-            driver.execute_script(scroll_by_coord)
-            driver.execute_script(scroll_nav_out_of_way)
-        actions = ActionChains(driver)
-        actions.move_to_element(element)
-        actions.perform()
+        scrolled = driver.execute_script(SCROLL_INTO_VIEW, element,
+                                         session.scroll_policy == SCROLL_IF_NEEDED)
     except Exception as exception:
-        log.warning(f"'{caller_message}'\nCannot move to with chain actions."
+        log.warning(f"'{caller_message}'\nCannot scroll to the element."
                     f" Get:\n {exception.args[0]}")
-        driver.execute_script("arguments[0].scrollIntoView();", element)
         raise Exception(f"'{caller_message}'\n{exception.args[0]}")
+    session.scroll_stats["scrolled" if scrolled else "skipped"] += 1
+    if session.scroll_policy == SCROLL_HOVER:
+        try:
+            ActionChains(driver).move_to_element(element).perform()
+        except Exception as exception:
+            log.warning(f"'{caller_message}'\nCannot move to with chain actions."
+                        f" Get:\n {exception.args[0]}")
+            raise Exception(f"'{caller_message}'\n{exception.args[0]}")
 
 
-def __field_validation(field=None, logger=None):
-    """
-    Check if the field contains the expected keys and values for the type key.
-    :param field: a dictionary
-    :return: True if field is correct false otherwise
-    """
-    field_type = ("id",
-                  "name",
-                  "class_name",
-                  "link_text",
-                  "css",
-                  "partial_link_text",
-                  "xpath",
-                  "tag_name")
-    if any(key not in field.keys() for key in ("type", "value")):
-        logger.error("The field argument doesn't contains either the 'type' or 'value' key.")
-        raise KeyError("The field argument doesn't contains either the 'type' or 'value' key.")
-    if field['type'] not in field_type:
-        logger.error(f"The field type is not one the expected: '{field_type}")
-        raise ValueError(f"The field type is not one the expected: '{field_type}")
-
-
-def driver_field_validation(driver, field, logger):
+def driver_validation(driver, logger):
     if driver is None or not isinstance(driver, web_drivers_tuple()):
         logger.error("Driver is expected")
         raise TypeError("Driver is expected")
+
+
+def driver_field_validation(driver, field, logger) -> Locator:
+    """
+    Check the driver and the field.
+    The field is either a Locator, already validated, or a dictionary with the expected keys
+    and values for the type key.
+    :param driver: a selenium web driver
+    :param field: a Locator or a dictionary
+    :param logger: the caller logger
+    :raise TypeError: driver is not a web driver or field is not a dictionary
+    :raise KeyError: field doesn't contain the 'type' or 'value' key
+    :raise ValueError: field type is not one of the expected
+    :return: the field as a Locator
+    """
+    driver_validation(driver, logger)
+    if isinstance(field, Locator):
+        return field
     if not isinstance(field, dict):
         logger.error(f"{field} is not a dictionary")
         raise TypeError(f"{field} is not a dictionary")
-    __field_validation(field, logger)
+    return Locator.from_field(field)
 
 
 def web_element_validation(web_element, logger):
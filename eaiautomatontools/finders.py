@@ -1,45 +1,37 @@
 # -*- coding: utf-8 -*-
 import logging
-from typing import List, Union
-
-from deprecated.classic import deprecated
-
-from .drivers_tools import driver_field_validation, move_to, web_element_validation
-from selenium.common.exceptions import NoSuchElementException
+from typing import Dict, List, Union
+
+from .cache import get_locator_cache
+from .drivers_tools import (deprecated, driver_field_validation, driver_validation, move_to,
+                            web_element_validation)
+from .locators import (BY_SWITCHER, Locator, MATCH_EXACT, MATCH_NORMALIZED,  # noqa: F401
+                       MATCH_IGNORE_CASE, MATCH_REGEX, MATCH_MODES)
+from .scripts import MATCH_TEXT, RESOLVE_MANY
+from selenium.common.exceptions import InvalidSelectorException, NoSuchElementException
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 
 log = logging.getLogger(__name__)
 
-BY_SWITCHER = {
-        "id": By.ID,
-        "name": By.NAME,
-        "class_name": By.CLASS_NAME,
-        "css": By.CSS_SELECTOR,
-        "link_text": By.LINK_TEXT,
-        "partial_link_text": By.PARTIAL_LINK_TEXT,
-        "tag_name": By.TAG_NAME,
-        "xpath": By.XPATH
-    }
 
+def __find_element(web_element, locator: Locator):
+    return web_element.find_element(locator.by, locator.value)
 
-def __find_element(web_element, field: dict):
-    return web_element.find_element(BY_SWITCHER[field["type"]], field["value"])
 
-
-def __find_elements(web_element, field: dict):
-    return web_element.find_elements(BY_SWITCHER[field["type"]], field["value"])
+def __find_elements(web_element, locator: Locator):
+    return web_element.find_elements(locator.by, locator.value)
 
 
 def find_element(driver=None,
-                 field: dict = None,
+                 field: Union[dict, Locator] = None,
                  web_element: WebElement = None,
                  avoid_move_to: bool = False) -> Union[WebElement, None]:
     """
-    Look up for the field described as a dictionary {"type": string, "value":}.
+    Look up for the field described as a dictionary {"type": string, "value":} or a Locator.
     Example: {"type": "id", "value": "frmCentreNumber"}
-    Optionally, you can specify a text an call the find_from_elements method
+    Optionally, you can specify a text an call the find_from_elements method.
+    The text matching mode can be set using the "match" key (see find_from_elements).
     :param driver: a selenium web driver
     :param field: a dictionary
     :param web_element: a web_element to search from
@@ -48,26 +40,39 @@ def find_element(driver=None,
             the field is not a dictionary
     :raise KeyError: If the field variable doesn't contain the expected keys i.e. type and value
     :raise NoSuchElementException: If the field doesn't exist
-    :return: a selenium web element
+    :return: a selenium web element. It may come from the locator cache when enabled on the
+            driver session
     """
     try:
-        driver_field_validation(driver, field, log)
+        locator = driver_field_validation(driver, field, log)
         web_element_validation(web_element, log)
 
-        if "text" in field:
-            return find_from_elements(driver=driver,
-                                      field=field,
-                                      text=field['text'],
-                                      web_element=web_element,
-                                      avoid_move_to=avoid_move_to)
-
-        if web_element is None:
-            element = __find_element(driver, field)
+        cache = get_locator_cache(driver)
+        if cache is not None:
+            element = cache.get(driver, locator, web_element)
+            if element is not None:
+                if not avoid_move_to:
+                    move_to(driver, element, f"Find element: {field}")
+                return element
+
+        if locator.text is not None:
+            element = find_from_elements(driver=driver,
+                                         field=locator,
+                                         text=locator.text,
+                                         web_element=web_element,
+                                         avoid_move_to=avoid_move_to,
+                                         match=locator.match or MATCH_EXACT)
         else:
-            element = __find_element(web_element, field)
+            if web_element is None:
+                element = __find_element(driver, locator)
+            else:
+                element = __find_element(web_element, locator)
+
+            if not avoid_move_to:
+                move_to(driver, element, f"Find element: {field}")
 
-        if not avoid_move_to:
-            move_to(driver, element, f"Find element: {field}")
+        if cache is not None and element is not None:
+            cache.put(driver, locator, web_element, element)
         return element
     except NoSuchElementException as no_such_element:
         log.debug(f"In find_element didn't find the element '{field}'."
@@ -77,7 +82,7 @@ def find_element(driver=None,
 
 def find_elements(driver=None, field=None, web_element=None) -> List[WebElement]:
     """
-    Look up for the field described as a dictionary {"type": string, "value":}.
+    Look up for the field described as a dictionary {"type": string, "value":} or a Locator.
     Example: {"type": "id", "value": "frmCentreNumber"}
     :param web_element:
     :param driver: a selenium web driver
@@ -88,29 +93,91 @@ def find_elements(driver=None, field=None, web_element=None) -> List[WebElement]
     :return: a list of selenium web element
     """
 
-    driver_field_validation(driver, field, log)
+    locator = driver_field_validation(driver, field, log)
     web_element_validation(web_element, log)
-    # Define the association between a type and a selenium find action
     if web_element is not None:
-        return __find_elements(web_element, field)
+        return __find_elements(web_element, locator)
     else:
-        return __find_elements(driver, field)
+        return __find_elements(driver, locator)
+
+
+def resolve_many(driver=None,
+                 fields: dict = None,
+                 web_element: WebElement = None) -> Dict[str, Union[WebElement, None]]:
+    """
+    Look up for all the fields of a page-object dictionary in a single browser call.
+    Fields follow the find_element rules, the "text" and "match" keys included.
+    Elements are not moved to.
+    :param driver: a selenium web driver
+    :param fields: a dictionary of fields (dictionaries or Locators)
+    :param web_element: a web_element to search from
+    :raise TypeError: driver is not a web driver, fields is not a dictionary or
+            contains an invalid field
+    :raise KeyError: a field doesn't contain the expected keys
+    :raise ValueError: a field type is not one of the expected
+    :raise InvalidSelectorException: a field is not a valid CSS selector or XPath expression
+    :return: a dictionary of the same keys with the first found web element or None
+    """
+    if not isinstance(fields, dict):
+        log.error(f"{fields} is not a dictionary")
+        raise TypeError(f"{fields} is not a dictionary")
+    driver_validation(driver, log)
+    locators = {key: driver_field_validation(driver, field, log) for key, field in fields.items()}
+    web_element_validation(web_element, log)
+    if not locators:
+        return {}
+    elements = driver.execute_script(RESOLVE_MANY,
+                                     [[locator.type,
+                                       locator.value,
+                                       locator.text,
+                                       locator.match or MATCH_EXACT]
+                                      for locator in locators.values()],
+                                     web_element)
+    return resolved_fields(fields, elements)
+
+
+def resolved_fields(fields: dict, results: list) -> dict:
+    """
+    Map the fields keys to the RESOLVE_MANY script results
+    :param fields: the resolved dictionary of fields
+    :param results: the script results in the fields order
+    :raise InvalidSelectorException: a field is not a valid CSS selector or XPath expression
+    :return: a dictionary of the fields keys to the element found or None
+    """
+    resolved = dict(zip(fields.keys(), results))
+    invalid = {key: result["invalid"] for key, result in resolved.items()
+               if isinstance(result, dict) and "invalid" in result}
+    if invalid:
+        details = ", ".join(f"'{key}' {fields[key]}: {message}"
+                            for key, message in invalid.items())
+        log.error(f"Invalid selector for the fields {details}")
+        raise InvalidSelectorException(f"Invalid selector for the fields {details}")
+    return resolved
 
 
 def find_from_elements(driver=None,
                        field=None,
                        text=None,
                        web_element=None,
-                       avoid_move_to: bool = False) -> Union[WebElement, None]:
+                       avoid_move_to: bool = False,
+                       match: str = MATCH_EXACT) -> Union[WebElement, None]:
     """
-    Try to locate an element using his text
+    Try to locate an element using his text or value.
+    The matching is done in the browser in a single call whatever the number of candidates.
+    Matching modes are:
+    - exact: the text or the value is equal to the given text
+    - normalized: same as exact once the whitespaces are collapsed
+    - ignore_case: same as normalized without taking care of the case
+    - regex: the text or the value matches the given regular expression (javascript syntax)
     :param driver: a selenium web driver
     :param field: a dictionary
     :param text: a string
     :param web_element: a WebElement to search from
     :param avoid_move_to: avoid to move to the found element
+    :param match: the matching mode, one of MATCH_MODES. Defaulted to exact
     :raise AssertionError: from the finders.find_elements method
     :raise KeyError: from the finders.find_elements method
+    :raise ValueError: when the matching mode is unknown
     :raise NoSuchElementException: when no element is found
     :return: a selenium web element
     """
@@ -123,16 +190,12 @@ def find_from_elements(driver=None,
         raise AttributeError("text must be a string")
     if not text:
         raise ValueError("text must be non-empty")
+    if match not in MATCH_MODES:
+        log.error(f"The match mode is not one the expected: '{MATCH_MODES}'")
+        raise ValueError(f"The match mode is not one the expected: '{MATCH_MODES}'")
 
-    for element in elements:
-        if element.text == text:
-            log.debug(element.text)
-            return_element = element
-            break
-        if element.get_attribute("value") == text:
-            log.debug(element.get_attribute("value"))
-            return_element = element
-            break
+    if elements:
+        return_element = driver.execute_script(MATCH_TEXT, elements, text, match)
 
     if return_element is None:
         log.debug(f"Element designed by field '{field}' and text '{text}'"
@@ -1,22 +1,111 @@
 # -*- coding: utf-8 -*-
-from time import perf_counter
-
-import polling2
+import csv
+import json
+import os
+from collections import OrderedDict
+from time import perf_counter, sleep
 
 from typing import Union
 from logging import getLogger
 from selenium.webdriver.remote.webelement import WebElement
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementNotInteractableException, NoSuchElementException, \
     StaleElementReferenceException, \
-    TimeoutException
+    TimeoutException, WebDriverException
 
-from .drivers_tools import driver_field_validation, web_drivers_tuple, web_element_validation
-from .finders import find_element, find_elements
+from .cache import get_locator_cache
+from .deadlines import wait_budget
+from .drivers_tools import (driver_field_validation, driver_validation, move_to,
+                            web_drivers_tuple, web_element_validation)
+from .finders import find_element, resolve_many
+from .locators import MATCH_EXACT
+from .scripts import ADVANCE_TABULAR, SNAPSHOT, TABULAR, WAIT_FOR_FIELD
+from .windows import get_window_registry, window_registry
 
 log = getLogger(__name__)
 
+# The window polling backoff bounds in second
+WINDOW_POLL_FIRST = 0.05
+WINDOW_POLL_MAX = 0.5
+
+
+def __poll_field(driver, locator, web_element, until: float, displayed: bool):
+    # Polling is the fallback of the browser waits, import the helper on the first one
+    import polling2
+
+    def probe():
+        element = find_element(driver, locator, web_element, avoid_move_to=True)
+        if element is not None and (not displayed or element.is_displayed()):
+            return element
+        return None
+
+    try:
+        return polling2.poll(probe,
+                             ignore_exceptions=(NoSuchElementException,
+                                                StaleElementReferenceException,
+                                                ElementNotInteractableException),
+                             step=0.2,
+                             # polling2 polls forever with a null timeout
+                             timeout=max(until, 0.001))
+    except polling2.TimeoutException:
+        return None
+
+
+def wait_for_field(driver=None,
+                   field: dict = None,
+                   web_element: WebElement = None,
+                   until: float = 5,
+                   displayed: bool = False,
+                   avoid_move_to: bool = True,
+                   event_driven: bool = True) -> Union[WebElement, None]:
+    """
+    Wait for the field to exist, and to be displayed when asked.
+    The wait runs in the browser within a single driver command: a MutationObserver checks the
+    locator on each DOM change so that the element is returned as soon as it appears.
+    When the browser can't run the wait (asynchronous script error or timeout), the field is
+    polled every 200ms for the remaining time.
+    :param driver: a selenium web driver
+    :param field: a dictionary representing the web element to search
+    :param web_element: a web_element to search from
+    :param until: the wait time in second or a Deadline to draw from (see deadlines)
+    :param displayed: wait for the element to be displayed too
+    :param avoid_move_to: avoid to move to the found element
+    :param event_driven: False to poll the field every 200ms
+    :raise TypeError: driver isn't of the expected type
+    :return: the web element, None if not found in time
+    """
+    locator = driver_field_validation(driver, field, log)
+    web_element_validation(web_element, log)
+    with wait_budget(driver, until, "wait_for_field") as until:
+        start = perf_counter()
+        cache = get_locator_cache(driver)
+        element = None
+        if cache is not None and not displayed:
+            element = cache.get(driver, locator, web_element)
+        if element is None and event_driven:
+            try:
+                element = driver.execute_async_script(WAIT_FOR_FIELD,
+                                                      web_element,
+                                                      [locator.type,
+                                                       locator.value,
+                                                       locator.text,
+                                                       locator.match or MATCH_EXACT],
+                                                      displayed,
+                                                      int(until * 1000))
+            except WebDriverException as exception:
+                log.debug(f"The browser could not wait for '{field}', poll it instead. "
+                          f"Get {exception.msg}")
+                element = __poll_field(driver, locator, web_element,
+                                       until - (perf_counter() - start), displayed)
+        elif element is None:
+            element = __poll_field(driver, locator, web_element, until, displayed)
+    if element is None:
+        return None
+    if cache is not None:
+        cache.put(driver, locator, web_element, element)
+    if not avoid_move_to:
+        move_to(driver, element, f"Wait for field: {field}")
+    return element
+
 
 def is_field_exist(driver=None,
                    field: dict = None,
@@ -25,6 +114,8 @@ def is_field_exist(driver=None,
                    avoid_move_to: bool = False) -> Union[WebElement, None]:
     """
     Test if the field given as a {"type":"id","value":"toto"} dictionary exists.
+    The element is returned as soon as it appears in the DOM (see wait_for_field).
+    To test several fields at once, use are_fields_exist.
     :param avoid_move_to:
     :param driver: a selenium web driver
     :param field: a dictionary representing the web element to search
@@ -33,20 +124,48 @@ def is_field_exist(driver=None,
     :raise TypeError: driver isn't of the expected type
     :return: a web element if exist, None otherwise
     """
-    try:
-        driver_field_validation(driver, field, log)
-        web_element_validation(web_element, log)
+    element = wait_for_field(driver, field, web_element, until=until,
+                             avoid_move_to=avoid_move_to)
+    if element is None:
+        log.info(f"information.is_field_exist raised a TimeoutException for "
+                 f"the following field '{field}'")
+    return element
 
-        return polling2.poll(lambda: find_element(driver, field, web_element, avoid_move_to),
-                             ignore_exceptions=(NoSuchElementException,
-                                                StaleElementReferenceException),
-                             step=0.2,
-                             timeout=until)
 
+def are_fields_exist(driver=None,
+                     fields: dict = None,
+                     web_element: WebElement = None,
+                     until: int = 5) -> dict:
+    """
+    Test if all the fields of a dictionary exist. Each poll resolves all the fields in a single
+    browser call (see finders.resolve_many). Elements are not moved to.
+    :param driver: a selenium web driver
+    :param fields: a dictionary of fields
+    :param web_element: a web_element to search from
+    :param until: an int as the wait time in second
+    :raise TypeError: driver isn't of the expected type
+    :raise InvalidSelectorException: a field is not a valid CSS selector or XPath expression
+    :return: a dictionary of the fields keys to the web element or None when not found
+    """
+    # Polling is the fallback of the browser waits, import the helper on the first one
+    import polling2
+
+    found = {}
+
+    def all_found():
+        found.update(resolve_many(driver, fields, web_element))
+        return all(element is not None for element in found.values())
+
+    try:
+        with wait_budget(driver, until, "are_fields_exist") as until:
+            polling2.poll(all_found,
+                          ignore_exceptions=(StaleElementReferenceException,),
+                          step=0.2,
+                          timeout=max(until, 0.001))
     except polling2.TimeoutException:
-        log.info(f"information.is_field_exist raised a TimeoutException for "
-                 f"the following field '{field}'")
-        return None
+        log.info(f"information.are_fields_exist raised a TimeoutException for the following "
+                 f"fields '{[key for key, element in found.items() if element is None]}'")
+    return found
 
 
 def is_field_contains_text(driver=None,
@@ -72,9 +191,9 @@ def is_field_contains_text(driver=None,
     if element is None:
         log.warning(f"Cannot find the element {field} to check the text from")
         return False
-    return (element.text is not None and text in element.text) or (
-            element.get_attribute("value") is not None
-            and text in element.get_attribute("value"))
+    snapshot = element_snapshot(driver, element=element)
+    return (snapshot.text is not None and text in snapshot.text) or (
+            snapshot.value is not None and text in snapshot.value)
 
 
 def is_alert_present(driver=None, until: int = 5):
@@ -84,14 +203,78 @@ def is_alert_present(driver=None, until: int = 5):
     :param until: time to wait.
     :return: True or False.
     """
+    # The wait module loads the whole remote web driver, only import it when needed
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
-        driver_field_validation(driver, {"type": "id", "value": "fake"}, log)
-        if WebDriverWait(driver, until).until(EC.alert_is_present()):
-            return True
+        driver_validation(driver, log)
+        with wait_budget(driver, until, "is_alert_present") as until:
+            if WebDriverWait(driver, until).until(EC.alert_is_present()):
+                return True
     except TimeoutException:
         return False
 
 
+class ElementSnapshot:
+    """The state of an element read in a single browser call (see element_snapshot)"""
+    __slots__ = ("element", "text", "value", "displayed", "enabled", "checked", "selected",
+                 "rect", "in_viewport", "viewport_ratio", "attributes")
+
+    def __init__(self, element: WebElement, text: str, value: Union[str, None],
+                 displayed: bool, enabled: bool, checked: bool, selected: bool, rect: list,
+                 in_viewport: bool, viewport_ratio: float, attributes: dict):
+        self.element = element
+        self.text = text
+        self.value = value
+        self.displayed = displayed
+        self.enabled = enabled
+        self.checked = checked
+        self.selected = selected
+        self.rect = dict(zip(("x", "y", "width", "height"), rect))
+        self.in_viewport = in_viewport
+        self.viewport_ratio = viewport_ratio
+        self.attributes = attributes
+
+    def __repr__(self):
+        return (f"ElementSnapshot(text={self.text!r}, value={self.value!r}, "
+                f"displayed={self.displayed}, enabled={self.enabled}, checked={self.checked}, "
+                f"selected={self.selected}, rect={self.rect}, in_viewport={self.in_viewport})")
+
+
+def element_snapshot(driver=None,
+                     field: dict = None,
+                     web_element: WebElement = None,
+                     attributes: tuple = (),
+                     element: WebElement = None) -> Union[ElementSnapshot, None]:
+    """
+    Read the text, value, display, enabled, checked and selected states, rectangle, viewport
+    intersection and attributes of an element in a single browser call, the look up included.
+    :param driver: a selenium web driver
+    :param field: a dictionary representing the web element to search
+    :param web_element: a web_element to search from
+    :param attributes: the names of the attributes to read
+    :param element: the web element to read instead of searching the field
+    :raise TypeError: driver or field isn't of the expected type
+    :return: an ElementSnapshot, None if the element is not found
+    """
+    if element is None:
+        locator = driver_field_validation(driver, field, log)
+        web_element_validation(web_element, log)
+        cache = get_locator_cache(driver)
+        if cache is not None:
+            element = cache.get(driver, locator, web_element)
+        arguments = (element, None if element is not None else [
+            locator.type, locator.value, locator.text, locator.match or MATCH_EXACT])
+    else:
+        driver_validation(driver, log)
+        arguments = (element, None)
+    state = driver.execute_script(SNAPSHOT, *arguments, web_element, list(attributes))
+    if state is None:
+        return None
+    return ElementSnapshot(*state)
+
+
 def element_text(driver=None,
                  field: dict = None,
                  web_element: WebElement = None,
@@ -107,15 +290,16 @@ def element_text(driver=None,
     :raise Exception: if text and value are defined but not identical
     :return: the element text or value, empty if no text or value
     """
-    element = find_element(driver=driver,
-                           field=field,
-                           web_element=web_element,
-                           avoid_move_to=avoid_move_to)
-    if element is None:
+    snapshot = element_snapshot(driver=driver,
+                                field=field,
+                                web_element=web_element)
+    if snapshot is None:
         log.warning(f"Cannot find the element {field} to retrieve the text from")
         return None
-    element_text_ = element.text
-    element_value = element.get_attribute("value")
+    if not avoid_move_to:
+        move_to(driver, snapshot.element, f"Element text: {field}")
+    element_text_ = snapshot.text
+    element_value = snapshot.value
 
     if element_text_ and not element_value:
         return element_text_
@@ -138,8 +322,11 @@ def how_many_windows(driver=None):
     :param driver: a selenium web driver
     :return: the number of windows
     """
-    driver_field_validation(driver, {"type": "id", "value": "fake"}, log)
-    return len(driver.window_handles)
+    driver_validation(driver, log)
+    registry = get_window_registry(driver)
+    if registry is None:
+        return len(driver.window_handles)
+    return len(registry.handles())
 
 
 def is_field_displayed(driver=None,
@@ -153,29 +340,19 @@ def is_field_displayed(driver=None,
     :param field: a dictionary corresponding to the field to retrieve the text
     :param web_element: a webElement to search the field from
     :param avoid_move_to: Avoid to move into view the WebElement
-    :param wait_until: The default wait field existence and display
+    :param wait_until: The wait of the field existence and display in second or a Deadline
     :return: Boolean. True if element is displayed, false otherwise.
     """
-    element = is_field_exist(driver=driver,
+    element = wait_for_field(driver=driver,
                              field=field,
                              web_element=web_element,
-                             avoid_move_to=avoid_move_to,
-                             until=wait_until)
+                             until=wait_until,
+                             displayed=True,
+                             avoid_move_to=avoid_move_to)
     if element is None:
-        log.info(f"Element '{field}' doesn't exist in the DOM")
-        return False
-    try:
-        polling2.poll(lambda: element.is_displayed(),
-                      step=0.2,
-                      timeout=wait_until,
-                      ignore_exceptions=(NoSuchElementException,
-                                         StaleElementReferenceException,
-                                         ElementNotInteractableException)
-                      )
-        return True
-    except polling2.TimeoutException:
-        log.info(f"Element '{field}' is not displayed")
+        log.info(f"Element '{field}' doesn't exist in the DOM or is not displayed")
         return False
+    return True
 
 
 def is_field_in_viewport(driver=None,
@@ -188,18 +365,11 @@ def is_field_in_viewport(driver=None,
     :param web_element: a web_element to search from
     :return: Boolean. True if element is in the viewport
     """
-    element = find_element(driver, field, web_element, avoid_move_to=True)
-    # Element location
-    element_rect = element.rect
-    viewport = driver.execute_script('return [window.pageYOffset, window.pageXOffset, '
-                                     'document.documentElement.clientWidth, '
-                                     'document.documentElement.clientHeight]')
-
-    return all((viewport[1] <= element_rect["x"],
-                viewport[1] + viewport[2] >= element_rect["x"] + element_rect["width"],
-                viewport[0] <= element_rect["y"],
-                viewport[0] + viewport[3] >= element_rect["y"] + element_rect["height"])
-               )
+    snapshot = element_snapshot(driver, field, web_element)
+    if snapshot is None:
+        log.warning(f"Cannot find the element {field} to check its position")
+        return False
+    return snapshot.in_viewport
 
 
 def is_field_enabled(driver=None,
@@ -229,7 +399,7 @@ def is_field_enabled(driver=None,
     if attribute is not None:
         return element.get_attribute(attribute)
     else:
-        return element.is_enabled()
+        return element_snapshot(driver, element=element).enabled
 
 
 def where_am_i(driver=None):
@@ -267,63 +437,270 @@ def is_checkbox_checked(driver=None,
                              until=wait_until)
     if element is None:
         log.warning(f"Element {field} not found")
+        return False
     if is_angular:
-        return bool(element.get_attribute("ng-reflect-checked"))
+        snapshot = element_snapshot(driver, element=element, attributes=("ng-reflect-checked",))
+        return bool(snapshot.attributes["ng-reflect-checked"])
     else:
-        return bool(element.get_attribute("checked"))
+        return element_snapshot(driver, element=element).checked
+
+
+def tabular_records(header: int, rows: list, as_dict: bool = False) -> list:
+    """
+    Shape the rows serialized by the scripts.TABULAR script
+    :param header: the header row index, -1 without header
+    :param rows: the rows of cells text
+    :param as_dict: return the rows following the header as dictionaries keyed by the header
+    :return: list
+    """
+    if not as_dict:
+        return rows
+    if header < 0:
+        log.warning("The tabular has no header row, rows are returned as lists")
+        return rows
+    return [dict(zip(rows[header], row)) for row in rows[header + 1:]]
 
 
 def retrieve_tabular(driver=None,
                      field=None,
                      web_element=None,
-                     row_and_col=("tr", "td", "th")) -> Union[list, None]:
+                     row_and_col=("tr", "td", "th"),
+                     text_source: str = "innerText",
+                     expand_spans: bool = False,
+                     as_dict: bool = False) -> Union[list, None]:
     """
     Return the tabular as a list of elements.
     Elements are either lists or dictionaries depending on the presence of headers
+    The tabular is serialized by the browser in a single call.
     :param driver: a selenium web driver
     :param field: a dictionary representing the web element to search
     :param web_element: a web_element to search from
     :param row_and_col: a tuple of row and col tags plus header tag. Defaulted to ('tr', 'td',
     'th').
      Please mind the order. ROW, COL, COL HEADER
+    :param text_source: the cells text, 'innerText' (rendered text, default) or 'textContent'
+    :param expand_spans: repeat the text of the cells spanning several rows or columns
+    :param as_dict: return the rows as dictionaries keyed by the header row when detected
+            (first row in a thead or only made of header cells)
     :return: list
     """
+    if text_source not in ("innerText", "textContent"):
+        log.error(f"Unknown text source. Get {text_source} instead of "
+                  f"('innerText', 'textContent')")
+        raise ValueError(f"Unknown text source. Get {text_source} instead of "
+                         f"('innerText', 'textContent')")
     tabular = find_element(driver, field, web_element=web_element)
     if tabular is None:
         log.warning(f"Tabular {field} has not been found")
         return tabular
-    # rows = tabular.find_elements_by_tag_name(row_and_col[0])
-    rows = find_elements(driver,
-                         {"type": "tag_name", "value": row_and_col[0]},
-                         tabular)
-    tabular_as_list = []
-
-    for row in rows:
-        # columns = row.find_elements_by_tag_name(row_and_col[1])
-        columns = find_elements(driver,
-                                {"type": "tag_name", "value": row_and_col[1]},
-                                row)
-        if not columns:
-            columns = find_elements(driver,
-                                    {"type": "tag_name", "value": row_and_col[2]},
-                                    row)
-        tabular_as_list.append([column.text for column in columns])
-
-    return tabular_as_list
-
-
-def wait_for_another_window(driver, until: int = 1) -> bool:
+    header, rows = driver.execute_script(TABULAR, tabular, list(row_and_col),
+                                         {"text": text_source, "expand": expand_spans})
+    return tabular_records(header, rows, as_dict)
+
+
+def __tabular_writer(output: str, output_format: str = None):
+    """Return a function writing a batch of rows to the output file and the opened file"""
+    output_format = (output_format or os.path.splitext(output)[1].lstrip(".")).casefold()
+    if output_format not in ("csv", "jsonl"):
+        log.error(f"Unknown output format. Get {output_format} instead of ('csv', 'jsonl')")
+        raise ValueError(f"Unknown output format. Get {output_format} instead of "
+                         f"('csv', 'jsonl')")
+    file = open(output, "w", encoding="utf-8", newline="")
+    if output_format == "jsonl":
+        def write(rows: list, header: Union[list, None]):
+            file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        return write, file
+    writer = csv.writer(file)
+    written_header = []
+
+    def write(rows: list, header: Union[list, None]):
+        if header is not None and not written_header:
+            writer.writerow(header)
+            written_header.append(True)
+        writer.writerows(row.values() if isinstance(row, dict) else row for row in rows)
+    return write, file
+
+
+def iter_tabular(driver=None,
+                 field=None,
+                 web_element=None,
+                 scroll_container=None,
+                 next_page=None,
+                 key_column: Union[int, str, None] = None,
+                 row_index: Union[str, None] = "aria-rowindex",
+                 row_and_col=("tr", "td", "th"),
+                 text_source: str = "innerText",
+                 expand_spans: bool = False,
+                 as_dict: bool = False,
+                 dedupe_window: int = 10000,
+                 max_idle: int = 2,
+                 settle_timeout: float = 5,
+                 output: str = None,
+                 output_format: str = None):
+    """
+    Yield the rows of a virtualized or paginated tabular batch by batch.
+    Each step serializes the rendered rows in a single call, yields the new ones, then scrolls
+    the container by its height and/or clicks the next page button and waits for the document
+    to settle. Header rows are not yielded.
+    Rows are deduplicated by their key column when set, by their row index attribute otherwise
+    (the aria-rowindex of virtualized grids), within the last dedupe_window keys, so that the
+    memory used stays bounded whatever the tabular length. Rows having the same content are
+    different rows: rows without key, too short to have the key column or without row index,
+    are never deduplicated. A virtualized tabular then yields again the rows still rendered
+    after a scroll: give it a key column. The iteration stops when max_idle
+    steps in a row bring no new row, when the container can't scroll and the document doesn't
+    change or when the next page button is missing or disabled.
+    :param driver: a selenium web driver
+    :param field: a dictionary representing the tabular
+    :param web_element: a web_element to search the tabular, container and button from
+    :param scroll_container: a dictionary representing the scrolling element of a virtualized
+            tabular
+    :param next_page: a dictionary representing the next page button of a paginated tabular
+    :param key_column: the index or header name of the column identifying the rows, None
+            (default) to use the row index attribute
+    :param row_index: the row attribute holding the row index in the whole tabular, None to
+            deduplicate on the key column only
+    :param row_and_col: a tuple of row and col tags plus header tag (see retrieve_tabular)
+    :param text_source: the cells text, 'innerText' (rendered text, default) or 'textContent'
+    :param expand_spans: repeat the text of the cells spanning several rows or columns
+    :param as_dict: yield the rows as dictionaries keyed by the header row when detected
+    :param dedupe_window: the number of last keys remembered to deduplicate the rows
+    :param max_idle: the number of steps without new row before stopping
+    :param settle_timeout: the maximum wait in second for the document to settle on each step
+    :param output: a .csv or .jsonl file path streamed the rows as they are yielded
+    :param output_format: 'csv' or 'jsonl', default to the output extension
+    :raise NoSuchElementException: the tabular has not been found on the first step
+    :raise ValueError: unknown text source or output format
+    :raise KeyError: the key column is a name missing from the header
+    :return: a generator of lists of rows
+    """
+    if text_source not in ("innerText", "textContent"):
+        log.error(f"Unknown text source. Get {text_source} instead of "
+                  f"('innerText', 'textContent')")
+        raise ValueError(f"Unknown text source. Get {text_source} instead of "
+                         f"('innerText', 'textContent')")
+    fields = {"tabular": field}
+    if scroll_container is not None:
+        fields["container"] = scroll_container
+    if next_page is not None:
+        fields["next_page"] = next_page
+    write, file = (None, None) if output is None else __tabular_writer(output, output_format)
+    seen = OrderedDict()
+    names = None
+    idle = 0
+    first = True
+    try:
+        while True:
+            elements = resolve_many(driver, fields, web_element)
+            if elements["tabular"] is None:
+                if first:
+                    log.error(f"Tabular {field} has not been found")
+                    raise NoSuchElementException(f"Tabular {field} has not been found")
+                log.info(f"Tabular {field} is gone, stop the iteration")
+                return
+            header, rows, *indexes = driver.execute_script(
+                TABULAR, elements["tabular"], list(row_and_col),
+                {"text": text_source, "expand": expand_spans,
+                 "index": None if key_column is not None else row_index})
+            indexes = indexes[0] if indexes else [None] * len(rows)
+            first = False
+            if header >= 0:
+                names = names or rows[header]
+                del rows[header]
+                del indexes[header]
+            index = key_column
+            if isinstance(key_column, str):
+                if names is None or key_column not in names:
+                    log.error(f"The key column '{key_column}' is not in the header {names}")
+                    raise KeyError(f"The key column '{key_column}' is not in the header {names}")
+                index = names.index(key_column)
+            batch = []
+            for row, row_key in zip(rows, indexes):
+                if index is None:
+                    key = row_key
+                else:
+                    key = row[index] if index < len(row) else None
+                if key is not None:
+                    if key in seen:
+                        seen.move_to_end(key)
+                        continue
+                    seen[key] = None
+                    if len(seen) > dedupe_window:
+                        seen.popitem(last=False)
+                batch.append(dict(zip(names, row)) if as_dict and names is not None else row)
+            if batch:
+                idle = 0
+                if write is not None:
+                    write(batch, names)
+                yield batch
+            else:
+                idle += 1
+                if idle >= max_idle:
+                    return
+            if scroll_container is None and next_page is None:
+                return
+            if elements.get("container") is None and elements.get("next_page") is None:
+                log.info("No scroll container nor next page button, stop the iteration")
+                return
+            scrolled, mutated = driver.execute_async_script(
+                ADVANCE_TABULAR, elements.get("container"), elements.get("next_page"),
+                int(settle_timeout * 1000))
+            if not scrolled and not mutated:
+                return
+    finally:
+        if file is not None:
+            file.close()
+
+
+def export_tabular(driver=None, field=None, output: str = None, **options) -> int:
+    """
+    Stream all the rows of a virtualized or paginated tabular to a CSV or JSONL file
+    :param driver: a selenium web driver
+    :param field: a dictionary representing the tabular
+    :param output: a .csv or .jsonl file path
+    :param options: the iter_tabular parameters
+    :return: the number of rows written
+    """
+    return sum(len(batch) for batch in iter_tabular(driver, field, output=output, **options))
+
+
+def wait_for_another_window(driver,
+                            until: int = 1,
+                            count: int = 2,
+                            url: str = None,
+                            title: str = None) -> bool:
     """Wait for another window for at most 'until' seconds
+    The windows are read from the window registry of the session (see windows). They are
+    checked on each window creation or page load when the driver has a BiDi connection
+    (webSocketUrl capability), otherwise they are polled with an exponential backoff from 50ms
+    to 500ms: the driver is not flooded with commands. Only the new, loading and blank
+    windows are read while waiting, all of them once more when the time is over.
         :param driver: ta selenium web driver
-        :param until: the maximum duration to wait
+        :param until: the maximum duration to wait or a Deadline
+        :param count: the number of windows to wait for
+        :param url: a regular expression to search in the URL of one of the windows
+        :param title: the exact title of one of the windows
         :return True if another windows pops in the duration False otherwise
         """
     try:
-        start = perf_counter()
-        under_max_time = True
-        while len(driver.window_handles) == 1 and under_max_time:
-            if int(perf_counter() - start) > until:
-                under_max_time = False
-        return under_max_time
+        with wait_budget(driver, until, "wait_for_another_window") as until:
+            end = perf_counter() + until
+            with window_registry(driver, events=True) as registry:
+                step = WINDOW_POLL_FIRST
+                while True:
+                    remaining = end - perf_counter()
+                    if len(registry.handles()) >= count and (
+                            (url is None and title is None)
+                            or registry.find(title, url, full=remaining <= 0)):
+                        return True
+                    if remaining <= 0:
+                        return False
+                    if not registry.event_driven:
+                        sleep(min(step, remaining))
+                    else:
+                        # Events don't cover everything, a title change for instance
+                        registry.changed.wait(min(WINDOW_POLL_MAX, remaining))
+                        registry.changed.clear()
+                    step = min(step * 2, WINDOW_POLL_MAX)
     except Exception as exception:
         log.error(f"Retrieve the following error:\n {exception.args}")
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Web driver command instrumentation.
+
+Each toolbox function sends one or more commands to the web driver. The Instrumentation wraps
+the command executor of a driver and records the number and latency histogram of the commands
+per WebDriver command (findElement, executeScript...) and per calling toolbox function
+(find_element, move_to, retrieve_tabular...). The calling function is the innermost toolbox
+function on the call stack: the findElement command click_element sends through find_element
+is counted for find_element.
+
+Nothing is wrapped until the instrumentation is installed: a driver without instrumentation
+runs at full speed. Stats are given as a dictionary, a JSON document or the Prometheus text
+format.
+"""
+import json
+import os
+import sys
+import threading
+from logging import getLogger
+from time import perf_counter
+
+log = getLogger(__name__)
+
+# Latency histogram upper bounds in second
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Commands sent from outside the toolbox
+DIRECT = "(direct)"
+OUTPUT_FORMATS = ("json", "prom")
+
+_PACKAGE = __name__.rsplit(".", 1)[0] + "."
+# Modules whose frames are not toolbox functions
+_SKIPPED = {__name__, _PACKAGE + "browserServer", _PACKAGE + "asyncBrowserServer"}
+
+
+class _Histogram:
+    """Count, total, max and bucket counts of durations in second"""
+    __slots__ = ("count", "total", "max", "errors", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, duration: float, failed: bool):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.errors += failed
+        for index, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def cumulated(self) -> list:
+        """Return the (upper bound, count of durations below) pairs, '+Inf' bound last"""
+        total, result = 0, []
+        for bound, count in zip(BUCKETS + ("+Inf",), self.buckets):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self) -> dict:
+        return {"count": self.count,
+                "total": self.total,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+                "errors": self.errors,
+                "buckets": {str(bound): count for bound, count in self.cumulated()}}
+
+
+def calling_function(depth: int = 2) -> str:
+    """
+    Return the innermost toolbox function of the call stack, the closures being counted for
+    their enclosing function, and the private functions for their caller
+    :param depth: the number of frames to skip
+    :return: the function qualified name or DIRECT
+    """
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(_PACKAGE) and module not in _SKIPPED:
+            name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+            name = name.split(".<locals>", 1)[0]
+            if not name.rsplit(".", 1)[-1].startswith("_"):
+                return name
+        frame = frame.f_back
+    return DIRECT
+
+
+class Instrumentation:
+    """
+    Count and time the commands sent to a web driver.
+    One instance serves one web driver session.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__commands = {}
+        self.__functions = {}
+        self.__executor = None
+        self.__wrapper = None
+        self.__previous = None
+
+    @property
+    def installed(self) -> bool:
+        return self.__executor is not None
+
+    def install(self, driver) -> int:
+        """
+        Wrap the driver command executor. An instrumentation wraps one driver at a time
+        :param driver: a selenium web driver
+        :return: 0 if success
+        """
+        self.uninstall()
+        executor = driver.command_executor
+        execute = executor.execute
+
+        def instrumented(command, params):
+            if self.__wrapper is not instrumented:
+                # Uninstalled but still wrapped by another executor wrapper
+                return execute(command, params)
+            function = calling_function()
+            start = perf_counter()
+            failed = True
+            try:
+                response = execute(command, params)
+                failed = isinstance(response, dict) and isinstance(response.get("status"), int) \
+                    and response["status"] >= 400
+                return response
+            finally:
+                self.record(command, function, perf_counter() - start, failed)
+
+        # The instance attribute shadows the executor method until uninstalled
+        self.__previous = executor.__dict__.get("execute")
+        executor.execute = self.__wrapper = instrumented
+        self.__executor = executor
+        return 0
+
+    def uninstall(self) -> int:
+        """Give the executor its previous method back. The stats are kept"""
+        executor = self.__executor
+        if executor is not None:
+            if executor.__dict__.get("execute") is self.__wrapper:
+                if self.__previous is None:
+                    del executor.execute
+                else:
+                    executor.execute = self.__previous
+            else:
+                log.debug("The command executor has been wrapped since, keep forwarding")
+            self.__executor = self.__wrapper = self.__previous = None
+        return 0
+
+    def record(self, command: str, function: str, duration: float, failed: bool = False):
+        with self.__lock:
+            histogram = self.__commands.get(command)
+            if histogram is None:
+                histogram = self.__commands[command] = _Histogram()
+            histogram.add(duration, failed)
+            entry = self.__functions.get(function)
+            if entry is None:
+                entry = self.__functions[function] = (_Histogram(), {})
+            entry[0].add(duration, failed)
+            entry[1][command] = entry[1].get(command, 0) + 1
+
+    def reset(self):
+        with self.__lock:
+            self.__commands.clear()
+            self.__functions.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the commands stats per WebDriver command and per calling toolbox function:
+        count, total, mean and max latency in second, errors and cumulated histogram buckets.
+        Each function also gives its number of commands by WebDriver command.
+        """
+        with self.__lock:
+            functions = {}
+            for function, (histogram, commands) in self.__functions.items():
+                functions[function] = histogram.as_dict()
+                functions[function]["commands"] = dict(commands)
+            return {"commands": {command: histogram.as_dict()
+                                 for command, histogram in self.__commands.items()},
+                    "functions": functions}
+
+    def to_prometheus(self, prefix: str = "eaiautomatontools") -> str:
+        """Return the latency histograms in the Prometheus text exposition format"""
+        lines = []
+        with self.__lock:
+            for label, histograms in (
+                    ("command", self.__commands),
+                    ("function", {key: value[0] for key, value in self.__functions.items()})):
+                name = f"{prefix}_{label}_seconds"
+                lines.append(f"# HELP {name} WebDriver commands latency by {label}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in histograms.items():
+                    key = key.replace("\\", "\\\\").replace('"', '\\"')
+                    for bound, count in histogram.cumulated():
+                        lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.total}')
+                    lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, output: str, output_format: str = None) -> int:
+        """
+        Write the stats to a file
+        :param output: the file path
+        :param output_format: 'json' or 'prom' (Prometheus text format), default to the output
+                extension
+        :raise ValueError: the output format is unknown
+        :return: 0 if success
+        """
+        output_format = (output_format or os.path.splitext(output)[1].lstrip(".")).casefold()
+        if output_format not in OUTPUT_FORMATS:
+            log.error(f"Unknown output format. Get {output_format} instead of {OUTPUT_FORMATS}")
+            raise ValueError(f"Unknown output format. Get {output_format} instead of "
+                             f"{OUTPUT_FORMATS}")
+        with open(output, "w", encoding="utf-8") as file:
+            if output_format == "json":
+                json.dump(self.stats(), file, indent=2)
+            else:
+                file.write(self.to_prometheus())
+        return 0
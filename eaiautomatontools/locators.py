@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Locators describe how to find a web element.
+
+The toolbox historically uses dictionaries such as {"type": "id", "value": "name"}.
+A Locator holds the same data but is validated and resolved to its selenium By strategy
+once, when created. The toolbox functions accept both and skip the validation for Locators.
+
+The LocatorRegistry loads page-object files (JSON or YAML) into Locators at startup.
+"""
+import json
+from collections.abc import Mapping
+from logging import getLogger
+from pathlib import Path
+from typing import Iterator, Union
+
+from selenium.webdriver.common.by import By
+
+log = getLogger(__name__)
+
+BY_SWITCHER = {
+        "id": By.ID,
+        "name": By.NAME,
+        "class_name": By.CLASS_NAME,
+        "css": By.CSS_SELECTOR,
+        "link_text": By.LINK_TEXT,
+        "partial_link_text": By.PARTIAL_LINK_TEXT,
+        "tag_name": By.TAG_NAME,
+        "xpath": By.XPATH
+    }
+
+FIELD_TYPES = ("id",
+               "name",
+               "class_name",
+               "link_text",
+               "css",
+               "partial_link_text",
+               "xpath",
+               "tag_name")
+
+MATCH_EXACT = "exact"
+MATCH_NORMALIZED = "normalized"
+MATCH_IGNORE_CASE = "ignore_case"
+MATCH_REGEX = "regex"
+MATCH_MODES = (MATCH_EXACT, MATCH_NORMALIZED, MATCH_IGNORE_CASE, MATCH_REGEX)
+
+
+class Locator(Mapping):
+    """
+    Immutable and validated field description.
+    It behaves as a read-only field dictionary so that it can be used wherever a field is.
+    """
+    __slots__ = ("type", "value", "text", "match", "by")
+
+    def __init__(self, type: str, value: str, text: str = None, match: str = None):  # noqa
+        if type not in BY_SWITCHER:
+            log.error(f"The field type is not one the expected: '{FIELD_TYPES}")
+            raise ValueError(f"The field type is not one the expected: '{FIELD_TYPES}")
+        if match is not None and match not in MATCH_MODES:
+            log.error(f"The match mode is not one the expected: '{MATCH_MODES}'")
+            raise ValueError(f"The match mode is not one the expected: '{MATCH_MODES}'")
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "text", text)
+        object.__setattr__(self, "match", match)
+        object.__setattr__(self, "by", BY_SWITCHER[type])
+
+    @classmethod
+    def from_field(cls, field) -> "Locator":
+        """
+        Build a Locator from a field dictionary. A Locator is returned as is.
+        :param field: a dictionary with at least the 'type' and 'value' keys
+        :raise TypeError: field is neither a dictionary nor a Locator
+        :raise KeyError: field doesn't contain the 'type' or 'value' key
+        :raise ValueError: field type or match mode is unknown
+        :return: a Locator
+        """
+        if isinstance(field, Locator):
+            return field
+        if not isinstance(field, dict):
+            log.error(f"{field} is not a dictionary")
+            raise TypeError(f"{field} is not a dictionary")
+        if any(key not in field.keys() for key in ("type", "value")):
+            log.error("The field argument doesn't contains either the 'type' or 'value' key.")
+            raise KeyError("The field argument doesn't contains either the 'type' or 'value' key.")
+        return cls(field["type"], field["value"], field.get("text"), field.get("match"))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Locator is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError("Locator is immutable")
+
+    def __reduce__(self):
+        return Locator, (self.type, self.value, self.text, self.match)
+
+    # Read-only field dictionary behaviour
+    def __getitem__(self, key):
+        if key in ("type", "value") or (key in ("text", "match")
+                                        and getattr(self, key) is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield "type"
+        yield "value"
+        if self.text is not None:
+            yield "text"
+        if self.match is not None:
+            yield "match"
+
+    def __len__(self) -> int:
+        return 2 + (self.text is not None) + (self.match is not None)
+
+    def __hash__(self):
+        return hash((self.type, self.value, self.text, self.match))
+
+    def __eq__(self, other):
+        if isinstance(other, Locator):
+            return (self.type, self.value, self.text, self.match) == (
+                other.type, other.value, other.text, other.match)
+        return super().__eq__(other)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LocatorRegistry:
+    """
+    Named Locators, usually loaded from a page-object file.
+
+    The file is a mapping of names to fields. Fields can be grouped by page:
+    {"login": {"username": {"type": "id", "value": "name"}, ...}, ...}
+    Grouped fields are reachable using a dotted name i.e. "login.username" or as a page
+    dictionary which can be used as the fields of fill_elements.
+    """
+
+    def __init__(self, locators: dict = None):
+        self.__locators = {}
+        if locators is not None:
+            self.update(locators)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LocatorRegistry":
+        """
+        Load a JSON or YAML page-object file
+        :param path: the file path. '.yaml' and '.yml' files need PyYAML
+        :raise ImportError: a YAML file is given while PyYAML is not installed
+        :return: a LocatorRegistry
+        """
+        path = Path(path)
+        with open(path, encoding="utf-8") as file:
+            if path.suffix.casefold() in (".yaml", ".yml"):
+                try:
+                    import yaml
+                except ImportError:
+                    log.error("PyYAML is required in order to load YAML page-object files")
+                    raise
+                content = yaml.safe_load(file)
+            else:
+                content = json.load(file)
+        return cls(content or {})
+
+    def update(self, locators: dict, prefix: str = ""):
+        """
+        Add the fields in the registry. Fields are validated here.
+        :param locators: a mapping of names to fields or to nested mappings
+        :param prefix: the dotted name prefix of the given mapping
+        """
+        for name, content in locators.items():
+            full_name = f"{prefix}{name}"
+            if isinstance(content, Locator) or (isinstance(content, dict)
+                                                and isinstance(content.get("type"), str)):
+                self.__locators[full_name] = Locator.from_field(content)
+            elif isinstance(content, dict):
+                self.update(content, prefix=f"{full_name}.")
+            else:
+                raise TypeError(f"'{full_name}' is neither a field nor a group of fields")
+
+    def page(self, name: str) -> dict:
+        """
+        Return the Locators grouped under the name
+        :param name: the page (group) dotted name
+        :raise KeyError: no Locator in the group
+        :return: a dictionary of short names to Locators
+        """
+        prefix = f"{name}."
+        page = {key[len(prefix):]: locator for key, locator in self.__locators.items()
+                if key.startswith(prefix)}
+        if not page:
+            raise KeyError(f"No locator registered under '{name}'")
+        return page
+
+    def items(self):
+        """Dotted names and Locators pairs"""
+        return self.__locators.items()
+
+    def __getitem__(self, name: str) -> Union[Locator, dict]:
+        if name in self.__locators:
+            return self.__locators[name]
+        return self.page(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__locators
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__locators)
+
+    def __len__(self) -> int:
+        return len(self.__locators)
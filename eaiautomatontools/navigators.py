@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 from logging import getLogger
+
+from selenium.common.exceptions import WebDriverException
+
+from .cache import get_locator_cache
 from .finders import find_element
 from .drivers_tools import web_drivers_tuple
+from .scripts import CLEAR_STORAGE
+from .windows import window_registry
 """
 The navigators tool box purpose is to provide some limited but heavy used methods
 in order to browse to URL and navigate from browser tabs or windows.
@@ -42,36 +48,94 @@ def enter_frame(driver=None, field=None, web_element=None):
     return 0
 
 
-def go_to_window(driver=None, handle=None, title=None):
+def go_to_window(driver=None, handle=None, title=None, url=None, opener=None):
     """
-    Switch to a window either giving the handle or the window's title.
+    Switch to a window either giving the handle or the window's title, URL or opener.
+    The window is looked up in the window registry of the session (see windows) without
+    switching through the windows.
     :param driver: a selenium web driver
     :param handle: a window's reference as a string
     :param title: a window's title as a string
-    :raise Exception: The number of window with the title is different from 1.
+    :param url: a regular expression searched in the window's URL
+    :param opener: the handle of the window which opened the window
+    :raise Exception: The number of window matching is different from 1.
     :raise AssertionError: if driver is not defined
     :return: 0 if succeed
     """
     assert driver is not None and isinstance(driver, web_drivers_tuple()), "Driver is expected."
 
-    if handle is None and title is None:
+    if handle is None and title is None and url is None and opener is None:
         raise ValueError("Expect at least one value either the handle or the window title")
 
     if handle is not None:
         driver.switch_to.window(handle)
-    if title is not None:
-        current_handle = driver.current_window_handle
-        handles = driver.window_handles
-        search_result = []
-        for handle in handles:
-            driver.switch_to.window(handle)
-            if driver.title == title:
-                search_result.append(handle)
-        if len(search_result) != 1:
+        return 0
+
+    current_handle = driver.current_window_handle
+    with window_registry(driver) as registry:
+        # The registry may be out of date: all the windows are read again before giving up
+        for full in (False, True):
+            search_result = registry.find(title=title, url=url, opener=opener, full=full)
+            if len(search_result) != 1:
+                continue
+            driver.switch_to.window(search_result[0].handle)
+            # The window is read again once switched
+            if registry.confirm(search_result[0].handle, title=title, url=url, opener=opener):
+                return 0
             driver.switch_to.window(current_handle)
-            raise Exception("Too many windows with the same title to switch to. Staying on the "
-                            "current window.")
-        else:
-            driver.switch_to.window(search_result[0])
+    if len(search_result) > 1:
+        raise Exception("Too many windows with the same title to switch to. Staying on the "
+                        "current window.")
+    raise Exception("No window to switch to. Staying on the current window.")
 
+
+def reset_session(driver=None):
+    """
+    Bring the session back to a blank state so that it can be reused:
+    close all windows but the first one, leave the frames, clear the local and session
+    storages of the current page, delete the cookies and navigate to about:blank.
+    On Chromium based browsers, the cookies of all domains and the current origin data are
+    also cleared through the DevTools protocol.
+    :param driver: a selenium web driver
+    :raise AssertionError: if driver is not defined
+    :return: 0 if succeed
+    """
+    assert driver is not None and isinstance(driver, web_drivers_tuple()), "Driver is expected."
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    driver.switch_to.default_content()
+    driver.execute_script(CLEAR_STORAGE)
+    driver.delete_all_cookies()
+    if hasattr(driver, "execute_cdp_cmd"):
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            origin = driver.execute_script("return window.location.origin")
+            if origin and origin != "null":
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                       {"origin": origin, "storageTypes": "all"})
+        except WebDriverException as exception:
+            log.debug(f"Cannot clear the browser data. Get '{exception.msg}'")
+    driver.get("about:blank")
+    cache = get_locator_cache(driver)
+    if cache is not None:
+        cache.clear()
     return 0
+
+
+def is_session_alive(driver=None) -> bool:
+    """
+    Check that the browser still answers
+    :param driver: a selenium web driver
+    :raise AssertionError: if driver is not defined
+    :return: True if the browser answers
+    """
+    assert driver is not None and isinstance(driver, web_drivers_tuple()), "Driver is expected."
+    try:
+        driver.current_window_handle
+        return True
+    except WebDriverException as exception:
+        log.warning(f"The browser doesn't answer. Get '{exception.msg}'")
+        return False
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Pool of warm BrowserServer sessions.
+
+Launching a browser costs seconds. The BrowserPool keeps already served BrowserServers per
+browser name, hands them out through a context manager and resets them when they come back
+(cookies, storage, extra windows, about:blank). Sessions failing the health check or
+reaching the use count or age limits are replaced by new ones.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from time import monotonic, perf_counter
+from typing import Callable, Dict, Iterator
+
+from .browserServer import BrowserServer
+
+log = logging.getLogger(__name__)
+
+
+def _serve(browser_name: str) -> BrowserServer:
+    browser = BrowserServer()
+    browser.browser_name = browser_name
+    browser.serve()
+    return browser
+
+
+class _Pooled:
+    """A pooled BrowserServer and its usage"""
+    __slots__ = ("browser", "created", "uses")
+
+    def __init__(self, browser: BrowserServer):
+        self.browser = browser
+        self.created = monotonic()
+        self.uses = 0
+
+
+class _Timing:
+    """Count, total and max of durations in second"""
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def as_dict(self) -> dict:
+        return {"count": self.count,
+                "total": self.total,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max}
+
+
+class BrowserPool:
+    """
+    Keep 'size' served BrowserServers for each browser name.
+    :param browser_names: the browser names to serve, see BrowserServer.browser_name
+    :param size: the number of sessions per browser name
+    :param max_uses: recycle a session after this number of checkouts, None for no limit
+    :param max_age: recycle a session older than this number of seconds, None for no limit
+    :param factory: a function returning a served BrowserServer for a browser name. Use it
+            to set driver options or paths.
+    """
+
+    def __init__(self,
+                 browser_names=("chrome",),
+                 size: int = 1,
+                 max_uses: int = None,
+                 max_age: float = None,
+                 factory: Callable[[str], BrowserServer] = _serve):
+        if size < 1:
+            raise ValueError("The pool size must be at least 1")
+        self.__size = size
+        self.__max_uses = max_uses
+        self.__max_age = max_age
+        self.__factory = factory
+        self.__condition = threading.Condition()
+        self.__idle: Dict[str, list] = {name.casefold(): [] for name in browser_names}
+        self.__in_use: Dict[str, int] = {name: 0 for name in self.__idle}
+        self.__checkout_wait = {name: _Timing() for name in self.__idle}
+        self.__reset = {name: _Timing() for name in self.__idle}
+        self.__recycled = {name: 0 for name in self.__idle}
+        self.__closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self):
+        """Serve the sessions of all browser names"""
+        for name, idle in self.__idle.items():
+            while len(idle) + self.__in_use[name] < self.__size:
+                idle.append(_Pooled(self.__factory(name)))
+        return 0
+
+    def __expired(self, pooled: _Pooled) -> bool:
+        return ((self.__max_uses is not None and pooled.uses >= self.__max_uses)
+                or (self.__max_age is not None
+                    and monotonic() - pooled.created >= self.__max_age))
+
+    def __discard(self, name: str, pooled: _Pooled):
+        """Close a recycled session. The condition lock must not be held: closing a browser
+        takes time"""
+        with self.__condition:
+            self.__recycled[name] += 1
+        try:
+            pooled.browser.close()
+        except Exception as exception:
+            log.warning(f"Cannot close a recycled '{name}' session. Get {exception.args}")
+
+    def __checkout(self, name: str, timeout: float = None) -> _Pooled:
+        start = perf_counter()
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError("The pool is closed")
+            if not self.__condition.wait_for(lambda: self.__closed
+                                             or self.__idle[name]
+                                             or self.__in_use[name] < self.__size,
+                                             timeout):
+                raise TimeoutError(f"No '{name}' session available within {timeout}s")
+            # The pool may have been closed while waiting
+            if self.__closed:
+                raise RuntimeError("The pool is closed")
+            pooled = self.__idle[name].pop() if self.__idle[name] else None
+            self.__in_use[name] += 1
+        try:
+            while pooled is None or self.__expired(pooled) or not pooled.browser.is_alive():
+                if pooled is not None:
+                    self.__discard(name, pooled)
+                pooled = _Pooled(self.__factory(name))
+        except Exception:
+            with self.__condition:
+                self.__in_use[name] -= 1
+                self.__condition.notify()
+            raise
+        pooled.uses += 1
+        with self.__condition:
+            self.__checkout_wait[name].add(perf_counter() - start)
+        return pooled
+
+    def __checkin(self, name: str, pooled: _Pooled):
+        start = perf_counter()
+        try:
+            pooled.browser.reset()
+            with self.__condition:
+                self.__reset[name].add(perf_counter() - start)
+            healthy = not self.__expired(pooled)
+        except Exception as exception:
+            log.warning(f"Cannot reset a '{name}' session. Get {exception.args}")
+            healthy = False
+        if not healthy:
+            self.__discard(name, pooled)
+        with self.__condition:
+            self.__in_use[name] -= 1
+            closing = healthy and self.__closed
+            if healthy and not closing:
+                self.__idle[name].append(pooled)
+            self.__condition.notify()
+        if closing:
+            self.__discard(name, pooled)
+
+    @contextmanager
+    def session(self, browser_name: str = "chrome", timeout: float = None) -> Iterator[
+            BrowserServer]:
+        """
+        Check out a served BrowserServer. It is reset when the context exits.
+        :param browser_name: one of the pool browser names
+        :param timeout: the maximum wait in second for a session, None to wait forever
+        :raise KeyError: the browser name is not served by the pool
+        :raise TimeoutError: no session has been available in time
+        """
+        name = browser_name.casefold()
+        if name not in self.__idle:
+            raise KeyError(f"The pool doesn't serve '{browser_name}'. "
+                           f"Use one of '{tuple(self.__idle)}'")
+        pooled = self.__checkout(name, timeout)
+        try:
+            yield pooled.browser
+        finally:
+            self.__checkin(name, pooled)
+
+    def close(self):
+        """Close the idle sessions. Sessions in use are closed when checked in"""
+        with self.__condition:
+            self.__closed = True
+            idle = [(name, pooled) for name, pooled_list in self.__idle.items()
+                    for pooled in pooled_list]
+            for pooled_list in self.__idle.values():
+                pooled_list.clear()
+            self.__condition.notify_all()
+        for name, pooled in idle:
+            try:
+                pooled.browser.close()
+            except Exception as exception:
+                log.warning(f"Cannot close a '{name}' session. Get {exception.args}")
+        return 0
+
+    @property
+    def stats(self) -> dict:
+        """Per browser name: size, idle and in use sessions, recycled sessions,
+        checkout wait and reset durations in second"""
+        with self.__condition:
+            return {name: {"size": len(self.__idle[name]) + self.__in_use[name],
+                           "idle": len(self.__idle[name]),
+                           "in_use": self.__in_use[name],
+                           "recycled": self.__recycled[name],
+                           "checkout_wait": self.__checkout_wait[name].as_dict(),
+                           "reset": self.__reset[name].as_dict()}
+                    for name in self.__idle}
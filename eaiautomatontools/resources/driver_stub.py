@@ -0,0 +1,181 @@
+# -*- Product under GNU GPL v3 -*-
+# -*- Author: E.Aivayan -*-
+"""
+A stand-in W3C web driver answering the commands used by the automaton tools.
+
+It doesn't drive any browser: every lookup finds an element unless the locator value
+contains "missing" and element texts are their locator value. The toolbox scripts get a
+plausible answer, other scripts return null unless registered in the scripts dictionary.
+A latency can be added to each command in order to mimic a real driver in benchmarks.
+"""
+import base64
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eaiautomatontools import scripts
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+# A 1x1 white PNG
+BLANK_PNG = base64.b64encode(bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010802000000907753de"
+    "0000000c4944415408d763f8ffff3f0005fe02fea7d6a49f0000000049454e44ae426082")).decode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa
+        pass
+
+    def __answer(self, value, status=200, error=None):
+        payload = {"value": value if error is None else {"error": error,
+                                                          "message": error,
+                                                          "stacktrace": ""}}
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+        stub = self.server.stub
+        stub.count(method, self.path)
+        if stub.latency:
+            time.sleep(stub.latency)
+        status, value, error = stub.answer(method, self.path, body)
+        self.__answer(value, status, error)
+
+    def do_GET(self):  # noqa
+        self.__dispatch("GET")
+
+    def do_POST(self):  # noqa
+        self.__dispatch("POST")
+
+    def do_DELETE(self):  # noqa
+        self.__dispatch("DELETE")
+
+
+class DriverStub:
+    """
+    Serve the stand-in web driver on localhost.
+    :param port: the port to listen to, 0 to pick a free one
+    :param latency: the time in second spent on each command
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.commands = 0
+        self.__port = port
+        self.__server = None
+        self.__thread = None
+        self.__lock = threading.Lock()
+        self.__sessions = {}
+        # Script source to a function of the session and the script arguments
+        self.scripts = {
+            scripts.MATCH_TEXT: lambda session, args: args[0][0] if args[0] else None,
+            scripts.RESOLVE_MANY: lambda session, args: [
+                None if "missing" in locator[1] else self.__element(session, locator[0],
+                                                                    locator[1])
+                for locator in args[0]],
+            scripts.TABULAR: lambda session, args: [-1, [["cell"]]],
+        }
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.__server.server_address[1]}"
+
+    def start(self):
+        if self.__server is None:
+            self.__server = ThreadingHTTPServer(("127.0.0.1", self.__port), _Handler)
+            self.__server.daemon_threads = True
+            self.__server.stub = self
+            self.__thread = threading.Thread(target=self.__server.serve_forever, daemon=True)
+            self.__thread.start()
+
+    def stop(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def count(self, method, path):
+        with self.__lock:
+            self.commands += 1
+
+    @staticmethod
+    def __element(session, using, value):
+        element_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{using}:{value}").hex
+        session["elements"][element_id] = value
+        return {ELEMENT_KEY: element_id}
+
+    def answer(self, method, path, body):
+        """Return the status, value and error for the command"""
+        if method == "POST" and path == "/session":
+            session_id = uuid.uuid4().hex
+            self.__sessions[session_id] = {"url": "about:blank", "elements": {},
+                                           "handles": [uuid.uuid4().hex]}
+            capabilities = body.get("capabilities", {}).get("alwaysMatch", {})
+            return 200, {"sessionId": session_id,
+                         "capabilities": {"browserName": capabilities.get("browserName",
+                                                                          "stub"),
+                                          "browserVersion": "1.0",
+                                          "platformName": "any"}}, None
+        if path == "/status":
+            return 200, {"ready": True, "message": "stub"}, None
+        match = re.match(r"^/session/([^/]+)(/.*)?$", path)
+        if match is None or match.group(1) not in self.__sessions:
+            return 404, None, "invalid session id"
+        session = self.__sessions[match.group(1)]
+        command = match.group(2) or ""
+        if method == "DELETE" and not command:
+            del self.__sessions[match.group(1)]
+            return 200, None, None
+        if command == "/url":
+            if method == "POST":
+                session["url"] = body.get("url")
+                return 200, None, None
+            return 200, session["url"], None
+        if command == "/title":
+            return 200, "Stub", None
+        if command in ("/element", "/elements") or re.match(r"^/element/[^/]+/elements?$",
+                                                              command):
+            value = body.get("value", "")
+            if "missing" in value:
+                if command.endswith("s"):
+                    return 200, [], None
+                return 404, None, "no such element"
+            element = self.__element(session, body.get("using"), value)
+            if command.endswith("s"):
+                return 200, [element], None
+            return 200, element, None
+        element_match = re.match(r"^/element/([^/]+)/(\w+)(?:/(.+))?$", command)
+        if element_match is not None:
+            name = element_match.group(2)
+            if name == "text":
+                return 200, session["elements"].get(element_match.group(1), ""), None
+            if name in ("displayed", "enabled"):
+                return 200, True, None
+            if name == "selected":
+                return 200, False, None
+            if name == "rect":
+                return 200, {"x": 0, "y": 0, "width": 10, "height": 10}, None
+            return 200, None, None
+        if command in ("/execute/sync", "/execute/async"):
+            handler = self.scripts.get(body.get("script"))
+            return 200, None if handler is None else handler(session, body.get("args", [])), None
+        if command == "/screenshot":
+            return 200, BLANK_PNG, None
+        if command == "/window/handles":
+            return 200, list(session["handles"]), None
+        if command == "/window":
+            return 200, session["handles"][0], None
+        return 200, None, None
@@ -0,0 +1,22 @@
+# -*- Product under GNU GPL v3 -*-
+# -*- Author: E.Aivayan -*-
+"""
+Sample scenarios run against the test web server by the runner doctest.
+Scenarios must be module level functions so that worker processes can unpickle them.
+"""
+
+
+def fill_the_form(browser):
+    browser.go_to("http://localhost:8081/forms.html")
+    browser.fill_element(field={"type": "id", "value": "name"}, value="Hidden goblin")
+    assert browser.is_field_exist(field={"type": "id", "value": "name"}) is not None
+
+
+def read_the_tables(browser):
+    browser.go_to("http://localhost:8081/tables.html")
+    assert browser.is_field_exist(field={"type": "tag_name", "value": "table"}) is not None
+
+
+def expect_a_missing_title(browser):
+    browser.go_to("http://localhost:8081/forms.html")
+    assert browser.webdriver.title == "Missing", "Unexpected title"
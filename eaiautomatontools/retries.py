@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policy shared by the actions.
+
+An action looks its element up then acts on it. Both may fail for a transient reason: the
+element is not rendered yet or it has been replaced by the page (stale element). A RetryPolicy
+tells how many attempts are made, how long to wait between them (jittered exponential
+backoff), which exceptions are retried and the overall time allowed.
+
+The policy is set per BrowserServer (``browser.retry_policy = RetryPolicy(attempts=3)``) and
+overridden per call (``click_element(driver, field, retry=RetryPolicy(attempts=1))``). Every
+retry is counted per locator in the session retry_stats.
+"""
+import logging
+import random
+from time import perf_counter, sleep
+from typing import Callable, Union
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+from .deadlines import Deadline, current_deadline
+from .sessions import get_session
+
+log = logging.getLogger(__name__)
+
+
+class RetryPolicy:
+    """
+    How many attempts an action makes and how long it waits between them.
+    The n-th retry waits backoff * factor ** (n - 1) second capped by max_backoff, of which
+    the jitter part is random.
+    :param attempts: the number of attempts, at least 1
+    :param backoff: the wait in second before the first retry
+    :param factor: the wait multiplier between retries
+    :param max_backoff: the maximal wait in second between retries
+    :param jitter: the random part of the waits between 0 (fixed waits) and 1
+    :param retry_on: the exceptions retried. An attempt giving no element is always retried
+    :param deadline: the time in second allowed to all attempts, None for no limit. The waits
+            are also bounded by the session deadline
+    """
+
+    def __init__(self,
+                 attempts: int = 5,
+                 backoff: float = 0.05,
+                 factor: float = 2,
+                 max_backoff: float = 1,
+                 jitter: float = 0.5,
+                 retry_on: tuple = (StaleElementReferenceException,),
+                 deadline: Union[float, None] = None):
+        if not isinstance(attempts, int) or attempts < 1:
+            log.error(f"Expect a positive number of attempts. Get {attempts}")
+            raise ValueError(f"Expect a positive number of attempts. Get {attempts}")
+        if not 0 <= jitter <= 1:
+            log.error(f"Expect a jitter between 0 and 1. Get {jitter}")
+            raise ValueError(f"Expect a jitter between 0 and 1. Get {jitter}")
+        self.attempts = attempts
+        self.backoff = backoff
+        self.factor = factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_on = tuple(retry_on)
+        self.deadline = deadline
+
+    def delay(self, retry: int) -> float:
+        """Return the wait in second before the retry-th retry (starting at 1)"""
+        delay = min(self.backoff * self.factor ** (retry - 1), self.max_backoff)
+        return delay * (1 - self.jitter * random.random())
+
+    def __repr__(self):
+        return (f"RetryPolicy(attempts={self.attempts}, backoff={self.backoff}, "
+                f"factor={self.factor}, max_backoff={self.max_backoff}, jitter={self.jitter}, "
+                f"retry_on={tuple(error.__name__ for error in self.retry_on)}, "
+                f"deadline={self.deadline})")
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def current_policy(driver, policy: Union[RetryPolicy, None] = None) -> RetryPolicy:
+    """Return the given policy, else the one set on the driver session, else the default one"""
+    if policy is not None:
+        if not isinstance(policy, RetryPolicy):
+            log.error(f"Expect a RetryPolicy or None. Get {type(policy)}")
+            raise TypeError(f"Expect a RetryPolicy or None. Get {type(policy)}")
+        return policy
+    session = get_session(driver)
+    if session is None or session.retry_policy is None:
+        return DEFAULT_RETRY_POLICY
+    return session.retry_policy
+
+
+def __count(driver, field, retries: int, waited: float, failed: bool):
+    session = get_session(driver)
+    if session is None:
+        return
+    key = f"{field['type']}={field['value']}"
+    stats = session.retry_stats.setdefault(key, {"calls": 0, "retries": 0, "failures": 0,
+                                                 "waited": 0.0})
+    stats["calls"] += 1
+    stats["retries"] += retries
+    stats["failures"] += failed
+    stats["waited"] += waited
+
+
+def retrying(driver, field, attempt: Callable, call: str,
+             policy: Union[RetryPolicy, None] = None,
+             deadline: Union[Deadline, None] = None):
+    """
+    Call attempt until it returns something else than None following the retry policy.
+    The exceptions of the policy retry_on are retried, the other ones are raised.
+    :param driver: a selenium web driver
+    :param field: the locator the attempt acts on, used to count the retries
+    :param attempt: a callable without argument
+    :param call: the retrying function name, used in the logs
+    :param policy: the RetryPolicy, None for the session or default one
+    :param deadline: the Deadline shared with the caller, None for the session one
+    :return: the attempt result, None if all the attempts failed
+    """
+    policy = current_policy(driver, policy)
+    if deadline is None:
+        deadline = current_deadline(driver)
+    if policy.deadline is not None:
+        deadline = Deadline(policy.deadline, call, deadline)
+    waited = 0.0
+    retry = 0
+    while True:
+        try:
+            result = attempt()
+            if result is not None:
+                __count(driver, field, retry, waited, False)
+                return result
+            log.info(f"{call}: {field} not found at attempt {retry + 1}")
+        except policy.retry_on as error:
+            log.info(f"{call}: {type(error).__name__} on {field} at attempt {retry + 1}")
+        retry += 1
+        if retry >= policy.attempts:
+            break
+        delay = policy.delay(retry)
+        if deadline is not None and deadline.remaining <= delay:
+            log.info(f"{call}: no time left for another attempt on {field}")
+            break
+        start = perf_counter()
+        sleep(delay)
+        waited += perf_counter() - start
+    log.warning(f"{call}: {field} failed after {retry} attempts")
+    __count(driver, field, retry - 1, waited, True)
+    return None
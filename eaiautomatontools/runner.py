@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Process parallel scenario runner.
+
+A scenario is a picklable callable, a module level function for instance, receiving a
+BrowserServer. Scenarios are spread across a pool of processes, each worker serving its own
+browser which is reset between scenarios.
+Scenarios are submitted longest first using the durations recorded on the previous runs so
+that the long ones don't end the run alone. Results are yielded as soon as each scenario
+finishes.
+"""
+import json
+import logging
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import util
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Union
+
+from .browserServer import BrowserServer
+
+log = logging.getLogger(__name__)
+
+PASSED = "passed"
+FAILED = "failed"
+ERROR = "error"
+
+# The worker browser, served by the pool initializer
+_BROWSER = None
+
+
+class ScenarioResult(NamedTuple):
+    """The outcome of a scenario sent back by a worker"""
+    name: str
+    status: str
+    duration: float
+    screenshot: Union[str, None] = None
+    error: Union[str, None] = None
+
+
+def _serve_worker(browser_settings: dict):
+    global _BROWSER
+    browser = BrowserServer()
+    for key, value in browser_settings.items():
+        setattr(browser, key, value)
+    browser.serve()
+    _BROWSER = browser
+    # Worker processes leave through os._exit: atexit handlers don't run, finalizers do.
+    util.Finalize(browser, browser.close, exitpriority=10)
+
+
+def _run_scenario(name: str, scenario: Callable, screenshot_dir: str = None) -> ScenarioResult:
+    start = perf_counter()
+    try:
+        scenario(_BROWSER)
+        status, error = PASSED, None
+    except AssertionError:
+        status, error = FAILED, traceback.format_exc()
+    except Exception:
+        status, error = ERROR, traceback.format_exc()
+    duration = perf_counter() - start
+    screenshot = None
+    if status != PASSED and screenshot_dir is not None:
+        try:
+            screenshot = _BROWSER.take_a_screenshot(save_to=screenshot_dir)
+        except Exception as exception:
+            log.warning(f"Cannot take the screenshot of '{name}'. Get {exception.args}")
+    try:
+        _BROWSER.reset()
+    except Exception as exception:
+        log.warning(f"Cannot reset the browser after '{name}', serve a new one. "
+                    f"Get {exception.args}")
+        try:
+            _BROWSER.close()
+        except Exception:
+            pass
+        _BROWSER.serve()
+    return ScenarioResult(name, status, duration, screenshot, error)
+
+
+class DurationStore:
+    """
+    The last known duration in second of each scenario, persisted as a JSON file
+    :param path: the JSON file path
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.durations: Dict[str, float] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    self.durations = json.load(file)
+            except (OSError, ValueError) as exception:
+                log.warning(f"Cannot read the durations from '{path}'. Get {exception.args}")
+
+    def order(self, names: Iterable[str]) -> List[str]:
+        """Return the names longest first. Scenarios never run come first."""
+        return sorted(names, key=lambda name: self.durations.get(name, float("inf")),
+                      reverse=True)
+
+    def record(self, name: str, duration: float):
+        self.durations[name] = duration
+
+    def save(self):
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(self.durations, file, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+def scenario_name(scenario: Callable) -> str:
+    """Return the module qualified name of the scenario"""
+    return f"{scenario.__module__}.{scenario.__qualname__}"
+
+
+class ScenarioRunner:
+    """
+    Run scenarios on a pool of processes, each one owning a BrowserServer.
+    :param browser_name: the browser name of the workers BrowserServer
+    :param workers: the number of processes, default to the number of cores
+    :param durations_file: the JSON file keeping the scenarios durations
+    :param screenshot_dir: the folder of the screenshots taken when a scenario doesn't pass,
+            None for no screenshot
+    :param browser_settings: other BrowserServer properties to set in the workers such as
+            driver_options, driver_path or scroll_policy
+    """
+
+    def __init__(self,
+                 browser_name: str = "chrome",
+                 workers: int = None,
+                 durations_file: str = ".scenario_durations.json",
+                 screenshot_dir: str = None,
+                 **browser_settings):
+        self.workers = workers or os.cpu_count() or 1
+        self.screenshot_dir = screenshot_dir
+        self.durations = DurationStore(durations_file)
+        self.__browser_settings = {"browser_name": browser_name, **browser_settings}
+
+    def run(self, scenarios: Union[Dict[str, Callable], Iterable[Callable]]) -> Iterator[
+            ScenarioResult]:
+        """
+        Run the scenarios and yield their result as they finish.
+        The durations are saved once all results have been consumed.
+        :param scenarios: a dictionary of name and scenario or scenarios named after their
+                module and qualified name
+        :return: an iterator of ScenarioResult
+        """
+        if not isinstance(scenarios, dict):
+            scenarios = {scenario_name(scenario): scenario for scenario in scenarios}
+        if not scenarios:
+            return
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(scenarios)),
+                                 initializer=_serve_worker,
+                                 initargs=(self.__browser_settings,)) as executor:
+            futures = {executor.submit(_run_scenario, name, scenarios[name],
+                                       self.screenshot_dir): name
+                       for name in self.durations.order(scenarios)}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception:
+                        # The worker died or the scenario cannot be pickled
+                        result = ScenarioResult(futures[future], ERROR, 0.0, None,
+                                                traceback.format_exc())
+                    else:
+                        self.durations.record(result.name, result.duration)
+                    yield result
+            finally:
+                for future in futures:
+                    future.cancel()
+                self.durations.save()
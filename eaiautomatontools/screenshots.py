@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Background screenshot writer and content addressed screenshot store.
+
+Encoding a full page capture takes hundreds of milliseconds. The ScreenshotWriter encodes and
+writes the captures on a bounded thread pool so that the caller only pays for the capture.
+Each submission returns a future of the written file path. Submissions block once max_pending
+captures are waiting so that memory stays bounded.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from io import BytesIO
+from time import perf_counter, time
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+FORMATS = {"png": ("PNG", "png"),
+           "webp": ("WEBP", "webp"),
+           "jpeg": ("JPEG", "jpg"),
+           "jpg": ("JPEG", "jpg")}
+
+
+class ScreenshotWriter:
+    """
+    Encode and write screenshots in background threads.
+    :param image_format: png, webp or jpeg
+    :param quality: the webp and jpeg quality from 1 to 100
+    :param compress_level: the png compression level from 0 (none) to 9 (smallest)
+    :param workers: the number of encoding threads
+    :param max_pending: the number of captures waiting or being encoded before submit blocks
+    """
+
+    def __init__(self,
+                 image_format: str = "png",
+                 quality: int = 90,
+                 compress_level: int = 6,
+                 workers: int = 2,
+                 max_pending: int = 16):
+        if image_format.casefold() not in FORMATS:
+            raise ValueError(f"Unknown image format. Get {image_format} instead of "
+                             f"{tuple(FORMATS)}")
+        self.__format, self.extension = FORMATS[image_format.casefold()]
+        self.__quality = quality
+        self.__compress_level = compress_level
+        self.__executor = ThreadPoolExecutor(max_workers=workers,
+                                             thread_name_prefix="screenshot-writer")
+        self.__slots = threading.BoundedSemaphore(max_pending)
+        self.__lock = threading.Lock()
+        self.__futures = set()
+        self.__max_pending = 0
+        self.__written = 0
+        self.__failed = 0
+        self.__encode_count = 0
+        self.__encode_total = 0.0
+        self.__encode_max = 0.0
+
+    def __save_parameters(self) -> dict:
+        if self.__format == "PNG":
+            return {"compress_level": self.__compress_level}
+        return {"quality": self.__quality}
+
+    def __encode(self, capture, filename: str):
+        from PIL import Image
+
+        if isinstance(capture, bytes) and self.__format == "PNG":
+            # Already encoded by the browser
+            with open(filename, "wb") as file:
+                file.write(capture)
+            return
+        image = Image.open(BytesIO(capture)) if isinstance(capture, bytes) else capture
+        if self.__format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(filename, self.__format, **self.__save_parameters())
+
+    def __write(self, capture, filename: str, store, step: str) -> str:
+        start = perf_counter()
+        try:
+            if store is not None:
+                path = store.put(capture, filename, step, self.extension, self.__encode)
+            else:
+                path = os.path.realpath(f"{filename}.{self.extension}")
+                self.__encode(capture, path)
+        except Exception as exception:
+            with self.__lock:
+                self.__failed += 1
+            log.error(f"The screenshot '{filename}' could not be written. Get {exception}")
+            raise
+        duration = perf_counter() - start
+        with self.__lock:
+            self.__written += 1
+            self.__encode_count += 1
+            self.__encode_total += duration
+            self.__encode_max = max(self.__encode_max, duration)
+        return path
+
+    def __done(self, future: Future):
+        with self.__lock:
+            self.__futures.discard(future)
+        self.__slots.release()
+
+    def submit(self, capture, filename: str, store=None, step: str = None) -> Future:
+        """
+        Queue a capture for encoding. Block while max_pending captures are queued.
+        :param capture: a PIL Image or PNG bytes
+        :param filename: the file path without extension
+        :param store: a ScreenshotStore to put the capture in, in the writer format
+        :param step: the step label recorded by the store
+        :return: a future of the written file real path
+        """
+        self.__slots.acquire()
+        try:
+            future = self.__executor.submit(self.__write, capture, filename, store, step)
+        except Exception:
+            self.__slots.release()
+            raise
+        with self.__lock:
+            self.__futures.add(future)
+            self.__max_pending = max(self.__max_pending, len(self.__futures))
+        future.add_done_callback(self.__done)
+        return future
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait for the queued captures to be written
+        :param timeout: the maximum wait in second, None to wait until done
+        :return: True if all captures have been processed
+        """
+        with self.__lock:
+            futures = set(self.__futures)
+        return not wait(futures, timeout=timeout).not_done
+
+    def close(self):
+        """Write the queued captures and stop the threads"""
+        self.__executor.shutdown(wait=True)
+        return 0
+
+    @property
+    def stats(self) -> dict:
+        """Queue depth, written and failed counts and the encoding durations in second"""
+        with self.__lock:
+            return {"pending": len(self.__futures),
+                    "max_pending": self.__max_pending,
+                    "written": self.__written,
+                    "failed": self.__failed,
+                    "encode": {"count": self.__encode_count,
+                               "total": self.__encode_total,
+                               "mean": (self.__encode_total / self.__encode_count
+                                        if self.__encode_count else 0.0),
+                               "max": self.__encode_max}}
+
+
+def pixels_digest(image) -> str:
+    """The SHA-256 of the image mode, size and pixels"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class ScreenshotStore:
+    """
+    Content addressed screenshot store: each distinct image is written once.
+
+        <root>/objects/<hash[:2]>/<hash>.<ext>  the unique images
+        <root>/manifest.jsonl                   one line per screenshot: step, time, hash,
+                                                object and path
+
+    Screenshot paths are hard links to the objects, or copies when linking is not possible.
+    The same pixels stored in two formats are two objects.
+    The objects modification time is their last use: when the objects exceed max_bytes, the
+    least recently used ones are evicted with their screenshot paths and manifest entries.
+    :param root: the store folder
+    :param max_bytes: the objects size limit, None for no limit
+    """
+
+    def __init__(self, root: str, max_bytes: int = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.__objects = os.path.join(root, "objects")
+        self.__manifest = os.path.join(root, "manifest.jsonl")
+        os.makedirs(self.__objects, exist_ok=True)
+        self.__lock = threading.Lock()
+        # Object name, <hash>.<ext>, to its size, oldest use first
+        extensions = {f".{extension}" for _, extension in FORMATS.values()}
+        found = []
+        for directory, _, files in os.walk(self.__objects):
+            for name in files:
+                if os.path.splitext(name)[1] in extensions:
+                    status = os.stat(os.path.join(directory, name))
+                    found.append((status.st_mtime, name, status.st_size))
+        self.__sizes = OrderedDict((key, size) for _, key, size in sorted(found))
+        self.__bytes = sum(self.__sizes.values())
+        self.__links = {}
+        for entry in self.__read_manifest():
+            if entry["object"] in self.__sizes:
+                self.__links.setdefault(entry["object"], []).append(entry["path"])
+        self.__stored = 0
+        self.__deduplicated = 0
+        self.__saved_bytes = 0
+        self.__evicted = 0
+        self.__hash_count = 0
+        self.__hash_total = 0.0
+
+    def __object_path(self, key: str) -> str:
+        return os.path.join(self.__objects, key[:2], key)
+
+    def __read_manifest(self) -> list:
+        if not os.path.exists(self.__manifest):
+            return []
+        with open(self.__manifest, encoding="utf-8") as manifest:
+            entries = [json.loads(line) for line in manifest]
+        for entry in entries:
+            entry.setdefault("object", f"{entry['hash']}.png")
+        return entries
+
+    def __compact_manifest(self):
+        """Drop the entries of the evicted objects"""
+        entries = [entry for entry in self.__read_manifest() if entry["object"] in self.__sizes]
+        temporary = f"{self.__manifest}.tmp"
+        with open(temporary, "w", encoding="utf-8") as manifest:
+            manifest.writelines(json.dumps(entry) + "\n" for entry in entries)
+        os.replace(temporary, self.__manifest)
+
+    @staticmethod
+    def __link(source: str, destination: str):
+        if os.path.exists(destination):
+            os.remove(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+    def __evict(self):
+        evicted = self.__evicted
+        # The object just used is kept whatever its size
+        while self.max_bytes is not None and len(self.__sizes) > 1 \
+                and self.__bytes > self.max_bytes:
+            key, size = self.__sizes.popitem(last=False)
+            self.__bytes -= size
+            for path in [self.__object_path(key)] + self.__links.pop(key, []):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.__evicted += 1
+        if self.__evicted != evicted:
+            self.__compact_manifest()
+
+    def put(self, capture, filename: str, step: str = None, extension: str = "png",
+            encode: Callable = None) -> str:
+        """
+        Store a capture and make it available at filename.<extension>
+        :param capture: a PIL Image or PNG bytes
+        :param filename: the screenshot path without extension
+        :param step: a label recorded in the manifest
+        :param extension: the image format extension, png, webp or jpg
+        :param encode: a function writing a capture to a file path in the extension format,
+                required for other formats than png
+        :raise ValueError: an other format than png without encode function
+        :return: the screenshot real path
+        """
+        from PIL import Image
+
+        if extension != "png" and encode is None:
+            log.error(f"Expect an encode function for the {extension} format")
+            raise ValueError(f"Expect an encode function for the {extension} format")
+        image = Image.open(BytesIO(capture)) if isinstance(capture, bytes) else capture
+        start = perf_counter()
+        digest = pixels_digest(image)
+        duration = perf_counter() - start
+        key = f"{digest}.{extension}"
+        path = os.path.realpath(f"{filename}.{extension}")
+        with self.__lock:
+            self.__hash_count += 1
+            self.__hash_total += duration
+            source = self.__object_path(key)
+            if key in self.__sizes:
+                self.__deduplicated += 1
+                self.__saved_bytes += self.__sizes[key]
+                self.__sizes.move_to_end(key)
+                os.utime(source)
+            else:
+                os.makedirs(os.path.dirname(source), exist_ok=True)
+                if encode is not None:
+                    # Encoded PNG bytes are written as is, other formats encode the pixels
+                    encode(capture if extension == "png" else image, source)
+                elif isinstance(capture, bytes):
+                    with open(source, "wb") as file:
+                        file.write(capture)
+                else:
+                    image.save(source, "PNG")
+                self.__sizes[key] = os.stat(source).st_size
+                self.__bytes += self.__sizes[key]
+                self.__stored += 1
+            self.__link(source, path)
+            self.__links.setdefault(key, []).append(path)
+            with open(self.__manifest, "a", encoding="utf-8") as manifest:
+                manifest.write(json.dumps({"step": step, "time": time(), "hash": digest,
+                                           "object": key, "path": path}) + "\n")
+            self.__evict()
+        return path
+
+    def entries(self) -> list:
+        """The manifest entries, oldest first. Empty before the first screenshot"""
+        with self.__lock:
+            return self.__read_manifest()
+
+    @property
+    def stats(self) -> dict:
+        """Objects count and size, stored, deduplicated and evicted counts, bytes saved by the
+        deduplication and the hash durations in second"""
+        with self.__lock:
+            return {"objects": len(self.__sizes),
+                    "bytes": self.__bytes,
+                    "stored": self.__stored,
+                    "deduplicated": self.__deduplicated,
+                    "saved_bytes": self.__saved_bytes,
+                    "evicted": self.__evicted,
+                    "hash": {"count": self.__hash_count,
+                             "total": self.__hash_total,
+                             "mean": (self.__hash_total / self.__hash_count
+                                      if self.__hash_count else 0.0)}}
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""
+JavaScript snippets injected through the web driver ``execute_script`` method.
+
+Keeping them in one place makes it easy to review what runs in the browser and
+avoid several HTTP round trips when a single script can do the job.
+"""
+
+# Function building a predicate on a string for a text and a matching mode:
+# exact, normalized, ignore_case or regex.
+# Elements match on their rendered text, the form fields on their value too: other elements
+# may have a value property of another meaning, the number of a list item for instance.
+_TEXT_MATCHER = """
+var textMatcher = function (text, mode) {
+    var normalize = function (s) { return s.replace(/\\s+/g, ' ').trim(); };
+    if (mode === 'regex') {
+        var pattern = new RegExp(text);
+        return function (s) { return pattern.test(s); };
+    }
+    if (mode === 'normalized') {
+        var normalized = normalize(text);
+        return function (s) { return normalize(s) === normalized; };
+    }
+    if (mode === 'ignore_case') {
+        var lowered = normalize(text).toLowerCase();
+        return function (s) { return normalize(s).toLowerCase() === lowered; };
+    }
+    return function (s) { return s === text; };
+};
+var VALUED_TAGS = ['INPUT', 'SELECT', 'TEXTAREA'];
+var firstMatching = function (elements, text, mode) {
+    var test = textMatcher(text, mode);
+    for (var i = 0; i < elements.length; i++) {
+        var element = elements[i];
+        var shown = element.innerText === undefined ? element.textContent : element.innerText;
+        if (test((shown || '').trim())) { return element; }
+        if (VALUED_TAGS.indexOf(element.tagName) >= 0 && element.value !== null
+                && test(String(element.value))) { return element; }
+    }
+    return null;
+};
+"""
+
+# Function returning the elements found from a root for a locator type and value.
+# It mirrors the selenium By strategies.
+_LOCATE = """
+var locate = function (root, type, value) {
+    var all = function (selector) { return Array.prototype.slice.call(root.querySelectorAll(selector)); };
+    var quoted = function (s) { return '"' + String(s).replace(/\\\\/g, '\\\\\\\\').replace(/"/g, '\\\\"') + '"'; };
+    var links = function (test) {
+        return all('a').filter(function (a) { return test((a.innerText || a.textContent || '').trim()); });
+    };
+    switch (type) {
+        case 'id': return all('[id=' + quoted(value) + ']');
+        case 'name': return all('[name=' + quoted(value) + ']');
+        case 'class_name': return all('.' + CSS.escape(value));
+        case 'css': return all(value);
+        case 'tag_name': return all(value);
+        case 'link_text': return links(function (s) { return s === value; });
+        case 'partial_link_text': return links(function (s) { return s.indexOf(value) !== -1; });
+        case 'xpath':
+            var result = document.evaluate(value, root, null,
+                                           XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var nodes = [];
+            for (var i = 0; i < result.snapshotLength; i++) { nodes.push(result.snapshotItem(i)); }
+            return nodes;
+    }
+    return [];
+};
+"""
+
+# Function telling if an element is displayed: it has a size and is neither hidden nor
+# transparent.
+_VISIBLE = """
+var visible = function (element) {
+    var rect = element.getBoundingClientRect();
+    if (!(rect.width > 0 && rect.height > 0)) { return false; }
+    if (element.checkVisibility) {
+        return element.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+    }
+    var style = window.getComputedStyle(element);
+    return style.visibility !== 'hidden' && style.opacity !== '0';
+};
+"""
+
+# Return the first element of arguments[0] whose text or value matches arguments[1].
+# arguments[2] is the matching mode.
+MATCH_TEXT = _TEXT_MATCHER + """
+return firstMatching(arguments[0], arguments[1], arguments[2]);
+"""
+
+# Resolve a list of [type, value, text, match] locators from the root arguments[1]
+# (the document when null). Return the list of the first element found or null for each,
+# {invalid: message} for the locators which are not valid CSS selectors or XPath expressions.
+RESOLVE_MANY = _TEXT_MATCHER + _LOCATE + """
+var root = arguments[1] || document;
+return arguments[0].map(function (locator) {
+    var elements;
+    try {
+        elements = locate(root, locator[0], locator[1]);
+    } catch (error) {
+        return {invalid: String(error && error.message || error)};
+    }
+    if (locator[2] !== null) { return firstMatching(elements, locator[2], locator[3]); }
+    return elements.length ? elements[0] : null;
+});
+"""
+
+# Asynchronous: wait for the [type, value, text, match] locator arguments[1] to resolve from
+# the root arguments[0] (the document when null). When arguments[2] is true, the element must
+# also be displayed. The locator is checked again on each DOM mutation batch and every 250ms
+# for the changes without mutation (stylesheets, layout...). Call back with the element or
+# null after arguments[3] ms.
+WAIT_FOR_FIELD = _TEXT_MATCHER + _LOCATE + _VISIBLE + """
+var root = arguments[0] || document, locator = arguments[1], displayed = arguments[2];
+var timeout = arguments[3], callback = arguments[arguments.length - 1];
+var finished = false, observer = null, timer = null, poller = null;
+var find = function () {
+    var elements = locate(root, locator[0], locator[1]);
+    var element = locator[2] !== null ? firstMatching(elements, locator[2], locator[3])
+                                      : elements[0] || null;
+    return element && (!displayed || visible(element)) ? element : null;
+};
+var finish = function (element) {
+    if (finished) { return; }
+    finished = true;
+    if (observer) { observer.disconnect(); }
+    window.clearTimeout(timer);
+    window.clearInterval(poller);
+    callback(element);
+};
+var check = function () {
+    var element = find();
+    if (element) { finish(element); }
+};
+check();
+if (!finished) {
+    observer = new MutationObserver(check);
+    observer.observe(document, {attributes: true, childList: true, characterData: true, subtree: true});
+    poller = window.setInterval(check, 250);
+    timer = window.setTimeout(function () { finish(null); }, timeout);
+}
+"""
+
+# Return the snapshot of the element arguments[0], or of the first element found for the
+# [type, value, text, match] locator arguments[1] from the root arguments[2], null if none:
+# [element, text, value, displayed, enabled, checked, selected, [x, y, width, height] in page
+# coordinates, entirely in the viewport, visible area ratio, {attribute: value}] with the
+# attributes named in arguments[3].
+SNAPSHOT = _TEXT_MATCHER + _LOCATE + _VISIBLE + """
+var element = arguments[0], locator = arguments[1], root = arguments[2] || document;
+if (!element && locator) {
+    var elements = locate(root, locator[0], locator[1]);
+    element = locator[2] !== null ? firstMatching(elements, locator[2], locator[3])
+                                  : elements[0] || null;
+}
+if (!element) { return null; }
+var displayed = visible(element);
+var text = displayed ? (element.innerText === undefined ? element.textContent : element.innerText) : '';
+var value = element.value === undefined || element.value === null
+    ? element.getAttribute('value') : String(element.value);
+var bounds = element.getBoundingClientRect();
+var width = document.documentElement.clientWidth, height = document.documentElement.clientHeight;
+var visibleWidth = Math.max(0, Math.min(bounds.right, width) - Math.max(bounds.left, 0));
+var visibleHeight = Math.max(0, Math.min(bounds.bottom, height) - Math.max(bounds.top, 0));
+var area = bounds.width * bounds.height;
+var attributes = {};
+arguments[3].forEach(function (name) { attributes[name] = element.getAttribute(name); });
+return [element,
+        (text || '').trim(),
+        value,
+        displayed,
+        !(element.matches && element.matches(':disabled')),
+        element.checked === true,
+        'selected' in element ? element.selected === true : element.checked === true,
+        [bounds.left + window.pageXOffset, bounds.top + window.pageYOffset,
+         bounds.width, bounds.height],
+        bounds.left >= 0 && bounds.top >= 0 && bounds.right <= width && bounds.bottom <= height,
+        area > 0 ? visibleWidth * visibleHeight / area : 0,
+        attributes];
+"""
+
+# Fill the [type, value, text, match, data] entries of arguments[0] found from the root
+# arguments[1] (the document when null) the way a user would: checkboxes and radios are clicked
+# when their state differs from the boolean data, a string data checks the radio of the same
+# group having this value, selects choose the options by value or text (a list for multiple
+# selects), other fields get their value through the native setter so that the frameworks see
+# it. input and change events are fired, then the field loses the focus.
+# Return for each entry null when filled, the reason otherwise.
+FILL_FORM = _TEXT_MATCHER + _LOCATE + """
+var root = arguments[1] || document;
+var fire = function (element, name) {
+    element.dispatchEvent(new Event(name, {bubbles: true}));
+};
+var setValue = function (element, value) {
+    var prototype = Object.getPrototypeOf(element);
+    var descriptor = Object.getOwnPropertyDescriptor(prototype, 'value');
+    if (descriptor && descriptor.set) { descriptor.set.call(element, value); }
+    else { element.value = value; }
+};
+var check = function (element, wanted) {
+    if (element.checked !== wanted) { element.click(); }
+    return element.checked === wanted ? null : 'not checkable';
+};
+var fill = function (element, data) {
+    if (element.disabled || element.readOnly) { return 'not editable'; }
+    var type = (element.type || '').toLowerCase();
+    if (type === 'checkbox') { return check(element, data === true); }
+    if (type === 'radio') {
+        if (typeof data === 'boolean') { return check(element, data); }
+        var group = (element.form || document).querySelectorAll(
+            'input[type=radio][name="' + CSS.escape(element.name) + '"]');
+        for (var i = 0; i < group.length; i++) {
+            if (group[i].value === String(data)) { return check(group[i], true); }
+        }
+        return 'no radio ' + data;
+    }
+    if (element.tagName === 'SELECT') {
+        var wanted = Array.isArray(data) ? data.map(String) : [String(data)];
+        var matches = Array.prototype.map.call(element.options, function (option) {
+            return wanted.indexOf(option.value) !== -1 || wanted.indexOf(option.text.trim()) !== -1;
+        });
+        if (matches.indexOf(true) === -1) { return 'no option ' + data; }
+        try { element.focus({preventScroll: true}); } catch (error) {}
+        Array.prototype.forEach.call(element.options, function (option, index) {
+            if (element.multiple || matches[index]) { option.selected = matches[index]; }
+        });
+    } else {
+        try { element.focus({preventScroll: true}); } catch (error) {}
+        setValue(element, data === null || data === undefined ? '' : String(data));
+    }
+    fire(element, 'input');
+    fire(element, 'change');
+    element.blur();
+    return null;
+};
+return arguments[0].map(function (entry) {
+    var elements = locate(root, entry[0], entry[1]);
+    var element = entry[2] !== null ? firstMatching(elements, entry[2], entry[3])
+                                    : elements[0] || null;
+    return element ? fill(element, entry[4]) : 'not found';
+});
+"""
+
+# Install once per document a MutationObserver counting the DOM changes.
+# Return the document identifier, the current generation and the location.
+DOCUMENT_STATE = """
+var state = window.__eaiautomatontools;
+if (!state) {
+    state = window.__eaiautomatontools = {
+        id: Math.random().toString(36).slice(2) + Date.now().toString(36),
+        generation: 0
+    };
+    new MutationObserver(function () { state.generation += 1; }).observe(
+        document, {attributes: true, childList: true, characterData: true, subtree: true});
+}
+return [state.id, state.generation, window.location.href];
+"""
+
+# Scroll the element arguments[0] to the viewport center. When arguments[1] is true, scroll
+# only if the element is not entirely in the viewport. Return true if the page was scrolled.
+SCROLL_INTO_VIEW = """
+var element = arguments[0];
+if (arguments[1]) {
+    var rect = element.getBoundingClientRect();
+    var height = window.innerHeight || document.documentElement.clientHeight;
+    var width = window.innerWidth || document.documentElement.clientWidth;
+    if (rect.top >= 0 && rect.left >= 0 && rect.bottom <= height && rect.right <= width) {
+        return false;
+    }
+}
+element.scrollIntoView({block: 'center', inline: 'nearest'});
+return true;
+"""
+
+# Serialize the table arguments[0] as [header row index or -1, rows of cells text].
+# arguments[1] holds the row, column and header column tag names.
+# arguments[2] options: text is 'innerText' or 'textContent', expand duplicates the text of
+# the cells spanning several rows or columns in each covered position, index names the row
+# attribute holding the row index, added as a third list of values (null when missing).
+# The header row is the first row when it's in a thead or only made of header cells.
+TABULAR = """
+var table = arguments[0], tags = arguments[1], options = arguments[2] || {};
+var source = options.text === 'textContent' ? 'textContent' : 'innerText';
+var text = function (cell) {
+    var value = cell[source] === undefined ? cell.textContent : cell[source];
+    return (value || '').trim();
+};
+var rows = table.getElementsByTagName(tags[0]);
+var cellsOf = function (row) {
+    var cells = row.getElementsByTagName(tags[1]);
+    return cells.length ? cells : row.getElementsByTagName(tags[2]);
+};
+var grid = [];
+for (var r = 0; r < rows.length; r++) {
+    var cells = cellsOf(rows[r]);
+    grid[r] = grid[r] || [];
+    if (!options.expand) {
+        grid[r] = Array.prototype.map.call(cells, text);
+        continue;
+    }
+    var column = 0;
+    for (var c = 0; c < cells.length; c++) {
+        while (grid[r][column] !== undefined) { column++; }
+        var value = text(cells[c]);
+        var rowSpan = Math.min(Math.max(cells[c].rowSpan || 1, 1), rows.length - r);
+        var colSpan = Math.max(cells[c].colSpan || 1, 1);
+        for (var i = 0; i < rowSpan; i++) {
+            grid[r + i] = grid[r + i] || [];
+            for (var j = 0; j < colSpan; j++) { grid[r + i][column + j] = value; }
+        }
+        column += colSpan;
+    }
+}
+for (r = 0; r < grid.length; r++) {
+    for (c = 0; c < grid[r].length; c++) {
+        if (grid[r][c] === undefined) { grid[r][c] = ''; }
+    }
+}
+var header = -1;
+if (rows.length) {
+    var first = rows[0], headerTag = tags[2].toUpperCase();
+    var inHead = first.parentNode && first.parentNode.tagName === 'THEAD';
+    var all = first.children.length > 0 && Array.prototype.every.call(first.children,
+        function (cell) { return cell.tagName === headerTag; });
+    if (inHead || all) { header = 0; }
+}
+if (!options.index) { return [header, grid]; }
+var indexes = Array.prototype.map.call(rows, function (row) {
+    return row.getAttribute(options.index);
+});
+return [header, grid, indexes];
+"""
+
+# Asynchronous: move a virtualized or paginated tabular to its next rows. Scroll the
+# container arguments[0] by its height and/or click the next page button arguments[1], both
+# optional. Call back with [scrolled, mutated] once the document hasn't changed for two
+# animation frames, after a first change when a button was clicked (arguments[2] ms at most).
+# A disabled button is not clicked.
+ADVANCE_TABULAR = """
+var container = arguments[0], button = arguments[1], timeout = arguments[2];
+var callback = arguments[arguments.length - 1];
+var finished = false, mutated = false, quiet = 0;
+if (button && (button.disabled || button.getAttribute('aria-disabled') === 'true')) {
+    button = null;
+    if (!container) { callback([false, false]); return; }
+}
+var observer = new MutationObserver(function () { mutated = true; quiet = 0; });
+observer.observe(document, {attributes: true, childList: true, characterData: true, subtree: true});
+var before = container ? container.scrollTop : 0;
+var done = function () {
+    if (finished) { return; }
+    finished = true;
+    observer.disconnect();
+    callback([container ? container.scrollTop !== before : false, mutated]);
+};
+if (container) { container.scrollTop = before + Math.max(container.clientHeight, 1); }
+if (button) { button.click(); }
+// Animation frames are not run in hidden pages
+window.setTimeout(done, timeout);
+(function check() {
+    quiet += 1;
+    if (quiet > 2 && (mutated || !button)) { done(); }
+    else if (!finished) { window.requestAnimationFrame(check); }
+})();
+"""
+
+# Clear the local and session storages of the current document. Documents without storage,
+# like about:blank, are ignored.
+CLEAR_STORAGE = """
+try { window.localStorage.clear(); } catch (error) {}
+try { window.sessionStorage.clear(); } catch (error) {}
+"""
+
+# Return the title, the URL and the loading state of the current window.
+WINDOW_STATE = """
+return [document.title, window.location.href, document.readyState];
+"""
+
+# Return the page width and height, the viewport width and height and the scroll position.
+PAGE_METRICS = """
+return [document.body.offsetWidth, document.body.parentNode.scrollHeight,
+        document.body.clientWidth, window.innerHeight,
+        window.pageXOffset, window.pageYOffset];
+"""
+
+# Asynchronous: scroll the window to (arguments[0], arguments[1]) and call back with the
+# scroll position once it hasn't moved for two animation frames (one second at most).
+SCROLL_AND_SETTLE = """
+var callback = arguments[arguments.length - 1];
+var last = null, stable = 0, finished = false;
+var position = function () { return [window.pageXOffset, window.pageYOffset]; };
+var done = function () {
+    if (!finished) { finished = true; callback(position()); }
+};
+try {
+    window.scrollTo({left: arguments[0], top: arguments[1], behavior: 'instant'});
+} catch (error) {
+    window.scrollTo(arguments[0], arguments[1]);
+}
+// Animation frames are not run in hidden pages
+window.setTimeout(done, 1000);
+(function check() {
+    var current = position();
+    stable = last !== null && current[0] === last[0] && current[1] === last[1] ? stable + 1 : 0;
+    last = current;
+    if (stable >= 2) { done(); } else if (!finished) { window.requestAnimationFrame(check); }
+})();
+"""
+
+# Return the [left, top, width, height] rectangle of each element of arguments[0], null
+# elements excepted. Page coordinates when arguments[1] is true, viewport ones otherwise.
+ELEMENT_RECTS = """
+var page = arguments[1];
+return arguments[0].filter(function (element) { return element; }).map(function (element) {
+    var rect = element.getBoundingClientRect();
+    var left = rect.left + (page ? window.pageXOffset : 0);
+    var top = rect.top + (page ? window.pageYOffset : 0);
+    return [Math.floor(left), Math.floor(top), Math.ceil(rect.width), Math.ceil(rect.height)];
+});
+"""
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Per web driver settings shared by the toolbox functions.
+
+The toolbox functions only receive a web driver. The BrowserServer registers here the
+options applying to its session so that every function can reach them from the driver.
+Entries are weak references: they vanish with the web driver.
+"""
+from typing import Union
+from weakref import WeakKeyDictionary
+
+_SESSIONS = WeakKeyDictionary()
+
+SCROLL_NEVER = "never"
+SCROLL_IF_NEEDED = "if_needed"
+SCROLL_ALWAYS = "always"
+SCROLL_HOVER = "hover"
+SCROLL_POLICIES = (SCROLL_NEVER, SCROLL_IF_NEEDED, SCROLL_ALWAYS, SCROLL_HOVER)
+
+
+class Session:
+    """Options attached to a web driver"""
+    __slots__ = ("locator_cache", "scroll_policy", "scroll_stats", "deadline", "retry_policy",
+                 "retry_stats", "windows")
+
+    def __init__(self):
+        self.locator_cache = None
+        self.scroll_policy = SCROLL_ALWAYS
+        self.scroll_stats = {"scrolled": 0, "skipped": 0}
+        self.deadline = None
+        self.retry_policy = None
+        self.retry_stats = {}
+        self.windows = None
+
+
+def get_session(driver) -> Union[Session, None]:
+    """
+    Return the session attached to the driver without creating it
+    :param driver: a selenium web driver
+    :return: the Session or None if the driver has no registered session
+    """
+    try:
+        return _SESSIONS.get(driver)
+    except TypeError:
+        return None
+
+
+def session_of(driver) -> Session:
+    """
+    Return the session attached to the driver, create it if needed
+    :param driver: a selenium web driver
+    :raise TypeError: when the driver cannot be referenced
+    :return: the Session
+    """
+    session = _SESSIONS.get(driver)
+    if session is None:
+        session = _SESSIONS[driver] = Session()
+    return session
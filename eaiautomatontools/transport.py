@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP transport to the web driver.
+
+Every toolbox call ends up as HTTP requests from the selenium command executor to the web
+driver (chromedriver, geckodriver...). The executor sends them through a urllib3 pool of
+connections, kept alive by default, with a single connection timeout of 120 seconds.
+A Transport sets the pool size, the keep-alive, the connect and read timeouts and the
+connection retries of that pool. It is applied to a served driver (see apply_transport) or
+given to the BrowserServer (``browser.transport = Transport(pool_size=4)``).
+
+A web driver session runs its commands one after the other: the pool size matters when
+several threads share a driver, a background screenshot writer for instance.
+"""
+from logging import getLogger
+
+import urllib3
+
+log = getLogger(__name__)
+
+
+class Transport:
+    """
+    The HTTP settings of the connection to the web driver
+    :param pool_size: the number of connections kept open to the web driver
+    :param keep_alive: reuse the connections between commands, a new connection per command
+            otherwise
+    :param connect_timeout: the time in second to open a connection
+    :param read_timeout: the time in second to wait for a command answer
+    :param retries: the number of attempts to connect again when the connection fails, 0 to
+            fail at once. Commands sent are never sent again
+    :param block: wait for a free connection when they are all used instead of opening a
+            connection which won't be kept
+    """
+
+    def __init__(self,
+                 pool_size: int = 1,
+                 keep_alive: bool = True,
+                 connect_timeout: float = 10,
+                 read_timeout: float = 120,
+                 retries: int = 3,
+                 block: bool = False):
+        if not isinstance(pool_size, int) or pool_size < 1:
+            log.error(f"Expect a positive pool size. Get {pool_size}")
+            raise ValueError(f"Expect a positive pool size. Get {pool_size}")
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.block = block
+
+    @property
+    def timeout(self) -> urllib3.Timeout:
+        return urllib3.Timeout(connect=self.connect_timeout, read=self.read_timeout)
+
+    def pool_manager_args(self) -> dict:
+        """Return the urllib3 PoolManager arguments"""
+        return {"maxsize": self.pool_size,
+                "block": self.block,
+                "timeout": self.timeout,
+                "retries": urllib3.Retry(connect=self.retries, read=False, redirect=3,
+                                         status=0, other=0)}
+
+    def __repr__(self):
+        return (f"Transport(pool_size={self.pool_size}, keep_alive={self.keep_alive}, "
+                f"connect_timeout={self.connect_timeout}, read_timeout={self.read_timeout}, "
+                f"retries={self.retries}, block={self.block})")
+
+
+def apply_transport(driver, transport: Transport) -> int:
+    """
+    Set the HTTP transport of the driver command executor. The kept alive connections are
+    closed and a new pool is opened with the transport settings.
+    :param driver: a selenium web driver
+    :param transport: the Transport
+    :raise TypeError: transport is not a Transport
+    :raise AttributeError: the driver command executor doesn't have a configurable HTTP client
+    :return: 0 if success
+    """
+    if not isinstance(transport, Transport):
+        log.error(f"Expect a Transport. Get {type(transport)}")
+        raise TypeError(f"Expect a Transport. Get {type(transport)}")
+    executor = driver.command_executor
+    config = getattr(executor, "_client_config", None)
+    if config is None:
+        log.error(f"The command executor {type(executor)} doesn't have a client configuration")
+        raise AttributeError(f"The command executor {type(executor)} doesn't have a client "
+                             f"configuration")
+    config.keep_alive = transport.keep_alive
+    # The executor gives the timeout on each request: it prevails over the pool one
+    config.timeout = transport.timeout
+    config.init_args_for_pool_manager = {"init_args_for_pool_manager":
+                                         transport.pool_manager_args()}
+    previous = getattr(executor, "_conn", None)
+    if transport.keep_alive:
+        executor._conn = executor._get_connection_manager()
+    if previous is not None:
+        previous.clear()
+    return 0
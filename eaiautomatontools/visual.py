@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Visual comparison of screenshots against baselines.
+
+The comparison is vectorized with NumPy, an optional dependency:
+
+    pip install eaiautomatontools[visual]
+
+Images are compared band by band (tile_height rows at a time) so that the memory used by the
+intermediate arrays doesn't grow with the page height.
+A pixel differs when one of its channels differs by more than the tolerance. Pixels inside
+the ignored regions are not compared. The images match when the ratio of different pixels
+among the compared ones is at most max_diff_ratio.
+Screenshots are in device pixels while the elements are located in CSS pixels: the regions of
+the elements are scaled by the device pixel ratio of the capture.
+"""
+import logging
+import math
+from typing import Iterable, Tuple, Union
+
+from .finders import resolve_many
+from .scripts import ELEMENT_RECTS
+
+log = logging.getLogger(__name__)
+
+# Left, top, width and height in pixels
+Region = Tuple[int, int, int, int]
+
+# The baseline pixels kept in the diff image, different pixels are painted in red
+DIFF_COLOR = (255, 0, 0)
+DIFF_FADE = 0.3
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("The visual comparison needs NumPy. "
+                          "Install it with 'pip install eaiautomatontools[visual]'") from None
+    return numpy
+
+
+def _image(source):
+    from PIL import Image
+
+    image = Image.open(source) if isinstance(source, str) else source
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+class VisualDiff:
+    """The result of a screenshots comparison"""
+    __slots__ = ("matched", "different_pixels", "total_pixels", "ratio", "box", "diff_image")
+
+    def __init__(self, matched: bool, different_pixels: int, total_pixels: int,
+                 box: Union[Region, None], diff_image=None):
+        self.matched = matched
+        self.different_pixels = different_pixels
+        self.total_pixels = total_pixels
+        self.ratio = different_pixels / total_pixels if total_pixels else 0.0
+        self.box = box
+        self.diff_image = diff_image
+
+    def __bool__(self):
+        return self.matched
+
+    def __repr__(self):
+        return (f"VisualDiff(matched={self.matched}, different_pixels={self.different_pixels}, "
+                f"ratio={self.ratio:.6f}, box={self.box})")
+
+
+def _bands(numpy, actual, baseline, width, height, tolerance, regions, tile_height):
+    """Yield the top row, the baseline band, the difference mask and the number of ignored
+    pixels of each band"""
+    for top in range(0, height, max(tile_height, 1)):
+        bottom = min(top + tile_height, height)
+        expected_band = baseline.crop((0, top, width, bottom))
+        expected = numpy.asarray(expected_band)
+        current = numpy.asarray(actual.crop((0, top, width, bottom)))
+        # Absolute difference without leaving uint8, then the largest channel difference.
+        # Channel by channel maximum is much faster than a reduction along the last axis.
+        difference = numpy.maximum(expected, current)
+        difference -= numpy.minimum(expected, current)
+        mask = numpy.maximum(numpy.maximum(difference[..., 0], difference[..., 1]),
+                             difference[..., 2]) > tolerance
+        ignored = 0
+        covering = [region for region in regions if region[1] < bottom and region[3] > top]
+        if covering:
+            compared = numpy.ones(mask.shape, dtype=bool)
+            for left, region_top, right, region_bottom in covering:
+                compared[max(region_top - top, 0):region_bottom - top,
+                         max(left, 0):max(right, 0)] = False
+            mask &= compared
+            ignored = compared.size - int(numpy.count_nonzero(compared))
+        yield top, expected_band, mask, ignored
+
+
+def compare_screenshots(actual,
+                        baseline,
+                        tolerance: int = 0,
+                        max_diff_ratio: float = 0.0,
+                        ignore_regions: Iterable[Region] = (),
+                        diff_path: str = None,
+                        tile_height: int = 512) -> VisualDiff:
+    """
+    Compare a screenshot with its baseline.
+    Images of different sizes are compared on their common area, the remaining pixels count
+    as different. The ignored pixels of the common area are left out of the total.
+    :param actual: a PIL Image or an image path
+    :param baseline: a PIL Image or an image path
+    :param tolerance: the largest channel difference, from 0 to 255, of identical pixels
+    :param max_diff_ratio: the largest ratio of different pixels of matching images
+    :param ignore_regions: (left, top, width, height) regions to skip
+    :param diff_path: save the diff image there when the images don't match
+    :param tile_height: the number of rows compared at once
+    :raise ImportError: NumPy is not installed
+    :return: a VisualDiff, the diff image is set when the images don't match
+    """
+    numpy = _numpy()
+    from PIL import Image
+
+    actual, baseline = _image(actual), _image(baseline)
+    width = min(actual.width, baseline.width)
+    height = min(actual.height, baseline.height)
+    size = (max(actual.width, baseline.width), max(actual.height, baseline.height))
+    different = size[0] * size[1] - width * height
+    regions = [(left, top, left + region_width, top + region_height)
+               for left, top, region_width, region_height in ignore_regions]
+    arguments = (numpy, actual, baseline, width, height, tolerance, regions, tile_height)
+    left, top, right, bottom = size[0], size[1], -1, -1
+    total = size[0] * size[1]
+    for band_top, _, mask, ignored in _bands(*arguments):
+        total -= ignored
+        count = int(numpy.count_nonzero(mask))
+        if count:
+            different += count
+            band_rows = numpy.flatnonzero(mask.any(axis=1))
+            band_columns = numpy.flatnonzero(mask.any(axis=0))
+            top = min(top, band_top + int(band_rows[0]))
+            bottom = max(bottom, band_top + int(band_rows[-1]))
+            left = min(left, int(band_columns[0]))
+            right = max(right, int(band_columns[-1]))
+    box = None if right < 0 else (left, top, right - left + 1, bottom - top + 1)
+    result = VisualDiff(False, different, total, box)
+    result.matched = result.ratio <= max_diff_ratio
+    if result.matched:
+        return result
+    # Second pass, only for mismatches: the baseline faded with the different pixels in red
+    diff_image = Image.new("RGB", size, DIFF_COLOR)
+    for band_top, expected_band, mask, _ in _bands(*arguments):
+        faded = Image.blend(Image.new("RGB", expected_band.size, (255, 255, 255)),
+                            expected_band, DIFF_FADE)
+        faded.paste(DIFF_COLOR, (0, 0), Image.fromarray(mask.astype(numpy.uint8) * 255, "L"))
+        diff_image.paste(faded, (0, band_top))
+    result.diff_image = diff_image
+    if diff_path is not None:
+        diff_image.save(diff_path)
+    return result
+
+
+def scale_regions(regions: Iterable[Region], scale: float) -> list:
+    """
+    Scale CSS pixel regions to the device pixels of a screenshot. The scaled regions cover
+    every pixel the original ones partly cover.
+    :param regions: (left, top, width, height) regions
+    :param scale: the device pixel ratio of the screenshot
+    :return: a list of (left, top, width, height) regions
+    """
+    scaled = []
+    for left, top, width, height in regions:
+        scaled_left, scaled_top = math.floor(left * scale), math.floor(top * scale)
+        scaled.append((scaled_left, scaled_top,
+                       math.ceil((left + width) * scale) - scaled_left,
+                       math.ceil((top + height) * scale) - scaled_top))
+    return scaled
+
+
+def element_regions(driver, fields: dict, web_element=None, full_page: bool = True,
+                    scale: float = 1.0) -> list:
+    """
+    Turn fields into the regions of their elements, in a single browser call for the lookup
+    and one for the rectangles. Fields not found are skipped.
+    :param driver: a selenium web driver
+    :param fields: a dictionary of fields
+    :param web_element: a web_element to search from
+    :param full_page: page coordinates when True, viewport coordinates otherwise
+    :param scale: the device pixel ratio of the screenshot the regions apply to
+    :return: a list of (left, top, width, height) regions
+    """
+    elements = list(resolve_many(driver, fields, web_element).values())
+    if not any(element is not None for element in elements):
+        return []
+    regions = [tuple(rect) for rect in driver.execute_script(ELEMENT_RECTS, elements, full_page)]
+    return regions if scale == 1 else scale_regions(regions, scale)
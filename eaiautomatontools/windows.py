@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+Window registry.
+
+Looking a window up by its title means switching to every window and reading its title: two
+commands per window, each switch bringing the window to the front of the browser.
+The registry keeps the title, URL and opener of each window by handle so that windows are
+looked up without switching.
+
+With a BiDi connection (webSocketUrl capability) the registry follows the browsing context
+events: windows created, closed and loaded. Titles are read in their window by a BiDi script
+evaluation, without switching. Otherwise the handles are listed on each lookup and only the
+new windows, or the ones still loading or blank, are read by switching to them once.
+Titles changed by a script are not notified: a lookup reads all the windows again when asked
+(full), which go_to_window does before giving up and wait_for_another_window once its time
+is over.
+"""
+import re
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Iterator, List, Union
+
+from selenium.common.exceptions import NoSuchWindowException
+
+from .scripts import WINDOW_STATE
+from .sessions import get_session
+
+log = getLogger(__name__)
+
+# A popup displays about:blank, a complete document, until its page starts loading
+_BLANK_URLS = ("", "about:blank")
+
+
+class Window:
+    """
+    A window known by the registry
+    :param handle: the window handle
+    :param title: the page title, None until read
+    :param url: the page URL, None until read
+    :param opener: the handle of the window which opened it, None if unknown
+    """
+    __slots__ = ("handle", "title", "url", "opener", "loaded")
+
+    def __init__(self, handle: str, title: str = None, url: str = None, opener: str = None):
+        self.handle = handle
+        self.title = title
+        self.url = url
+        self.opener = opener
+        self.loaded = False
+
+    def matches(self, title: str = None, url: str = None, opener: str = None) -> bool:
+        """Tell if the window has the exact title, an URL matching the url regular expression
+        and the opener. Criteria set to None are ignored"""
+        return (title is None or self.title == title) \
+            and (url is None or (self.url is not None and re.search(url, self.url) is not None)) \
+            and (opener is None or self.opener == opener)
+
+    def __repr__(self):
+        return f"Window(handle={self.handle!r}, title={self.title!r}, url={self.url!r}, " \
+               f"opener={self.opener!r})"
+
+
+class WindowRegistry:
+    """
+    Map the handles of a web driver session to their windows.
+    One instance serves one web driver session.
+    :param driver: a selenium web driver
+    :param events: follow the BiDi browsing context events when the driver has a BiDi connection
+    """
+
+    def __init__(self, driver, events: bool = True):
+        self.__driver = driver
+        self.__windows = {}
+        self.__lock = threading.RLock()
+        self.__handlers = []
+        self.__reads = 0
+        self.__switches = 0
+        # Set on each window creation, closure or page load when following the events
+        self.changed = threading.Event()
+        self.__event_driven = events and self.__subscribe()
+
+    @property
+    def event_driven(self) -> bool:
+        """Read only. True when the registry follows the BiDi browsing context events"""
+        return self.__event_driven
+
+    @property
+    def stats(self) -> dict:
+        """Windows read and switches done to read them"""
+        return {"reads": self.__reads, "switches": self.__switches, "size": len(self.__windows)}
+
+    def __subscribe(self) -> bool:
+        if not (getattr(self.__driver, "capabilities", None) or {}).get("webSocketUrl"):
+            return False
+        try:
+            context = self.__driver.browsing_context
+            for name, callback in (("context_created", self.__on_created),
+                                   ("context_destroyed", self.__on_destroyed),
+                                   ("load", self.__on_load)):
+                self.__handlers.append((name, context.add_event_handler(name, callback)))
+            tree = context.get_tree(max_depth=0)
+        except Exception as exception:
+            log.debug(f"The BiDi browsing context events are not available, list the windows. "
+                      f"Get {exception.args}")
+            self.close()
+            return False
+        with self.__lock:
+            for info in tree:
+                self.__windows.setdefault(info.context,
+                                          Window(info.context, url=info.url,
+                                                 opener=info.original_opener))
+        return True
+
+    def __on_created(self, info):
+        if info.parent is not None:
+            return
+        with self.__lock:
+            self.__windows[info.context] = Window(info.context, url=info.url,
+                                                  opener=info.original_opener)
+        self.changed.set()
+
+    def __on_destroyed(self, info):
+        with self.__lock:
+            self.__windows.pop(info.context, None)
+        self.changed.set()
+
+    def __on_load(self, info):
+        with self.__lock:
+            window = self.__windows.get(info.context)
+            if window is not None:
+                window.url, window.title, window.loaded = info.url, None, False
+        self.changed.set()
+
+    def close(self):
+        """Stop following the events"""
+        for name, handler in self.__handlers:
+            try:
+                self.__driver.browsing_context.remove_event_handler(name, handler)
+            except Exception as exception:
+                log.debug(f"Cannot remove the BiDi '{name}' handler. Get {exception.args}")
+        self.__handlers = []
+        self.__event_driven = False
+
+    def handles(self) -> List[str]:
+        """Return the handles of the windows in their opening order. Without the events, the
+        handles are listed by the driver and the registry is updated"""
+        with self.__lock:
+            if self.__event_driven:
+                return list(self.__windows)
+            handles = self.__driver.window_handles
+            for handle in set(self.__windows) - set(handles):
+                del self.__windows[handle]
+            new = [handle for handle in handles if handle not in self.__windows]
+            if new:
+                # The window opening the new ones is most likely the current one. The openers
+                # of the windows found on the first listing are unknown
+                opener = self.__current_handle() if self.__windows else None
+                for handle in new:
+                    self.__windows[handle] = Window(handle,
+                                                    opener=None if handle == opener else opener)
+            return handles
+
+    def windows(self, full: bool = False) -> List[Window]:
+        """
+        Return the windows in their opening order
+        :param full: read all the windows again instead of the new, loading and blank ones only
+        :return: a list of Window
+        """
+        with self.__lock:
+            handles = self.handles()
+            windows = [self.__windows[handle] for handle in handles if handle in self.__windows]
+            stale = [window for window in windows if full or not window.loaded]
+            if stale:
+                self.__read(stale)
+            return [window for window in windows if window.handle in self.__windows]
+
+    def find(self, title: str = None, url: str = None, opener: str = None,
+             full: bool = False) -> List[Window]:
+        """
+        Return the windows having the exact title, an URL matching the url regular expression
+        and the opener. Only the new, loading and blank windows are read unless full is set.
+        :param title: the exact page title
+        :param url: a regular expression searched in the page URL
+        :param opener: the handle of the window which opened the searched one
+        :param full: read all the windows again first, switching through them without BiDi
+        :return: a list of Window
+        """
+        with self.__lock:
+            return [window for window in self.windows(full)
+                    if window.matches(title, url, opener)]
+
+    def confirm(self, handle: str, title: str = None, url: str = None,
+                opener: str = None) -> bool:
+        """Read the current window, which must be the handle one, and tell if it still
+        matches"""
+        with self.__lock:
+            window = self.__windows.get(handle)
+            if window is None:
+                return False
+            self.__read_current(window)
+            return window.matches(title, url, opener)
+
+    def __current_handle(self) -> Union[str, None]:
+        try:
+            return self.__driver.current_window_handle
+        except NoSuchWindowException:
+            return None
+
+    def __read_current(self, window: Window):
+        window.title, window.url, state = self.__driver.execute_script(WINDOW_STATE)
+        window.loaded = state == "complete" and window.url not in _BLANK_URLS
+        self.__reads += 1
+
+    def __read(self, windows: List[Window]):
+        if self.__event_driven:
+            windows = [window for window in windows if not self.__evaluate_title(window)]
+        if not windows:
+            return
+        current = active = self.__current_handle()
+        try:
+            for window in sorted(windows, key=lambda item: item.handle != current):
+                try:
+                    if window.handle != active:
+                        self.__driver.switch_to.window(window.handle)
+                        active = window.handle
+                        self.__switches += 1
+                    self.__read_current(window)
+                except NoSuchWindowException:
+                    log.debug(f"The window {window.handle} has been closed")
+                    self.__windows.pop(window.handle, None)
+        finally:
+            if current is not None and active != current:
+                self.__driver.switch_to.window(current)
+
+    def __evaluate_title(self, window: Window) -> bool:
+        """Read the window title through BiDi, without switching. Return False on failure"""
+        try:
+            result = self.__driver.script.evaluate(expression="document.title",
+                                                   target={"context": window.handle},
+                                                   await_promise=False)
+        except Exception as exception:
+            log.debug(f"Cannot evaluate the title of {window.handle}. Get {exception.args}")
+            return False
+        if not isinstance(result, dict) or result.get("type") != "success":
+            return False
+        window.title = result["result"].get("value")
+        window.loaded = True
+        self.__reads += 1
+        return True
+
+    def __repr__(self):
+        return f"WindowRegistry(windows={list(self.__windows.values())})"
+
+
+def get_window_registry(driver) -> Union[WindowRegistry, None]:
+    """Return the window registry of the driver session if any"""
+    session = get_session(driver)
+    return None if session is None else session.windows
+
+
+@contextmanager
+def window_registry(driver, events: bool = False) -> Iterator[WindowRegistry]:
+    """
+    Give the window registry of the driver session, or a registry living for the block only
+    :param driver: a selenium web driver
+    :param events: let the block registry follow the BiDi events
+    :return: a context manager giving a WindowRegistry
+    """
+    registry = get_window_registry(driver)
+    if registry is not None:
+        yield registry
+        return
+    registry = WindowRegistry(driver, events)
+    try:
+        yield registry
+    finally:
+        registry.close()
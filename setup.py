@@ -36,6 +36,9 @@ setup(
         'Deprecated',
         'polling2'
     ],
+    extras_require={
+        'visual': ['numpy']
+    },
     python_requires='>=3.7, !=2.*',
     packages=find_packages(),
     include_package_data=True,